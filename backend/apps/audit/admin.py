@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models import Q
 from apps.audit.models.audit_log import AuditLog
+from apps.audit.services.search_index import full_text_q
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
@@ -13,9 +15,10 @@ class AuditLogAdmin(admin.ModelAdmin):
         'is_immutable'
     ]
     list_filter = ['event_type', 'is_immutable', 'created_at']
+    list_select_related = ['user', 'transaction', 'client_ip']
     search_fields = [
         'user__email',
-        'ip_address',
+        'client_ip__value',
         'description'
     ]
     readonly_fields = [
@@ -24,7 +27,7 @@ class AuditLogAdmin(admin.ModelAdmin):
         'user',
         'transaction',
         'description',
-        'data',
+        'full_data',
         'ip_address',
         'user_agent',
         'created_at',
@@ -32,6 +35,23 @@ class AuditLogAdmin(admin.ModelAdmin):
         'is_immutable'
     ]
     ordering = ['-created_at']
+
+    @admin.display(description='Data')
+    def full_data(self, obj):
+        return obj.full_data
+
+    def get_search_results(self, request, queryset, search_term):
+        # Exact matches on email/IP plus the full-text index on description,
+        # instead of the default icontains scan over every search field.
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        queryset = queryset.filter(
+            Q(user__email__iexact=search_term) |
+            Q(client_ip__value=search_term) |
+            full_text_q(search_term, using=queryset.db)
+        )
+        return queryset, False
     
     # Make it read-only since audit logs should not be modified
     def has_add_permission(self, request):
@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class AuditConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.audit'
+
+    def ready(self):
+        post_migrate.connect(_clear_interned_values, sender=self)
+
+
+def _clear_interned_values(**kwargs):
+    # migrate and flush both emit post_migrate; cached lookup ids may no
+    # longer exist afterwards.
+    from apps.audit.services.interning import client_ips, client_user_agents
+    client_ips.clear()
+    client_user_agents.clear()
@@ -0,0 +1,35 @@
+from time import perf_counter
+from apps.audit.models.audit_log import AuditLog
+from apps.audit.serializers.audit_log import AuditLogSerializer
+from apps.audit.services.audit_service import AuditService
+from apps.core.utils.benchmark import benchmark, render_timings
+from apps.users.benchmarks import create_users
+
+
+@benchmark('audit.log_event')
+def log_event(scale):
+    user = create_users(1, prefix='audit-bench')[0]
+    count = max(100, int(2000 * scale))
+    start = perf_counter()
+    for i in range(count):
+        AuditService.log_event(
+            event_type='user_login',
+            user=user,
+            description=f'Benchmark login {i}',
+            data={'sequence': i},
+        )
+    return {'ops_per_sec': count / (perf_counter() - start)}
+
+
+@benchmark('audit.serialize_page')
+def serialize_page(scale):
+    user = create_users(1, prefix='audit-page')[0]
+    for i in range(100):
+        AuditService.log_event(
+            event_type='user_login', user=user, description=f'Benchmark page {i}', data={'sequence': i},
+        )
+    page = list(
+        AuditLog.objects.filter(user=user)
+        .select_related('user', 'transaction', 'transaction__audit_payload', 'client_ip')[:100]
+    )
+    return render_timings(lambda: AuditLogSerializer(page, many=True).data, max(20, int(200 * scale)))
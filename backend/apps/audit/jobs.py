@@ -0,0 +1,19 @@
+from apps.audit.models.audit_log import AuditLog
+from apps.audit.services.rollup_service import WATERMARK_NAME, AuditRollupService
+from apps.core.models.watermark import Watermark
+from apps.core.utils.jobs import job
+
+
+@job('audit.refresh_rollups')
+def refresh_rollups(context, batch_size=50000, settle_seconds=None):
+    position = Watermark.objects.filter(name=WATERMARK_NAME).values_list('position', flat=True).first() or 0
+    context.progress(0, AuditLog.objects.filter(id__gt=position).count(), 'Folding new audit events', force=True)
+    total = AuditRollupService.refresh(batch_size=batch_size, settle_seconds=settle_seconds, on_batch=context.progress)
+    return {'events': total}
+
+
+@job('audit.rebuild_rollups')
+def rebuild_rollups(context, batch_size=50000, settle_seconds=None):
+    context.progress(0, AuditLog.objects.count(), 'Recounting all audit events', force=True)
+    total = AuditRollupService.rebuild(batch_size=batch_size, settle_seconds=settle_seconds, on_batch=context.progress)
+    return {'events': total}
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.audit.services.audit_service import AuditService
+
+class Command(BaseCommand):
+    help = "Store the pre-rendered API representation for audit logs that lack one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = AuditService.render_missing(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rendered {total} audit logs"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from apps.audit.services.rollup_service import AuditRollupService
+
+class Command(BaseCommand):
+    help = "Fold new audit events into the hourly/daily AuditRollup table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help="Discard existing rollups and recount from scratch")
+        parser.add_argument('--batch-size', type=int, default=50000)
+        parser.add_argument('--settle-seconds', type=int, default=None)
+
+    def handle(self, *args, **options):
+        run = AuditRollupService.rebuild if options['rebuild'] else AuditRollupService.refresh
+        total = run(batch_size=options['batch_size'], settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {total} audit events"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+from apps.audit.services.search_index import install_search_index, remove_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0003_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["-created_at"], name="audit_audit_created_6e540c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["ip_address", "-created_at"],
+                name="audit_audit_ip_addr_ff6f1d_idx",
+            ),
+        ),
+        migrations.RunPython(install_search_index, remove_search_index),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0004_auditlog_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RenderedAuditLog",
+            fields=[
+                (
+                    "audit_log",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="rendered",
+                        serialize=False,
+                        to="audit.auditlog",
+                    ),
+                ),
+                ("body", models.TextField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0005_renderedauditlog"),
+        ("transactions", "0004_transaction_recipient_id_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditPayload",
+            fields=[
+                (
+                    "transaction",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="audit_payload",
+                        serialize=False,
+                        to="transactions.transaction",
+                    ),
+                ),
+                ("data", models.JSONField(default=dict)),
+            ],
+        ),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def deduplicate_payloads(apps, schema_editor):
+    AuditLog = apps.get_model("audit", "AuditLog")
+    AuditPayload = apps.get_model("audit", "AuditPayload")
+    db = schema_editor.connection.alias
+
+    candidates = AuditLog.objects.using(db).filter(
+        transaction__isnull=False,
+        transaction__audit_payload__isnull=True,
+        data__has_key="direction",
+    )
+    last_transaction_id = 0
+    while True:
+        transaction_ids = list(
+            candidates.filter(transaction_id__gt=last_transaction_id)
+            .order_by("transaction_id")
+            .values_list("transaction_id", flat=True)
+            .distinct()[:BATCH_SIZE]
+        )
+        if not transaction_ids:
+            break
+        last_transaction_id = transaction_ids[-1]
+
+        payloads = {}
+        logs = list(
+            candidates.filter(transaction_id__in=transaction_ids).order_by("id")
+        )
+        for log in logs:
+            shared = payloads.get(log.transaction_id)
+            if shared is None:
+                shared = {k: v for k, v in log.data.items() if k != "direction"}
+                payloads[log.transaction_id] = shared
+            # Keep whatever this entry does not share with the payload.
+            log.data = {
+                k: v for k, v in log.data.items() if k not in shared or shared[k] != v
+            }
+
+        AuditPayload.objects.using(db).bulk_create(
+            [
+                AuditPayload(transaction_id=transaction_id, data=data)
+                for transaction_id, data in payloads.items()
+            ]
+        )
+        AuditLog.objects.using(db).bulk_update(logs, ["data"], batch_size=BATCH_SIZE)
+
+
+def restore_payloads(apps, schema_editor):
+    AuditLog = apps.get_model("audit", "AuditLog")
+    AuditPayload = apps.get_model("audit", "AuditPayload")
+    db = schema_editor.connection.alias
+
+    last_transaction_id = 0
+    while True:
+        payloads = list(
+            AuditPayload.objects.using(db)
+            .filter(transaction_id__gt=last_transaction_id)
+            .order_by("transaction_id")[:BATCH_SIZE]
+        )
+        if not payloads:
+            break
+        last_transaction_id = payloads[-1].transaction_id
+
+        shared = {payload.transaction_id: payload.data for payload in payloads}
+        logs = list(AuditLog.objects.using(db).filter(transaction_id__in=shared))
+        for log in logs:
+            log.data = {**shared[log.transaction_id], **log.data}
+        AuditLog.objects.using(db).bulk_update(logs, ["data"], batch_size=BATCH_SIZE)
+        AuditPayload.objects.using(db).filter(transaction_id__in=shared).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0006_auditpayload"),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_payloads, restore_payloads),
+    ]
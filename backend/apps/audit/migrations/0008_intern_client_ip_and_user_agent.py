@@ -0,0 +1,192 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:22
+
+import django.db.models.deletion
+import hashlib
+
+from django.db import migrations, models
+
+from apps.audit.services.search_index import install_search_index
+
+BATCH_SIZE = 2000
+
+
+def intern_client_values(apps, schema_editor):
+    AuditLog = apps.get_model("audit", "AuditLog")
+    ClientIP = apps.get_model("audit", "ClientIP")
+    ClientUserAgent = apps.get_model("audit", "ClientUserAgent")
+    db = schema_editor.connection.alias
+
+    ips = {}
+    agents = {}
+    last_id = 0
+    while True:
+        rows = list(
+            AuditLog.objects.using(db)
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "ip_address", "user_agent")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        new_ips = {ip for _, ip, _ in rows if ip and ip not in ips}
+        for row in ClientIP.objects.using(db).bulk_create(
+            [ClientIP(value=ip) for ip in new_ips]
+        ):
+            ips[row.value] = row.pk
+        new_agents = {agent for _, _, agent in rows if agent and agent not in agents}
+        for row in ClientUserAgent.objects.using(db).bulk_create(
+            [
+                ClientUserAgent(
+                    digest=hashlib.sha256(agent.encode("utf-8")).hexdigest(),
+                    value=agent,
+                )
+                for agent in new_agents
+            ]
+        ):
+            agents[row.value] = row.pk
+        if new_ips or new_agents:
+            # bulk_create does not return primary keys on every backend.
+            ips.update(
+                ClientIP.objects.using(db)
+                .filter(value__in=new_ips)
+                .values_list("value", "id")
+            )
+            agents.update(
+                ClientUserAgent.objects.using(db)
+                .filter(value__in=new_agents)
+                .values_list("value", "id")
+            )
+
+        AuditLog.objects.using(db).bulk_update(
+            [
+                AuditLog(
+                    id=pk,
+                    client_ip_id=ips.get(ip),
+                    client_user_agent_id=agents.get(agent),
+                )
+                for pk, ip, agent in rows
+            ],
+            ["client_ip", "client_user_agent"],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def restore_client_values(apps, schema_editor):
+    AuditLog = apps.get_model("audit", "AuditLog")
+    ClientIP = apps.get_model("audit", "ClientIP")
+    ClientUserAgent = apps.get_model("audit", "ClientUserAgent")
+    db = schema_editor.connection.alias
+
+    ips = dict(ClientIP.objects.using(db).values_list("id", "value"))
+    agents = dict(ClientUserAgent.objects.using(db).values_list("id", "value"))
+    last_id = 0
+    while True:
+        rows = list(
+            AuditLog.objects.using(db)
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", "client_ip_id", "client_user_agent_id")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        AuditLog.objects.using(db).bulk_update(
+            [
+                AuditLog(
+                    id=pk, ip_address=ips.get(ip), user_agent=agents.get(agent, "")
+                )
+                for pk, ip, agent in rows
+            ],
+            ["ip_address", "user_agent"],
+            batch_size=BATCH_SIZE,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0007_deduplicate_transaction_payloads"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientIP",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.GenericIPAddressField(unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ClientUserAgent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64, unique=True)),
+                ("value", models.TextField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="client_ip",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="audit.clientip",
+            ),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="client_user_agent",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="audit.clientuseragent",
+            ),
+        ),
+        migrations.RunPython(intern_client_values, restore_client_values),
+        migrations.RemoveIndex(
+            model_name="auditlog",
+            name="audit_audit_ip_addr_ff6f1d_idx",
+        ),
+        migrations.RemoveField(
+            model_name="auditlog",
+            name="ip_address",
+        ),
+        migrations.RemoveField(
+            model_name="auditlog",
+            name="user_agent",
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["client_ip", "-created_at"],
+                name="audit_audit_client__6416a4_idx",
+            ),
+        ),
+        # Removing columns may rebuild audit_auditlog on SQLite, which drops
+        # the full-text triggers.
+        migrations.RunPython(install_search_index, migrations.RunPython.noop),
+    ]
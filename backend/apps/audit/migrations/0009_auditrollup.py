@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0008_intern_client_ip_and_user_agent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("event_type", models.CharField(max_length=50)),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=10
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["granularity", "bucket_start", "event_type"],
+                "indexes": [
+                    models.Index(
+                        fields=["granularity", "bucket_start"],
+                        name="audit_audit_granula_4d8519_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("event_type", "bucket_start", "granularity"),
+                        name="unique_audit_rollup_bucket",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+RELATED_FIELDS = ("user", "user_email", "transaction", "transaction_reference")
+
+
+def strip_related_fields(apps, schema_editor):
+    # Stored bodies now hold only the audit row's own fields; reads add
+    # the user and transaction fields from the current related rows.
+    RenderedAuditLog = apps.get_model("audit", "RenderedAuditLog")
+    db = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        rows = list(
+            RenderedAuditLog.objects.using(db)
+            .filter(audit_log_id__gt=last_id)
+            .order_by("audit_log_id")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].audit_log_id
+        for row in rows:
+            body = json.loads(row.body)
+            row.body = json.dumps(
+                {k: v for k, v in body.items() if k not in RELATED_FIELDS},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        RenderedAuditLog.objects.using(db).bulk_update(rows, ["body"], batch_size=BATCH_SIZE)
+
+
+def drop_rendered_bodies(apps, schema_editor):
+    # Older code expects the related fields inside the body; logs without
+    # one are rendered on read and refilled by render_audit_logs.
+    RenderedAuditLog = apps.get_model("audit", "RenderedAuditLog")
+    RenderedAuditLog.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0009_auditrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_related_fields, drop_rendered_bodies),
+    ]
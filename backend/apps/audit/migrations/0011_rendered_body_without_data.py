@@ -0,0 +1,59 @@
+import json
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+DATA_FIELDS = (
+    "data",
+    "sender_id",
+    "receiver_id",
+    "amount",
+    "transaction_type",
+    "status",
+    "from_user_name",
+    "to_user_name",
+)
+
+
+def strip_data_fields(apps, schema_editor):
+    # Reads now splice data and the fields derived from it in from the
+    # entry and its AuditPayload, so bodies no longer repeat the payload.
+    RenderedAuditLog = apps.get_model("audit", "RenderedAuditLog")
+    db = schema_editor.connection.alias
+
+    last_id = 0
+    while True:
+        rows = list(
+            RenderedAuditLog.objects.using(db)
+            .filter(audit_log_id__gt=last_id)
+            .order_by("audit_log_id")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        last_id = rows[-1].audit_log_id
+        for row in rows:
+            body = json.loads(row.body)
+            row.body = json.dumps(
+                {k: v for k, v in body.items() if k not in DATA_FIELDS},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        RenderedAuditLog.objects.using(db).bulk_update(rows, ["body"], batch_size=BATCH_SIZE)
+
+
+def drop_rendered_bodies(apps, schema_editor):
+    # Older code expects data inside the body; logs without one are
+    # rendered on read and refilled by render_audit_logs.
+    RenderedAuditLog = apps.get_model("audit", "RenderedAuditLog")
+    RenderedAuditLog.objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit", "0010_rendered_body_without_related_fields"),
+    ]
+
+    operations = [
+        migrations.RunPython(strip_data_fields, drop_rendered_bodies),
+    ]
@@ -1,5 +1,14 @@
 from .audit_log import AuditLog
+from .audit_payload import AuditPayload
+from .audit_rollup import AuditRollup
+from .client import ClientIP, ClientUserAgent
+from .rendered_audit_log import RenderedAuditLog
 
 __all__ = [
 	"AuditLog",
+	"AuditPayload",
+	"AuditRollup",
+	"ClientIP",
+	"ClientUserAgent",
+	"RenderedAuditLog",
 ]
@@ -2,6 +2,7 @@ from django.db import models
 from apps.core.models.base import TimeStampedModel
 from apps.users.models.user import CustomUser
 from apps.transactions.models.transaction import Transaction
+from apps.audit.models.client import ClientIP, ClientUserAgent
 
 class AuditLog(TimeStampedModel):
     EVENT_TYPES = [
@@ -19,8 +20,8 @@ class AuditLog(TimeStampedModel):
     transaction = models.ForeignKey(Transaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
     description = models.TextField()
     data = models.JSONField(default=dict)
-    ip_address = models.GenericIPAddressField(null=True, blank=True)
-    user_agent = models.TextField(blank=True)
+    client_ip = models.ForeignKey(ClientIP, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False)
+    client_user_agent = models.ForeignKey(ClientUserAgent, on_delete=models.PROTECT, null=True, blank=True, related_name='+', db_index=False)
     is_immutable = models.BooleanField(default=True, editable=False)
 
     class Meta:
@@ -28,11 +29,30 @@ class AuditLog(TimeStampedModel):
         indexes = [
             models.Index(fields=['event_type', '-created_at']),
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['-created_at']),
+            models.Index(fields=['client_ip', '-created_at']),
         ]
 
     def __str__(self):
         return f"{self.event_type} - {self.created_at}"
 
+    @property
+    def ip_address(self):
+        return self.client_ip.value if self.client_ip_id else None
+
+    @property
+    def user_agent(self):
+        return self.client_user_agent.value if self.client_user_agent_id else ''
+
+    @property
+    def full_data(self):
+        """``data`` merged over the shared transaction payload, i.e. the
+        shape every entry had before payloads were deduplicated."""
+        payload = getattr(self.transaction, 'audit_payload', None) if self.transaction_id else None
+        if payload is None:
+            return self.data
+        return {**payload.data, **self.data}
+
     def save(self, *args, **kwargs):
         if self.pk:
             raise Exception("Audit logs are immutable and cannot be modified")
@@ -0,0 +1,23 @@
+from django.db import models
+from apps.transactions.models.transaction import Transaction
+
+class AuditPayload(models.Model):
+    """Transaction details shared by every AuditLog entry of one transaction.
+
+    A transfer produces a sender and a receiver entry; instead of repeating
+    the same JSON in both, each entry keeps only what differs (direction)
+    and AuditLog.full_data merges the two back together on read.
+    """
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, primary_key=True, related_name='audit_payload')
+    data = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Audit payload {self.transaction_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise Exception("Audit payloads are immutable and cannot be modified")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise Exception("Audit payloads are immutable and cannot be deleted")
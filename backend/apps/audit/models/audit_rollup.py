@@ -0,0 +1,25 @@
+from django.db import models
+
+class AuditRollup(models.Model):
+    """Number of audit events of one type within an hour or day bucket."""
+    GRANULARITIES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    event_type = models.CharField(max_length=50)
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    bucket_start = models.DateTimeField()
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['granularity', 'bucket_start', 'event_type']
+        constraints = [
+            models.UniqueConstraint(fields=['event_type', 'bucket_start', 'granularity'], name='unique_audit_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.granularity} {self.bucket_start}: {self.count}"
@@ -0,0 +1,25 @@
+import hashlib
+from django.db import models
+
+class ClientIP(models.Model):
+    """Interned client IP address referenced by AuditLog.client_ip."""
+    value = models.GenericIPAddressField(unique=True)
+
+    def __str__(self):
+        return self.value
+
+class ClientUserAgent(models.Model):
+    """Interned User-Agent string referenced by AuditLog.client_user_agent.
+
+    User agents are unbounded, so uniqueness is enforced on a SHA-256 digest
+    rather than on the text itself.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    value = models.TextField()
+
+    def __str__(self):
+        return self.value
+
+    @staticmethod
+    def digest_for(value):
+        return hashlib.sha256(value.encode('utf-8')).hexdigest()
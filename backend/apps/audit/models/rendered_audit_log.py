@@ -0,0 +1,16 @@
+from django.db import models
+from apps.audit.models.audit_log import AuditLog
+
+class RenderedAuditLog(models.Model):
+    """API representation of an AuditLog, encoded once at insert time.
+
+    Only fields owned by the immutable audit row are stored, so the body
+    never goes stale. The user and transaction fields, which can change
+    after insert, and ``data`` with its shared AuditPayload are added on
+    read (AuditService.rendered_bodies).
+    """
+    audit_log = models.OneToOneField(AuditLog, on_delete=models.CASCADE, primary_key=True, related_name='rendered')
+    body = models.TextField()
+
+    def __str__(self):
+        return f"Rendered {self.audit_log_id}"
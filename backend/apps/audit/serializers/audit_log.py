@@ -1,9 +1,29 @@
 from rest_framework import serializers
 from apps.audit.models.audit_log import AuditLog
+from apps.core.serializers.sparse_fields import SparseFieldsetSerializerMixin
 
-class AuditLogSerializer(serializers.ModelSerializer):
+FULL_DATA = ['data', 'transaction__audit_payload__data']
+DETAIL_FIELDS = ('sender_id', 'receiver_id', 'amount', 'transaction_type', 'status', 'from_user_name', 'to_user_name')
+
+
+def transaction_details(data):
+    """The transaction detail fields of an entry with ``data`` as its
+    full (payload-merged) data."""
+    return {
+        'sender_id': data.get('from_recipient_id') or data.get('from_user_id'),
+        'receiver_id': data.get('to_recipient_id'),
+        'amount': data.get('amount'),
+        'transaction_type': data.get('transaction_type', ''),
+        'status': data.get('status', ''),
+        'from_user_name': data.get('from_user_name', ''),
+        'to_user_name': data.get('to_user_name', ''),
+    }
+
+class AuditLogSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email', read_only=True)
     transaction_reference = serializers.CharField(source='transaction.reference_id', read_only=True, allow_null=True)
+    data = serializers.JSONField(source='full_data', read_only=True)
+    ip_address = serializers.ReadOnlyField()
     
     # Transaction detail fields extracted from data
     sender_id = serializers.SerializerMethodField()
@@ -23,24 +43,35 @@ class AuditLogSerializer(serializers.ModelSerializer):
             'description', 'data', 'ip_address', 'created_at', 'is_immutable'
         ]
         read_only_fields = ['id', 'created_at', 'is_immutable']
+        sparse_dependencies = {
+            'ip_address': ['client_ip__value'],
+            'data': FULL_DATA,
+            'sender_id': FULL_DATA,
+            'receiver_id': FULL_DATA,
+            'amount': FULL_DATA,
+            'transaction_type': FULL_DATA,
+            'status': FULL_DATA,
+            'from_user_name': FULL_DATA,
+            'to_user_name': FULL_DATA,
+        }
     
     def get_sender_id(self, obj):
-        return obj.data.get('from_recipient_id') or obj.data.get('from_user_id')
-    
+        return transaction_details(obj.full_data)['sender_id']
+
     def get_receiver_id(self, obj):
-        return obj.data.get('to_recipient_id')
-    
+        return transaction_details(obj.full_data)['receiver_id']
+
     def get_amount(self, obj):
-        return obj.data.get('amount')
-    
+        return transaction_details(obj.full_data)['amount']
+
     def get_transaction_type(self, obj):
-        return obj.data.get('transaction_type', '')
-    
+        return transaction_details(obj.full_data)['transaction_type']
+
     def get_status(self, obj):
-        return obj.data.get('status', '')
-    
+        return transaction_details(obj.full_data)['status']
+
     def get_from_user_name(self, obj):
-        return obj.data.get('from_user_name', '')
-    
+        return transaction_details(obj.full_data)['from_user_name']
+
     def get_to_user_name(self, obj):
-        return obj.data.get('to_user_name', '')
+        return transaction_details(obj.full_data)['to_user_name']
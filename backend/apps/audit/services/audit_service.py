@@ -1,23 +1,121 @@
+from django.db.models import Q
 from apps.audit.models.audit_log import AuditLog
+from apps.audit.models.audit_payload import AuditPayload
+from apps.audit.models.rendered_audit_log import RenderedAuditLog
+from apps.audit.serializers.audit_log import DETAIL_FIELDS, AuditLogSerializer, transaction_details
+from apps.audit.services.interning import client_ips, client_user_agents
+from apps.audit.services.search_index import full_text_q
+from apps.core.utils import sharding
+from apps.core.utils.renderers import FastJSONRenderer
 from django.contrib.auth import get_user_model
 from apps.transactions.models.transaction import Transaction
 
 User = get_user_model()
 
+# Parts of the API shape read from other rows. They can change after
+# insert (an email edit, SET_NULL when the user or transaction is
+# deleted), so stored bodies leave them out and reads add them back from
+# the columns selected with the body. The same goes for data and the
+# fields derived from it: storing the shared AuditPayload once per entry
+# would undo its deduplication.
+SPLICED_FIELDS = ('user', 'user_email', 'transaction', 'transaction_reference', 'data', *DETAIL_FIELDS)
+RENDER_COLUMNS = (
+    'id', 'rendered__body', 'user_id', 'user__email', 'transaction_id', 'transaction__reference_id',
+    'data', 'transaction__audit_payload__data',
+)
+
+_renderer = FastJSONRenderer()
+
+
+def _encode(data):
+    return _renderer.render(data).decode('utf-8')
+
 class AuditService:
     @staticmethod
     def log_event(event_type, user=None, transaction=None, description="", data=None, request=None):
-        audit_log = AuditLog.objects.create(
+        # Entries live on the shard of the account they belong to.
+        using = sharding.shard_of(user) if user is not None else sharding.db()
+        audit_log = AuditLog.objects.using(using).create(
             event_type=event_type,
             user=user,
             transaction=transaction,
             description=description,
             data=data or {},
-            ip_address=AuditService.get_client_ip(request) if request else None,
-            user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
+            client_ip=client_ips.get(AuditService.get_client_ip(request), using=using) if request else None,
+            client_user_agent=client_user_agents.get(request.META.get('HTTP_USER_AGENT', ''), using=using) if request else None,
         )
+        RenderedAuditLog.objects.using(using).create(audit_log=audit_log, body=AuditService.render_stored(audit_log))
         return audit_log
 
+    @staticmethod
+    def create_payload(transaction, data):
+        """Store the part of the audit data shared by all entries for
+        ``transaction``; entries logged afterwards only carry their own keys."""
+        return AuditPayload.objects.using(transaction._state.db).create(transaction=transaction, data=data)
+
+    @staticmethod
+    def render(audit_log):
+        return _encode(AuditLogSerializer(audit_log).data)
+
+    @staticmethod
+    def render_stored(audit_log):
+        """The part of the API representation owned by the audit row."""
+        data = AuditLogSerializer(audit_log).data
+        return _encode({name: value for name, value in data.items() if name not in SPLICED_FIELDS})
+
+    @staticmethod
+    def rendered_bodies(rows, using=None):
+        """Map rows of RENDER_COLUMNS (plus any trailing columns) read from
+        ``using`` to JSON bodies, rendering on the fly any log that has no
+        stored representation (e.g. bulk-loaded rows). Without ``using``
+        each such log is read from the shard its id was allocated on."""
+        missing = {}
+        for pk, body, *_ in rows:
+            if body is None:
+                missing.setdefault(using or sharding.shard_for_id(pk), []).append(pk)
+        rendered = {}
+        for alias, ids in missing.items():
+            logs = AuditLog.objects.using(alias).filter(id__in=ids).select_related(
+                'user', 'transaction', 'transaction__audit_payload', 'client_ip'
+            )
+            rendered.update((log.id, AuditService.render(log)) for log in logs)
+        bodies = []
+        for pk, body, user_id, user_email, transaction_id, reference_id, data, payload, *_ in rows:
+            if body is None:
+                bodies.append(rendered[pk])
+                continue
+            # As AuditLog.full_data
+            data = {**payload, **data} if payload is not None else data
+            related = {
+                'user': user_id, 'transaction': transaction_id, 'transaction_reference': reference_id,
+                **transaction_details(data), 'data': data,
+            }
+            if user_id is not None:
+                # Like the serializer, which skips user_email without a user.
+                related['user_email'] = user_email
+            related = _encode(related)
+            bodies.append(body[:-1] + ',' + related[1:])
+        return bodies
+
+    @staticmethod
+    def render_missing(batch_size=1000):
+        total = 0
+        for alias in sharding.shards():
+            with sharding.use(alias):
+                while True:
+                    logs = list(
+                        AuditLog.objects.filter(rendered__isnull=True)
+                        .select_related('user', 'transaction', 'transaction__audit_payload', 'client_ip')
+                        .order_by('id')[:batch_size]
+                    )
+                    if not logs:
+                        break
+                    RenderedAuditLog.objects.bulk_create([
+                        RenderedAuditLog(audit_log=log, body=AuditService.render_stored(log)) for log in logs
+                    ])
+                    total += len(logs)
+        return total
+
     @staticmethod
     def get_client_ip(request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -29,7 +127,12 @@ class AuditService:
 
     @staticmethod
     def get_audit_logs(event_type=None, user=None, transaction=None):
-        queryset = AuditLog.objects.all()
+        if user is not None:
+            queryset = AuditLog.objects.using(sharding.shard_of(user))
+        elif transaction is not None:
+            queryset = AuditLog.objects.using(transaction._state.db)
+        else:
+            queryset = AuditLog.objects.all()
         if event_type:
             queryset = queryset.filter(event_type=event_type)
         if user:
@@ -37,3 +140,23 @@ class AuditService:
         if transaction:
             queryset = queryset.filter(transaction=transaction)
         return queryset
+
+    @staticmethod
+    def search_logs(queryset, date_from=None, date_to=None, reference_id=None,
+                    ip_address=None, recipient_id=None, text=None):
+        if date_from:
+            queryset = queryset.filter(created_at__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(created_at__lt=date_to)
+        if reference_id:
+            queryset = queryset.filter(transaction__reference_id=reference_id)
+        if ip_address:
+            queryset = queryset.filter(client_ip__value=ip_address)
+        if recipient_id:
+            queryset = queryset.filter(
+                Q(transaction__from_recipient_id=recipient_id) |
+                Q(transaction__to_recipient_id=recipient_id)
+            )
+        if text:
+            queryset = queryset.filter(full_text_q(text, using=queryset.db))
+        return queryset
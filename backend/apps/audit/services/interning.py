@@ -0,0 +1,69 @@
+import ipaddress
+import threading
+from collections import OrderedDict
+from functools import partial
+from django.db import transaction as db_transaction
+from apps.audit.models.client import ClientIP, ClientUserAgent
+
+
+class Interner:
+    """Resolve repeated strings to rows of a small lookup table.
+
+    Resolved rows are kept in a bounded per-process LRU cache so the hot
+    path is a dict lookup. Entries are only cached once the surrounding
+    DB transaction commits, so a rollback can never leave the cache
+    pointing at a row that does not exist.
+    """
+
+    def __init__(self, resolve, max_entries=10000):
+        self._resolve = resolve
+        self._max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, value, using='default'):
+        if not value:
+            return None
+        key = (using, value)
+        with self._lock:
+            row = self._cache.get(key)
+            if row is not None:
+                self._cache.move_to_end(key)
+                return row
+        row = self._resolve(value, using)
+        if row is None:
+            return None
+        db_transaction.on_commit(partial(self._remember, key, row), using=using)
+        return row
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _remember(self, key, row):
+        with self._lock:
+            self._cache[key] = row
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+
+
+def _resolve_ip(value, using):
+    try:
+        value = str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+    row, _ = ClientIP.objects.using(using).get_or_create(value=value)
+    return row
+
+
+def _resolve_user_agent(value, using):
+    row, _ = ClientUserAgent.objects.using(using).get_or_create(
+        digest=ClientUserAgent.digest_for(value),
+        defaults={'value': value},
+    )
+    return row
+
+
+client_ips = Interner(_resolve_ip)
+client_user_agents = Interner(_resolve_user_agent)
@@ -0,0 +1,126 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from apps.audit.models.audit_log import AuditLog
+from apps.audit.models.audit_rollup import AuditRollup
+from apps.core.models.watermark import Watermark
+from apps.core.utils import sharding
+
+WATERMARK_NAME = 'audit_rollup'
+
+TRUNCATE = {
+    'hour': TruncHour,
+    'day': TruncDay,
+}
+
+
+class AuditRollupService:
+    @staticmethod
+    def refresh(batch_size=50000, settle_seconds=None, on_batch=None):
+        """Fold audit rows newer than the watermark into the rollup table,
+        on every shard (each keeps its own rollups and watermark).
+
+        Rows younger than ``settle_seconds`` are left for the next run: ids
+        are allocated before commit, so a slow transaction could otherwise
+        commit a lower id after the watermark has already moved past it.
+        ``on_batch`` is called with the running total after each batch.
+        Returns the number of audit rows consumed.
+        """
+        if settle_seconds is None:
+            settle_seconds = getattr(settings, 'AUDIT_ROLLUP_SETTLE_SECONDS', 30)
+        cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+
+        processed = 0
+        for alias in sharding.shards():
+            with sharding.use(alias):
+                while True:
+                    with db_transaction.atomic(using=alias):
+                        watermark = Watermark.acquire(WATERMARK_NAME)
+                        pending = AuditLog.objects.filter(id__gt=watermark.position, created_at__lte=cutoff)
+                        batch_end = list(pending.order_by('id').values_list('id', flat=True)[batch_size - 1:batch_size])
+                        upper = batch_end[0] if batch_end else pending.aggregate(upper=Max('id'))['upper']
+                        if upper is None:
+                            break
+
+                        processed += AuditRollupService._apply(
+                            AuditLog.objects.filter(id__gt=watermark.position, id__lte=upper)
+                        )
+                        watermark.position = upper
+                        watermark.save()
+                    if on_batch is not None:
+                        on_batch(processed)
+        return processed
+
+    @staticmethod
+    def rebuild(batch_size=50000, settle_seconds=None, on_batch=None):
+        for alias in sharding.shards():
+            with sharding.use(alias), db_transaction.atomic(using=alias):
+                watermark = Watermark.acquire(WATERMARK_NAME)
+                AuditRollup.objects.all().delete()
+                watermark.position = 0
+                watermark.save()
+        return AuditRollupService.refresh(batch_size=batch_size, settle_seconds=settle_seconds, on_batch=on_batch)
+
+    @staticmethod
+    def _apply(rows):
+        total = 0
+        for granularity, truncate in TRUNCATE.items():
+            counts = (
+                rows.annotate(bucket=truncate('created_at', tzinfo=dt_timezone.utc))
+                .values('event_type', 'bucket')
+                .annotate(n=Count('id'))
+                .order_by()
+            )
+            deltas = {(row['event_type'], row['bucket']): row['n'] for row in counts}
+            if not deltas:
+                continue
+            if granularity == 'hour':
+                total = sum(deltas.values())
+
+            existing = {
+                (rollup.event_type, rollup.bucket_start): rollup
+                for rollup in AuditRollup.objects.filter(
+                    granularity=granularity,
+                    bucket_start__in={bucket for _, bucket in deltas},
+                    event_type__in={event_type for event_type, _ in deltas},
+                )
+            }
+            to_update, to_create = [], []
+            for (event_type, bucket), n in deltas.items():
+                rollup = existing.get((event_type, bucket))
+                if rollup is None:
+                    to_create.append(AuditRollup(
+                        event_type=event_type, granularity=granularity, bucket_start=bucket, count=n
+                    ))
+                else:
+                    rollup.count += n
+                    to_update.append(rollup)
+            AuditRollup.objects.bulk_update(to_update, ['count'])
+            AuditRollup.objects.bulk_create(to_create)
+        return total
+
+    @staticmethod
+    def stats(granularity, start, end, event_type=None):
+        """Buckets and per-event totals in ``[start, end)``, added up over
+        the shards."""
+        counts = {}
+        for alias in sharding.shards():
+            queryset = AuditRollup.objects.using(alias).filter(
+                granularity=granularity, bucket_start__gte=start, bucket_start__lt=end
+            )
+            if event_type:
+                queryset = queryset.filter(event_type=event_type)
+            for row in queryset.values('event_type', 'bucket_start', 'count'):
+                key = (row['event_type'], row['bucket_start'])
+                counts[key] = counts.get(key, 0) + row['count']
+        buckets = [
+            {'event_type': event_type, 'bucket_start': bucket_start, 'count': count}
+            for (event_type, bucket_start), count in sorted(counts.items(), key=lambda item: (item[0][1], item[0][0]))
+        ]
+        totals = {}
+        for (event_type, _), count in sorted(counts.items()):
+            totals[event_type] = totals.get(event_type, 0) + count
+        return buckets, totals
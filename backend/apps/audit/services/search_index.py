@@ -0,0 +1,119 @@
+import re
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Full-text index over AuditLog.description.
+#   SQLite:     external-content FTS5 table kept in sync by triggers
+#   PostgreSQL: GIN expression index on to_tsvector('simple', description)
+# Any other backend falls back to icontains matching.
+
+FTS_TABLE = 'audit_auditlog_fts'
+PG_INDEX = 'audit_auditlog_description_fts'
+
+SQLITE_INSTALL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(description, content='audit_auditlog', content_rowid='id')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON audit_auditlog BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON audit_auditlog BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description) VALUES ('delete', old.id, old.description);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVE = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+PG_INSTALL = [
+    f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON audit_auditlog USING gin (to_tsvector('simple', description))",
+]
+
+PG_REMOVE = [
+    f"DROP INDEX IF EXISTS {PG_INDEX}",
+]
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_sqlite_fts_available = {}
+
+
+def install_search_index(apps, schema_editor):
+    """Create the FTS structures. Idempotent, so migrations that rebuild
+    audit_auditlog on SQLite (which drops its triggers) can call it again."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = SQLITE_INSTALL
+    elif vendor == 'postgresql':
+        statements = PG_INSTALL
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+    _sqlite_fts_available.clear()
+
+
+def remove_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        statements = SQLITE_REMOVE
+    elif vendor == 'postgresql':
+        statements = PG_REMOVE
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+    _sqlite_fts_available.clear()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text or '')
+
+
+def full_text_q(text, using='default'):
+    """Return a Q matching AuditLog rows whose description contains every
+    term in ``text`` (prefix match on SQLite, word match on PostgreSQL)."""
+    terms = tokenize(text)
+    if not terms:
+        return Q()
+
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return Q(id__in=RawSQL(
+            "SELECT id FROM audit_auditlog "
+            "WHERE to_tsvector('simple', description) @@ plainto_tsquery('simple', %s)",
+            [' '.join(terms)],
+        ))
+
+    if connection.vendor == 'sqlite' and _has_sqlite_fts(connection):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        return Q(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            [match],
+        ))
+
+    q = Q()
+    for term in terms:
+        q &= Q(description__icontains=term)
+    return q
+
+
+def _has_sqlite_fts(connection):
+    key = (connection.alias, str(connection.settings_dict['NAME']))
+    if key not in _sqlite_fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [FTS_TABLE],
+            )
+            _sqlite_fts_available[key] = cursor.fetchone() is not None
+    return _sqlite_fts_available[key]
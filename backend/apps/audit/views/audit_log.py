@@ -1,11 +1,26 @@
+from datetime import datetime, time, timedelta
+from operator import attrgetter, itemgetter
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from apps.audit.models.audit_log import AuditLog
 from apps.audit.serializers.audit_log import AuditLogSerializer
+from apps.audit.services.audit_service import RENDER_COLUMNS, AuditService
+from apps.audit.services.rollup_service import AuditRollupService
+from apps.core.utils import sharding
+from apps.core.utils.responses import FragmentResponse
+from apps.core.views.mixins import SparseFieldsetMixin
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+STATS_DEFAULT_RANGE = {
+    'hour': timedelta(days=1),
+    'day': timedelta(days=30),
+}
+
+class AuditLogViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
 
@@ -16,18 +31,140 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
         # Non-staff users only see their own logs
         if not self.request.user.is_staff:
-            queryset = queryset.filter(user=self.request.user)
+            queryset = AuditService.get_audit_logs(user=self.request.user)
         else:
             if user_id:
-                queryset = queryset.filter(user_id=user_id)
+                queryset = AuditLog.objects.using(sharding.shard_for_id(user_id)).filter(user_id=user_id)
 
         if event_type:
             queryset = queryset.filter(event_type=event_type)
         
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        return self._rendered_list(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.sparse_requested():
+            return super().retrieve(request, *args, **kwargs)
+        try:
+            queryset = self.get_queryset().filter(pk=kwargs['pk'])
+            rows = list(self._rendered_rows(queryset))
+        except (TypeError, ValueError):
+            raise Http404
+        if not rows:
+            raise Http404
+        return FragmentResponse(AuditService.rendered_bodies(rows, using=queryset.db), many=False)
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_logs(self, request):
-        logs = AuditLog.objects.filter(user=request.user)
-        serializer = self.get_serializer(logs, many=True)
-        return Response(serializer.data)
+        logs = AuditService.get_audit_logs(user=request.user)
+        return self._rendered_list(logs, paginate=False)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def search(self, request):
+        params = request.query_params
+        try:
+            date_from = self._parse_bound(params.get('date_from'))
+            date_to = self._parse_bound(params.get('date_to'), end_of_day=True)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = AuditService.search_logs(
+            self.get_queryset(),
+            date_from=date_from,
+            date_to=date_to,
+            reference_id=params.get('reference_id'),
+            ip_address=params.get('ip_address'),
+            recipient_id=params.get('recipient_id'),
+            text=params.get('q'),
+        )
+
+        return self._rendered_list(queryset)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def stats(self, request):
+        """Event counts per hour or day, answered from AuditRollup."""
+        params = request.query_params
+        granularity = params.get('granularity', 'hour')
+        if granularity not in STATS_DEFAULT_RANGE:
+            return Response(
+                {'error': 'granularity must be one of: hour, day'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            end = self._parse_bound(params.get('end'), end_of_day=True) or timezone.now()
+            start = self._parse_bound(params.get('start')) or end - STATS_DEFAULT_RANGE[granularity]
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        buckets, totals = AuditRollupService.stats(granularity, start, end, event_type=params.get('event_type'))
+        return Response({
+            'granularity': granularity,
+            'start': start,
+            'end': end,
+            'totals': totals,
+            'buckets': buckets,
+        })
+
+    @staticmethod
+    def _rendered_rows(queryset):
+        return queryset.values_list(*RENDER_COLUMNS)
+
+    def _rendered_list(self, queryset, paginate=True):
+        if self.sparse_requested():
+            sparse = self.sparse_queryset(queryset)
+            if self._spans_shards():
+                sparse = sharding.Merged(
+                    sparse.order_by('-created_at', '-id'), key=attrgetter('created_at', 'id'), reverse=True
+                )
+            return self._sparse_list(sparse, paginate)
+        # Serve the representation stored by AuditService.log_event instead
+        # of running AuditLogSerializer per row.
+        rows, using = self._rendered_rows(queryset), queryset.db
+        if self._spans_shards():
+            # Bodies of logs from any shard; missing ones are rendered on
+            # the shard their id belongs to.
+            rows, using = sharding.Merged(
+                queryset.order_by('-created_at', '-id').values_list(*RENDER_COLUMNS, 'created_at'),
+                key=itemgetter(len(RENDER_COLUMNS), 0), reverse=True,
+            ), None
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is None:
+            return FragmentResponse(AuditService.rendered_bodies(list(rows), using=using))
+        envelope = self.get_paginated_response([]).data
+        del envelope['results']
+        return FragmentResponse(AuditService.rendered_bodies(page, using=using), envelope=envelope)
+
+    def _spans_shards(self):
+        """Staff listings not narrowed to one account read every shard."""
+        return (
+            sharding.enabled() and self.request.user.is_staff
+            and not self.request.query_params.get('user_id')
+        )
+
+    def _sparse_list(self, queryset, paginate):
+        # Stored renderings hold every field; a narrowed selection is
+        # cheaper to serialize from the columns it needs.
+        page = self.paginate_queryset(queryset) if paginate else None
+        if page is None:
+            return Response(self.get_serializer(queryset, many=True).data)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @staticmethod
+    def _parse_bound(value, end_of_day=False):
+        """Accept an ISO date or datetime. A bare date used as an upper bound
+        covers the whole day."""
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid date: {value}")
+            if end_of_day:
+                day += timedelta(days=1)
+            parsed = datetime.combine(day, time.min)
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
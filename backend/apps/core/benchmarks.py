@@ -0,0 +1,65 @@
+import threading
+from time import perf_counter
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from apps.core.utils.benchmark import benchmark, latency_summary
+from apps.core.utils.db_pool import pools
+from apps.users.benchmarks import create_users
+
+CLIENTS = 500
+
+
+@benchmark('core.concurrent_clients')
+def concurrent_clients(scale):
+    """Latency of recipient lookups from CLIENTS threads released at once.
+    Requests go through the WSGI handler, so connections are released at
+    the end of each request as in production; with a pool, the burst
+    queues for pooled connections instead of opening one per client."""
+    users = create_users(100, prefix='burst')
+    targets = [user.recipient_id for user in users]
+    per_client = max(2, int(10 * scale))
+    handler = WSGIHandler()
+    factory = RequestFactory(REMOTE_ADDR='203.0.113.10')
+    # Pool counters run for the life of the pool; measure the burst as
+    # the difference, without resetting them under the metrics exporter.
+    before = {alias: pool.get_stats() for alias, pool in pools()}
+
+    samples = []
+    errors = []
+    lock = threading.Lock()
+    start_line = threading.Barrier(CLIENTS)
+
+    def client(index):
+        timings = []
+        failures = 0
+        start_line.wait()
+        for n in range(per_client):
+            recipient_id = targets[(index + n) % len(targets)]
+            environ = factory.get(f'/api/users/users/recipient/{recipient_id}/').environ
+            start = perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            response.close()
+            timings.append(perf_counter() - start)
+            failures += response.status_code != 200
+        with lock:
+            samples.extend(timings)
+            errors.append(failures)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+
+    metrics = latency_summary(samples)
+    metrics['requests_per_sec'] = len(samples) / elapsed
+    metrics['errors'] = sum(errors)
+    for alias, pool in pools():
+        stats, earlier = pool.get_stats(), before.get(alias, {})
+        delta = {key: stats.get(key, 0) - earlier.get(key, 0) for key in ('requests_wait_ms', 'requests_num', 'connections_num')}
+        metrics[f'{alias}_pool_wait_mean_ms'] = delta['requests_wait_ms'] / max(1, delta['requests_num'])
+        metrics[f'{alias}_pool_connections_opened'] = delta['connections_num']
+    return metrics
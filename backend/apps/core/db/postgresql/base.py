@@ -0,0 +1,18 @@
+from time import perf_counter
+from django.db.backends.postgresql import base
+from apps.core.utils.db_pool import ACQUIRE_SECONDS
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Django's PostgreSQL backend, timing how long each connection takes
+    to obtain (see apps.core.utils.db_pool)."""
+
+    def get_new_connection(self, conn_params):
+        start = perf_counter()
+        connection = super().get_new_connection(conn_params)
+        ACQUIRE_SECONDS.observe(
+            perf_counter() - start,
+            database=self.alias,
+            pooled='true' if self.pool else 'false',
+        )
+        return connection
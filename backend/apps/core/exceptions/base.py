@@ -15,3 +15,27 @@ class AuditException(AuditFlowException):
 
 class ImmutabilityViolationException(AuditException):
     pass
+
+class QueryBudgetExceeded(AuditFlowException):
+    pass
+
+class JobInterrupted(AuditFlowException):
+    """Raised inside a running job once it was cancelled or lost its lease."""
+    pass
+
+class VelocityLimitExceeded(TransactionException):
+    """Raised when a transfer would exceed one of the sender's velocity limits."""
+
+    def __init__(self, message, window, retry_after):
+        super().__init__(message)
+        self.window = window
+        self.retry_after = retry_after
+
+class AdmissionRejected(AuditFlowException):
+    """Raised when admission control sheds a request; ``reason`` is one of
+    user, queue_full, deadline or timeout."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
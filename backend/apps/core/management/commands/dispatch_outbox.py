@@ -0,0 +1,58 @@
+import signal
+import time
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.services.outbox_service import OutboxService, config
+from apps.core.utils import sharding
+
+class Command(BaseCommand):
+    help = "Deliver outbox events to the configured sinks (OUTBOX['SINKS'])"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--partition', type=int, default=None,
+                            help="Only dispatch this partition (0..OUTBOX['PARTITIONS']-1); default: all")
+        parser.add_argument('--database', default=None,
+                            help="Drain the outbox of this shard (an alias in SHARDING['SHARDS']); default: default")
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Drain what is deliverable now, then exit")
+        parser.add_argument('--purge', action='store_true', help="Delete dispatched events past RETENTION_DAYS and exit")
+
+    def handle(self, *args, **options):
+        database = options['database']
+        if database is not None and database not in sharding.shards():
+            raise CommandError(f"--database must be one of: {', '.join(sharding.shards())}")
+        with sharding.use(database):
+            self._handle(options)
+
+    def _handle(self, options):
+        if options['purge']:
+            deleted = OutboxService.purge()
+            self.stdout.write(self.style.SUCCESS(f"Purged {deleted} dispatched outbox events"))
+            return
+
+        partition = options['partition']
+        if partition is not None and not 0 <= partition < config()['PARTITIONS']:
+            raise CommandError(f"--partition must be between 0 and {config()['PARTITIONS'] - 1}")
+
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        started = time.perf_counter()
+        delivered = 0
+        try:
+            if options['once']:
+                while count := OutboxService.dispatch_batch(options['batch_size'], partition):
+                    delivered += count
+            else:
+                delivered = OutboxService.run(
+                    options['batch_size'], partition, options['poll_interval'], stop=lambda: bool(stopping),
+                )
+        except ImproperlyConfigured as exc:
+            raise CommandError(str(exc))
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Dispatched {delivered} outbox events in {elapsed:.1f}s ({delivered / max(elapsed, 1e-9):.0f}/s)"
+        ))
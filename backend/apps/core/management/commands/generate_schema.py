@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.core.utils import schema_cache
+
+
+class Command(BaseCommand):
+    help = "Pre-build the OpenAPI schema (YAML and JSON) for the current code version."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=None, help="Defaults to SCHEMA_CACHE_DIR")
+
+    def handle(self, *args, **options):
+        for path in schema_cache.write_files(options['output_dir']):
+            self.stdout.write(f"Wrote {path}")
@@ -0,0 +1,14 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from apps.core.utils import sharding
+
+class Command(BaseCommand):
+    help = "Migrate every database in SHARDING['SHARDS'] and start its id sequences at the shard's id block"
+
+    def handle(self, *args, **options):
+        if not sharding.enabled():
+            raise CommandError("SHARDING['SHARDS'] lists fewer than two databases")
+        for alias in sharding.shards():
+            call_command('migrate', database=alias, interactive=False, verbosity=max(0, options['verbosity'] - 1))
+            sharding.prepare(alias)
+            self.stdout.write(self.style.SUCCESS(f"Prepared shard {alias}"))
@@ -0,0 +1,101 @@
+import json
+import os
+import platform
+import tempfile
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+from apps.core.utils import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the performance benchmark suite against a throwaway test database, "
+        "write the results as JSON and optionally fail on regressions against a baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cases', nargs='*', help="Case names or prefixes (default: all)")
+        parser.add_argument('--output', help="Write results to this JSON file")
+        parser.add_argument('--baseline', help="Compare against a previous results file")
+        parser.add_argument('--threshold', type=float, default=0.2, help="Allowed slowdown before failing (0.2 == 20%%)")
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiply dataset sizes and iteration counts")
+        parser.add_argument('--list', action='store_true', help="List available cases and exit")
+
+    def handle(self, *args, **options):
+        autodiscover_modules('benchmarks')
+        available = benchmark.cases()
+        if options['list']:
+            for name in available:
+                self.stdout.write(name)
+            return
+
+        selected = {
+            name: func for name, func in available.items()
+            if not options['cases'] or any(name.startswith(prefix) for prefix in options['cases'])
+        }
+        if not selected:
+            raise CommandError("No benchmark cases matched")
+
+        results = self._run(selected, options['scale'])
+        payload = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'vendor': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'scale': options['scale'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(payload, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)['results']
+            regressions = benchmark.compare(results, baseline, options['threshold'])
+            for case, metric, old, new, change in regressions:
+                self.stderr.write(f"REGRESSION {case}.{metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+            if regressions:
+                raise CommandError(f"{len(regressions)} metric(s) regressed by more than {options['threshold']:.0%}")
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
+
+    def _run(self, selected, scale):
+        # Every configured database (shards included) gets a test copy.
+        # SQLite's default in-memory test database can't be shared across
+        # the threads used by the concurrency cases, so use temp files.
+        temp_paths = []
+        for conn in connections.all():
+            if conn.vendor == 'sqlite':
+                handle, temp_path = tempfile.mkstemp(suffix='.sqlite3')
+                os.close(handle)
+                temp_paths.append(temp_path)
+                conn.settings_dict.setdefault('TEST', {})['NAME'] = temp_path
+
+        old_names = [
+            (conn, conn.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False))
+            for conn in connections.all()
+        ]
+        results = {}
+        try:
+            for name, func in selected.items():
+                self.stdout.write(f"Running {name} ...")
+                metrics = func(scale)
+                results[name] = metrics
+                for metric, value in metrics.items():
+                    self.stdout.write(f"  {metric:<28} {value:,.3f}")
+                for conn, _ in old_names:
+                    call_command('flush', database=conn.alias, interactive=False, verbosity=0)
+        finally:
+            for conn, old_name in old_names:
+                conn.creation.destroy_test_db(old_name, verbosity=0)
+            for temp_path in temp_paths:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return results
@@ -0,0 +1,130 @@
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from apps.core.services.job_service import JobService, config, execute, worker_id
+from apps.core.utils.db_pool import close_pools
+from apps.core.utils.jobs import handlers
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (see apps.core.utils.jobs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Jobs run at once; 1 runs them inline in this process")
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help="Use processes for CPU-bound handlers")
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true', help="Run what is due now, then exit")
+
+    def handle(self, *args, **options):
+        names = handlers()
+        self.stdout.write(f"Job handlers: {', '.join(names) or '(none)'}")
+        worker = worker_id()
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+        try:
+            if options['concurrency'] == 1:
+                finished = self._run_inline(worker, options, stopping)
+            else:
+                finished = self._run_pool(worker, options, stopping)
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Finished {finished} job runs"))
+
+    def _claim(self, limit, worker):
+        try:
+            return JobService.claim(limit, worker)
+        except DatabaseError as exc:
+            # e.g. a busy SQLite database; try again on the next poll.
+            self.stderr.write(f"Claiming jobs failed: {exc}")
+            return []
+
+    def _run_inline(self, worker, options, stopping):
+        finished = 0
+        while not stopping:
+            jobs = self._claim(1, worker)
+            for job in jobs:
+                with self._heartbeat(job):
+                    outcome = JobService.run(job)
+                self.stdout.write(f"{job.name} #{job.pk}: {outcome}")
+                finished += 1
+            if not jobs:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        return finished
+
+    @contextmanager
+    def _heartbeat(self, job):
+        """Renew the lease of ``job`` from a thread while it runs inline,
+        as the pool loop does, so a handler that rarely reports progress
+        is not claimed by another worker meanwhile."""
+        done = threading.Event()
+
+        def beat():
+            try:
+                while not done.wait(config()['LEASE_SECONDS'] / 3):
+                    try:
+                        JobService.renew([job])
+                    except DatabaseError as exc:
+                        self.stderr.write(f"Renewing the lease of #{job.pk} failed: {exc}")
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _run_pool(self, worker, options, stopping):
+        concurrency = options['concurrency']
+        if options['pool'] == 'process':
+            # Children must not inherit this process's database sockets
+            # or connection pools.
+            connections.close_all()
+            close_pools()
+            pool = ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context('fork'))
+        else:
+            pool = ThreadPoolExecutor(concurrency, thread_name_prefix='job')
+
+        in_flight = {}
+        finished = 0
+        renew_every = config()['LEASE_SECONDS'] / 3
+        renewed = time.monotonic()
+        with pool:
+            while not (stopping and not in_flight):
+                free = 0 if stopping else concurrency - len(in_flight)
+                jobs = self._claim(free, worker) if free else []
+                for job in jobs:
+                    in_flight[pool.submit(execute, job.pk, job.lease_token)] = job
+                if not in_flight:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                done, _ = wait(in_flight, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as exc:
+                        # The lease expires and another run picks the job up.
+                        outcome = f'worker error: {exc}'
+                    self.stdout.write(f"{job.name} #{job.pk}: {outcome}")
+                    finished += 1
+                # Handlers that rarely report progress keep their leases
+                # through this loop.
+                if time.monotonic() - renewed > renew_every:
+                    JobService.renew(in_flight.values())
+                    renewed = time.monotonic()
+        return finished
@@ -0,0 +1,326 @@
+import io
+import json
+import math
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from time import perf_counter
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+from apps.audit.models.audit_log import AuditLog
+from apps.audit.models.audit_payload import AuditPayload
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.transaction_service import TransactionService
+from apps.users.models.user import CustomUser
+
+FIRST_NAMES = ['Aarav', 'Priya', 'Rohan', 'Ananya', 'Vikram', 'Isha', 'Kabir', 'Meera', 'Arjun', 'Sana', 'Dev', 'Nisha']
+LAST_NAMES = ['Sharma', 'Patel', 'Iyer', 'Reddy', 'Gupta', 'Khan', 'Singh', 'Das', 'Nair', 'Mehta', 'Rao', 'Bose']
+
+TRANSACTION_COLUMNS = [
+    'id', 'created_at', 'updated_at', 'is_deleted', 'deleted_at', 'from_user_id', 'from_recipient_id',
+    'to_user_id', 'to_recipient_id', 'amount', 'transaction_type', 'status', 'description',
+    'transaction_hash', 'reference_id', 'completed_at',
+]
+PAYLOAD_COLUMNS = ['transaction_id', 'data']
+AUDIT_COLUMNS = [
+    'id', 'created_at', 'updated_at', 'event_type', 'user_id', 'transaction_id', 'description', 'data',
+    'client_ip_id', 'client_user_agent_id', 'is_immutable',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic dataset (users, transactions, audit logs) for load testing. "
+        "Balances stay consistent with the generated transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--transactions', type=int, default=100000)
+        parser.add_argument('--years', type=float, default=3.0, help="Spread timestamps over this many years")
+        parser.add_argument('--hot-merchants', type=int, default=50, help="Accounts that receive a large share of transfers")
+        parser.add_argument('--merchant-share', type=float, default=0.4, help="Fraction of transfers going to hot merchants")
+        parser.add_argument('--pareto-alpha', type=float, default=1.16, help="Sender activity skew (1.16 ~ 80/20)")
+        parser.add_argument('--chunk-size', type=int, default=20000)
+        parser.add_argument('--workers', type=int, default=4, help="Parallel writer threads (PostgreSQL only)")
+        parser.add_argument('--copy', action='store_true', help="Use PostgreSQL COPY instead of bulk_create")
+        parser.add_argument('--skip-audit', action='store_true', help="Do not generate audit logs")
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError("At least two users are required")
+        vendor = connection.vendor
+        if options['copy'] and vendor != 'postgresql':
+            raise CommandError("--copy is only available on PostgreSQL")
+        workers = options['workers'] if vendor == 'postgresql' else 1
+        rng = random.Random(options['seed'])
+
+        started = perf_counter()
+        users = self._create_users(options['users'], rng)
+        self.stdout.write(f"Created {len(users)} users in {perf_counter() - started:.1f}s")
+
+        simulation = _Simulation(users, rng, options)
+        write = self._copy_chunk if options['copy'] else self._bulk_chunk
+        started = perf_counter()
+        written = 0
+        with _historical_timestamps(Transaction, AuditLog):
+            if workers == 1:
+                for chunk in simulation.chunks():
+                    with db_transaction.atomic():
+                        write(chunk)
+                    written += len(chunk['transactions'])
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    pending = []
+                    for chunk in simulation.chunks():
+                        pending.append(pool.submit(self._write_in_thread, write, chunk))
+                        # Bound memory: keep at most two chunks per writer in flight.
+                        while len(pending) >= workers * 2:
+                            written += pending.pop(0).result()
+                    for future in pending:
+                        written += future.result()
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f"Wrote {written} transactions in {elapsed:.1f}s ({written / elapsed * 60:,.0f}/min)"
+        )
+
+        self._store_balances(simulation)
+        self._reset_sequences()
+        self.stdout.write(self.style.SUCCESS(
+            "Done. Run render_audit_logs and rollup_audit_events --rebuild to warm derived audit tables."
+        ))
+
+    def _create_users(self, count, rng):
+        password = make_password('loadtest-password')
+        opening_balance = CustomUser._meta.get_field('balance').default
+        taken = set(CustomUser.objects.values_list('recipient_id', flat=True))
+        recipient_ids = [r for r in map(str, rng.sample(range(1000000000, 10000000000), count + len(taken))) if r not in taken][:count]
+        next_id = (CustomUser.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        batch = uuid.uuid4().hex[:8]
+        now = timezone.now()
+
+        users = [
+            CustomUser(
+                id=next_id + i,
+                email=f'load-{batch}-{i}@example.com',
+                username=f'load-{batch}-{i}@example.com',
+                password=password,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                recipient_id=recipient_ids[i],
+                balance=opening_balance,
+                created_at=now,
+                updated_at=now,
+            )
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users, batch_size=5000)
+        return users
+
+    def _write_in_thread(self, write, chunk):
+        try:
+            with db_transaction.atomic():
+                write(chunk)
+            return len(chunk['transactions'])
+        finally:
+            connection.close()
+
+    def _bulk_chunk(self, chunk):
+        Transaction.objects.bulk_create(
+            [Transaction(**dict(zip(TRANSACTION_COLUMNS, row))) for row in chunk['transactions']],
+            batch_size=2000,
+        )
+        if chunk['payloads']:
+            AuditPayload.objects.bulk_create(
+                [AuditPayload(**dict(zip(PAYLOAD_COLUMNS, row))) for row in chunk['payloads']],
+                batch_size=2000,
+            )
+            AuditLog.objects.bulk_create(
+                [AuditLog(**dict(zip(AUDIT_COLUMNS, row))) for row in chunk['audit_logs']],
+                batch_size=2000,
+            )
+
+    def _copy_chunk(self, chunk):
+        _copy(Transaction, TRANSACTION_COLUMNS, chunk['transactions'])
+        if chunk['payloads']:
+            _copy(AuditPayload, PAYLOAD_COLUMNS, chunk['payloads'])
+            _copy(AuditLog, AUDIT_COLUMNS, chunk['audit_logs'])
+
+    def _store_balances(self, simulation):
+        users = simulation.users
+        for user, paise in zip(users, simulation.balances):
+            user.balance = Decimal(paise).scaleb(-2)
+        with db_transaction.atomic():
+            CustomUser.objects.bulk_update(users, ['balance'], batch_size=2000)
+
+    def _reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(no_style(), [CustomUser, Transaction, AuditLog])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+class _Simulation:
+    """Generates transactions in time order while tracking balances in
+    paise, so no account ever goes negative. When a sender cannot afford a
+    transfer the event becomes a deposit into that account instead."""
+
+    def __init__(self, users, rng, options):
+        self.users = users
+        self.rng = rng
+        self.total = options['transactions']
+        self.chunk_size = options['chunk_size']
+        self.with_audit = not options['skip_audit']
+        opening = int(CustomUser._meta.get_field('balance').default * 100)
+        self.balances = [opening] * len(users)
+        self.names = [f"{u.first_name} {u.last_name}".strip() for u in users]
+
+        sender_weights = [rng.paretovariate(options['pareto_alpha']) for _ in users]
+        self.sender_cum = list(_accumulate(sender_weights))
+        merchants = min(options['hot_merchants'], len(users) - 1)
+        share = options['merchant_share'] if merchants else 0
+        receiver_weights = [1.0] * len(users)
+        if merchants:
+            merchant_weight = share * (len(users) - merchants) / ((1 - share) * merchants) if share < 1 else 1e9
+            for index in rng.sample(range(len(users)), merchants):
+                receiver_weights[index] = merchant_weight
+        self.receiver_cum = list(_accumulate(receiver_weights))
+
+        self.end = timezone.now()
+        self.start = self.end - timedelta(days=365 * options['years'])
+        self.next_txn_id = (Transaction.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        self.next_log_id = (AuditLog.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+    def chunks(self):
+        span = (self.end - self.start).total_seconds()
+        for offset in range(0, self.total, self.chunk_size):
+            size = min(self.chunk_size, self.total - offset)
+            base = span * offset / self.total
+            width = span * size / self.total
+            offsets = sorted(self.rng.random() * width + base for _ in range(size))
+            yield self._chunk([self.start + timedelta(seconds=s) for s in offsets])
+
+    def _chunk(self, timestamps):
+        rng = self.rng
+        users = self.users
+        size = len(timestamps)
+        senders = rng.choices(range(len(users)), cum_weights=self.sender_cum, k=size)
+        receivers = rng.choices(range(len(users)), cum_weights=self.receiver_cum, k=size)
+        transactions, payloads, logs = [], [], []
+
+        for ts, s, r in zip(timestamps, senders, receivers):
+            if r == s:
+                r = (r + 1) % len(users)
+            amount = max(100, min(5000000, int(rng.lognormvariate(math.log(50000), 1.2))))
+            if self.balances[s] >= amount:
+                kind, sender, receiver = 'transfer', users[s], users[r]
+                self.balances[s] -= amount
+                self.balances[r] += amount
+            else:
+                kind, sender, receiver = 'deposit', None, users[s]
+                amount = max(amount, 100000)
+                self.balances[s] += amount
+            amount = Decimal(amount).scaleb(-2)
+            txn_id = self.next_txn_id
+            self.next_txn_id += 1
+            reference_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            transactions.append((
+                txn_id, ts, ts, False, None,
+                sender.id if sender else None, sender.recipient_id if sender else '',
+                receiver.id, receiver.recipient_id, amount, kind, 'completed', '',
+                TransactionService.generate_hash(reference_id), reference_id, ts,
+            ))
+            if not self.with_audit:
+                continue
+
+            sender_name = self.names[s] if sender else ''
+            receiver_name = self.names[r] if sender else self.names[s]
+            payloads.append((txn_id, {
+                'transaction_type': kind,
+                'amount': str(amount),
+                'from_user_id': sender.id if sender else None,
+                'from_recipient_id': sender.recipient_id if sender else '',
+                'from_user_name': sender_name,
+                'to_user_id': receiver.id,
+                'to_recipient_id': receiver.recipient_id,
+                'to_user_name': receiver_name,
+                'status': 'success',
+                'reference_id': reference_id,
+            }))
+            # Same entries TransactionService.create_transaction writes.
+            logs.append((
+                self.next_log_id, ts, ts, 'transaction_completed', (sender or receiver).id, txn_id,
+                f'Sent ₹{amount} to {receiver.recipient_id}', {'direction': 'sent'}, None, None, True,
+            ))
+            self.next_log_id += 1
+            if sender:
+                logs.append((
+                    self.next_log_id, ts, ts, 'transaction_completed', receiver.id, txn_id,
+                    f'Received ₹{amount} from {sender.recipient_id}', {'direction': 'received'}, None, None, True,
+                ))
+                self.next_log_id += 1
+
+        return {'transactions': transactions, 'payloads': payloads, 'audit_logs': logs}
+
+
+def _accumulate(weights):
+    total = 0.0
+    for weight in weights:
+        total += weight
+        yield total
+
+
+@contextmanager
+def _historical_timestamps(*models):
+    """Let bulk_create keep the generated created_at/updated_at values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, dict):
+        value = json.dumps(value)
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def _copy(model, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    sql = 'COPY {} ({}) FROM STDIN'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(c) for c in columns),
+    )
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):  # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
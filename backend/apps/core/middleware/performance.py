@@ -0,0 +1,161 @@
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+from django.conf import settings
+from django.db import connections
+from apps.core.utils import slow_queries
+from apps.core.utils.metrics import registry
+
+REQUEST_SECONDS = registry.histogram(
+    'auditflow_http_request_duration_seconds',
+    'Total time spent handling a request.',
+    ['route', 'method'],
+)
+VIEW_SECONDS = registry.histogram(
+    'auditflow_http_view_duration_seconds',
+    'Time spent in the view, including its serializer time.',
+    ['route', 'method'],
+)
+SERIALIZER_SECONDS = registry.histogram(
+    'auditflow_http_serializer_duration_seconds',
+    'Time spent in serializer to_representation per request.',
+    ['route', 'method'],
+)
+RENDER_SECONDS = registry.histogram(
+    'auditflow_http_render_duration_seconds',
+    'Time spent rendering the response body after the view returned.',
+    ['route', 'method'],
+)
+DB_SECONDS = registry.histogram(
+    'auditflow_http_db_duration_seconds',
+    'Time spent executing SQL per request.',
+    ['route', 'method'],
+)
+DB_QUERIES = registry.histogram(
+    'auditflow_http_db_queries',
+    'Number of SQL statements executed per request.',
+    ['route', 'method'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+RESPONSE_BYTES = registry.histogram(
+    'auditflow_http_response_size_bytes',
+    'Size of the response body.',
+    ['route', 'method'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+REQUESTS = registry.counter(
+    'auditflow_http_requests_total',
+    'Requests handled, by route and status code.',
+    ['route', 'method', 'status'],
+)
+
+
+# Timings of the request being handled, for code without the request at
+# hand (serializers built without a context).
+_current = ContextVar('auditflow_request_timings', default=None)
+
+
+def current_timings():
+    return _current.get()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.url_name or match.view_name) if match else 'unmatched'
+
+
+class _RequestTimings:
+    __slots__ = ('request', 'slow_threshold', 'queries', 'db', 'serializer', 'serializing', 'view_start', 'view_end')
+
+    def __init__(self, request, slow_threshold):
+        self.request = request
+        self.slow_threshold = slow_threshold
+        self.queries = 0
+        self.db = 0.0
+        self.serializer = 0.0
+        self.serializing = False
+        self.view_start = None
+        self.view_end = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.db += elapsed
+            self.queries += 1
+            if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+                slow_queries.record(
+                    sql, params, elapsed, _route(self.request),
+                    using=context['connection'].alias, many=many,
+                )
+
+
+class PerformanceMiddleware:
+    """Record per-request DB, view, serializer and render timings.
+
+    Results are added to latency histograms labelled with the URL name
+    (e.g. ``transactions-clean-list-create``) and, when SERVER_TIMING is
+    enabled, echoed back in a ``Server-Timing`` header. Statements slower
+    than ``SLOW_QUERY['THRESHOLD_MS']`` go to the slow query buffer.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold_ms = slow_queries.config()['THRESHOLD_MS']
+        timings = request._performance_timings = _RequestTimings(
+            request, threshold_ms / 1000 if threshold_ms is not None else None
+        )
+        token = _current.set(timings)
+        start = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        end = perf_counter()
+
+        view_start = timings.view_start or start
+        view_end = timings.view_end or end
+        total = end - start
+        view = view_end - view_start
+        render = end - view_end
+
+        labels = {'route': _route(request), 'method': request.method}
+        REQUEST_SECONDS.observe(total, **labels)
+        VIEW_SECONDS.observe(view, **labels)
+        SERIALIZER_SECONDS.observe(timings.serializer, **labels)
+        RENDER_SECONDS.observe(render, **labels)
+        DB_SECONDS.observe(timings.db, **labels)
+        DB_QUERIES.observe(timings.queries, **labels)
+        if not response.streaming:
+            RESPONSE_BYTES.observe(len(response.content), **labels)
+        REQUESTS.inc(status=response.status_code, **labels)
+
+        if getattr(settings, 'SERVER_TIMING', False):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+                f'view;dur={view * 1000:.2f}',
+                f'serialize;dur={timings.serializer * 1000:.2f}',
+                f'render;dur={render * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = getattr(request, '_performance_timings', None)
+        if timings is not None:
+            timings.view_start = perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook, so everything from
+        # here to the end of __call__ is encoding time.
+        timings = getattr(request, '_performance_timings', None)
+        if timings is not None:
+            timings.view_end = perf_counter()
+        return response
@@ -0,0 +1,30 @@
+from apps.core.utils import profiling
+
+
+class ProfilingMiddleware:
+    """Run the stack sampler around selected requests.
+
+    A request is profiled when it carries a valid ``X-Profile-Token``
+    (minted by staff via /api/core/profiles/token/) or is picked by
+    ``PROFILING['SAMPLE_RATE']`` for one of ``PROFILING['ROUTES']``. Other
+    requests pay a header lookup and a settings read.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        sampler = getattr(request, '_stack_sampler', None)
+        if sampler is not None:
+            sampler.stop()
+            response['X-Profile-Id'] = profiling.save(
+                sampler, request.resolver_match.url_name or request.resolver_match.view_name, request.method
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if profiling.should_profile(request, match.url_name or match.view_name):
+            interval = profiling.config()['INTERVAL_MS'] / 1000
+            request._stack_sampler = profiling.StackSampler(interval=interval).start()
@@ -0,0 +1,37 @@
+import random
+from apps.core.utils.query_budget import QueryInspector, config, inspect_queries, report
+
+
+class QueryBudgetMiddleware:
+    """Detect N+1 query patterns and per-view query budget overruns.
+
+    Only ``QUERY_BUDGET['SAMPLE_RATE']`` of requests are inspected, so the
+    default of 0 costs one random() call per request. Budgets are looked up
+    by URL name in ``QUERY_BUDGET['BUDGETS']``, falling back to
+    ``DEFAULT_BUDGET``. With ``STRICT`` on (the test suite), violations
+    raise instead of only being logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = config()
+        if random.random() >= options['SAMPLE_RATE']:
+            return self.get_response(request)
+
+        inspector = request._query_inspector = QueryInspector(options['REPEAT_THRESHOLD'])
+        with inspect_queries(inspector):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        route = (match.url_name or match.view_name) if match else 'unmatched'
+        report(inspector, route, strict=options['STRICT'])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        inspector = getattr(request, '_query_inspector', None)
+        if inspector is not None:
+            options = config()
+            match = request.resolver_match
+            inspector.budget = options['BUDGETS'].get(match.url_name, options['DEFAULT_BUDGET'])
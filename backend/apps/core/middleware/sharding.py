@@ -0,0 +1,16 @@
+from apps.core.utils import sharding
+
+
+class ShardMiddleware:
+    """Clear the shard pinned by authentication once the request is done,
+    so it cannot leak into the next request served by the thread."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sharding.reset()
+        try:
+            return self.get_response(request)
+        finally:
+            sharding.reset()
@@ -0,0 +1,9 @@
+from .job import Job
+from .outbox import OutboxEvent
+from .watermark import Watermark
+
+__all__ = [
+	"Job",
+	"OutboxEvent",
+	"Watermark",
+]
@@ -0,0 +1,50 @@
+from django.db import models
+from django.utils import timezone
+
+class OutboxEvent(models.Model):
+    """An event for downstream consumers, written in the same database
+    transaction as the change it describes.
+
+    ``key`` names the entity whose events must be delivered in order (an
+    account); ``partition`` is derived from it so several dispatchers can
+    split the table without ever delivering one key's events concurrently.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('dispatched', 'Dispatched'),
+        ('dead', 'Dead'),
+    ]
+
+    topic = models.CharField(max_length=100)
+    key = models.CharField(max_length=100)
+    partition = models.PositiveSmallIntegerField(default=0)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'partition', 'id']),
+            models.Index(fields=['status', 'dispatched_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} {self.key} #{self.pk} ({self.status})"
+
+    def as_message(self):
+        """What sinks receive; ``id`` is stable across redeliveries so
+        consumers can deduplicate."""
+        return {
+            'id': self.pk,
+            'topic': self.topic,
+            'key': self.key,
+            'payload': self.payload,
+            'created_at': self.created_at.isoformat(),
+        }
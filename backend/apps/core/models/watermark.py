@@ -0,0 +1,20 @@
+from django.db import models
+
+class Watermark(models.Model):
+    """Position up to which an incremental job has processed a table.
+
+    ``position`` is usually the highest primary key already consumed, so
+    the next run only has to look at rows with a larger id.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+    @classmethod
+    def acquire(cls, name):
+        """Fetch and lock the watermark row; call inside transaction.atomic()."""
+        cls.objects.get_or_create(name=name)
+        return cls.objects.select_for_update().get(name=name)
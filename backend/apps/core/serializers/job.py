@@ -0,0 +1,36 @@
+from rest_framework import serializers
+from apps.core.models.job import Job
+from apps.core.serializers.timing import TimedSerializerMixin
+from apps.core.utils.jobs import handlers
+
+class JobSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True, allow_null=True)
+    created_by = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'name', 'params', 'status', 'priority', 'attempts', 'max_attempts',
+            'progress', 'progress_done', 'progress_total', 'progress_message',
+            'result', 'error', 'worker', 'created_by', 'created_at', 'available_at',
+            'started_at', 'finished_at',
+        ]
+        read_only_fields = [
+            'id', 'status', 'attempts', 'progress_done', 'progress_total', 'progress_message',
+            'result', 'error', 'worker', 'created_at', 'available_at', 'started_at', 'finished_at',
+        ]
+
+    def validate_name(self, value):
+        if value not in handlers():
+            raise serializers.ValidationError(f"Unknown job. Available: {', '.join(handlers())}")
+        return value
+
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('params must be an object')
+        return value
+
+    def validate_max_attempts(self, value):
+        if not 1 <= value <= 20:
+            raise serializers.ValidationError('max_attempts must be between 1 and 20')
+        return value
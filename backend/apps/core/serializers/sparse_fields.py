@@ -0,0 +1,63 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from apps.core.serializers.timing import TimedSerializerMixin
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else []
+
+
+def requested_fieldset(request, available):
+    """Field names selected by ``?fields=`` / ``?exclude=`` on a read
+    request, or None when the client asked for the full representation."""
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    include = _split(request.query_params.get('fields'))
+    exclude = _split(request.query_params.get('exclude'))
+    if not include and not exclude:
+        return None
+    unknown = (set(include) | set(exclude)) - set(available)
+    if unknown:
+        raise ValidationError({'fields': [f"Unknown field(s): {', '.join(sorted(unknown))}"]})
+    return [name for name in available if (not include or name in include) and name not in exclude]
+
+
+class SparseFieldsetSerializerMixin(TimedSerializerMixin):
+    """Drop fields not selected by ``?fields=`` / ``?exclude=``.
+
+    ``Meta.sparse_dependencies`` maps fields that are not plain model
+    columns (method fields, properties) to the ORM paths they read, so the
+    view can narrow its queryset with ``only()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = requested_fieldset(self.context.get('request'), list(self.fields))
+        self.sparse = selected is not None
+        if self.sparse:
+            for name in set(self.fields) - set(selected):
+                self.fields.pop(name)
+
+    def sparse_paths(self):
+        """ORM paths read by the selected fields, or None if any field's
+        needs are unknown."""
+        model = self.Meta.model
+        dependencies = getattr(self.Meta, 'sparse_dependencies', {})
+        paths = set()
+        for name, field in self.fields.items():
+            if field.write_only:
+                continue
+            if name in dependencies:
+                paths.update(dependencies[name])
+                continue
+            if field.source == '*':
+                return None
+            path = field.source.replace('.', '__')
+            try:
+                model._meta.get_field(path.split('__')[0])
+            except FieldDoesNotExist:
+                return None
+            paths.add(path)
+        return paths
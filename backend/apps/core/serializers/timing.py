@@ -0,0 +1,20 @@
+from time import perf_counter
+from apps.core.middleware.performance import current_timings
+
+
+class TimedSerializerMixin:
+    """Add the time spent in ``to_representation`` to the current
+    request's serializer timing (see PerformanceMiddleware). Nested
+    serializers are counted once, as part of the outermost one."""
+
+    def to_representation(self, instance):
+        timings = current_timings()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+        timings.serializing = True
+        start = perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serializer += perf_counter() - start
+            timings.serializing = False
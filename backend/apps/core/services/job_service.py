@@ -0,0 +1,218 @@
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction as db_transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.core.exceptions.base import JobInterrupted
+from apps.core.models.job import Job
+from apps.core.utils.jobs import JobContext, get_handler
+from apps.core.utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'LEASE_SECONDS': 300,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+    'PROGRESS_INTERVAL': 1.0,
+    'EXPORT_DIR': None,
+}
+
+FINISHED = registry.counter(
+    'auditflow_jobs_finished_total',
+    'Job runs by handler name and outcome.',
+    ['name', 'outcome'],
+)
+RUN_SECONDS = registry.histogram(
+    'auditflow_job_run_seconds',
+    'Wall time of one job run, by handler name.',
+    ['name'],
+    buckets=(0.1, 1, 5, 15, 60, 300, 900, 3600, float('inf')),
+)
+QUEUED = registry.gauge(
+    'auditflow_jobs',
+    'Jobs waiting or running, by status.',
+    ['status'],
+)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+def export_dir():
+    """Where jobs write files offered for download through the jobs API."""
+    return Path(config()['EXPORT_DIR'] or Path(settings.BASE_DIR) / 'exports')
+
+
+def _collect():
+    counts = dict(
+        Job.objects.filter(status__in=['queued', 'running'])
+        .values('status').annotate(n=Count('id')).order_by().values_list('status', 'n')
+    )
+    for status in ('queued', 'running'):
+        QUEUED.set(counts.get(status, 0), status=status)
+
+
+registry.add_collector(_collect)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class JobService:
+    @staticmethod
+    def enqueue(name, params=None, user=None, priority=0, max_attempts=3, delay=0):
+        if get_handler(name) is None:
+            raise ValueError(f'Unknown job: {name}')
+        return Job.objects.create(
+            name=name,
+            params=params or {},
+            created_by=user,
+            priority=priority,
+            max_attempts=max_attempts,
+            available_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+    @staticmethod
+    def claim(limit=1, worker=''):
+        """Lease up to ``limit`` runnable jobs, highest priority first.
+
+        Runnable means queued and due, or running with an expired lease (its
+        worker died). A job whose worker died on its last attempt is marked
+        failed instead of leased again. Uses SKIP LOCKED where the database
+        supports it; the conditional UPDATE is what guarantees a job goes to
+        one worker.
+        """
+        now = timezone.now()
+        token = uuid.uuid4()
+        runnable = Job.objects.filter(
+            Q(status='queued', available_at__lte=now) | Q(status='running', leased_until__lt=now)
+        ).order_by('-priority', 'available_at', 'id')
+        # Without SKIP LOCKED (SQLite) there is nothing to hold a transaction
+        # open for, and a read-then-write transaction there fails with
+        # "database is locked" under concurrent writers.
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        with db_transaction.atomic() if skip_locked else nullcontext():
+            if skip_locked:
+                runnable = runnable.select_for_update(skip_locked=True)
+            ids = list(runnable.values_list('id', flat=True)[:limit])
+            if not ids:
+                return []
+            exhausted = Job.objects.filter(
+                id__in=ids, status='running', leased_until__lt=now, attempts__gte=F('max_attempts')
+            )
+            for name in exhausted.values_list('name', flat=True):
+                FINISHED.inc(name=name, outcome='failed')
+            exhausted.update(
+                status='failed', error='Lease expired during the last attempt',
+                lease_token=None, leased_until=None, finished_at=now,
+            )
+            Job.objects.filter(id__in=ids).filter(
+                Q(status='queued') | Q(status='running', leased_until__lt=now)
+            ).update(
+                status='running',
+                lease_token=token,
+                leased_until=now + timedelta(seconds=config()['LEASE_SECONDS']),
+                worker=worker,
+                attempts=F('attempts') + 1,
+                started_at=now,
+                error='',
+            )
+        return list(Job.objects.filter(id__in=ids, lease_token=token).order_by('-priority', 'available_at', 'id'))
+
+    @staticmethod
+    def renew(jobs):
+        """Extend the leases of jobs this worker is still running."""
+        for job in jobs:
+            Job.objects.filter(pk=job.pk, status='running', lease_token=job.lease_token).update(
+                leased_until=timezone.now() + timedelta(seconds=config()['LEASE_SECONDS'])
+            )
+
+    @staticmethod
+    def report_progress(job, done, total=None, message=None):
+        fields = {
+            'progress_done': done,
+            'leased_until': timezone.now() + timedelta(seconds=config()['LEASE_SECONDS']),
+        }
+        if total is not None:
+            fields['progress_total'] = total
+        if message is not None:
+            fields['progress_message'] = message[:255]
+        if not Job.objects.filter(pk=job.pk, status='running', lease_token=job.lease_token).update(**fields):
+            raise JobInterrupted(f'Job {job.pk} was cancelled or lost its lease')
+
+    @staticmethod
+    def run(job):
+        """Execute a claimed job and record the outcome. Returns the outcome."""
+        started = time.perf_counter()
+        handler = get_handler(job.name)
+        context = JobContext(job, JobService.report_progress, config()['PROGRESS_INTERVAL'])
+        owned = Job.objects.filter(pk=job.pk, status='running', lease_token=job.lease_token)
+        try:
+            if handler is None:
+                raise LookupError(f'No handler registered for {job.name}')
+            result = handler(context, **job.params)
+        except JobInterrupted:
+            outcome = 'interrupted'
+        except Exception:
+            logger.exception('Job %s #%s failed', job.name, job.pk)
+            error = traceback.format_exc()[-4000:]
+            if job.attempts < job.max_attempts:
+                options = config()
+                delay = min(options['BACKOFF_SECONDS'] * 2 ** (job.attempts - 1), options['MAX_BACKOFF_SECONDS'])
+                updated = owned.update(
+                    status='queued', error=error, lease_token=None, leased_until=None,
+                    available_at=timezone.now() + timedelta(seconds=delay),
+                )
+                outcome = 'retried'
+            else:
+                updated = owned.update(
+                    status='failed', error=error, lease_token=None, leased_until=None, finished_at=timezone.now(),
+                )
+                outcome = 'failed'
+        else:
+            # Throttling may have skipped the last progress report.
+            updated = owned.update(
+                status='succeeded', result=result, lease_token=None, leased_until=None, finished_at=timezone.now(),
+                progress_done=Coalesce('progress_total', 'progress_done'),
+            )
+            outcome = 'succeeded'
+        if outcome != 'interrupted' and not updated:
+            # Cancelled or re-leased while the handler ran without reporting
+            # progress; the job's row already says what happened to it.
+            outcome = 'interrupted'
+        FINISHED.inc(name=job.name, outcome=outcome)
+        RUN_SECONDS.observe(time.perf_counter() - started, name=job.name)
+        return outcome
+
+    @staticmethod
+    def cancel(job):
+        """Cancel a queued job, or ask a running one to stop at its next
+        progress report. Returns False if the job already finished."""
+        return bool(
+            Job.objects.filter(pk=job.pk, status__in=['queued', 'running']).update(
+                status='cancelled', lease_token=None, leased_until=None, finished_at=timezone.now()
+            )
+        )
+
+
+def execute(job_id, lease_token):
+    """Pool entry point: run one claimed job in the current thread or
+    process with its own database connection."""
+    close_old_connections()
+    try:
+        job = Job.objects.filter(pk=job_id, lease_token=lease_token).first()
+        return JobService.run(job) if job else 'interrupted'
+    finally:
+        connection.close()
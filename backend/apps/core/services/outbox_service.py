@@ -0,0 +1,232 @@
+import time
+import uuid
+import zlib
+from contextlib import nullcontext
+from datetime import timedelta
+from itertools import groupby
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction as db_transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+from apps.core.models.outbox import OutboxEvent
+from apps.core.utils import sharding
+from apps.core.utils.metrics import registry
+from apps.core.utils.outbox_sinks import get_sinks
+
+DEFAULTS = {
+    'PARTITIONS': 1,
+    'BATCH_SIZE': 500,
+    'LEASE_SECONDS': 60,
+    'MAX_ATTEMPTS': 10,
+    'BACKOFF_SECONDS': 2,
+    'MAX_BACKOFF_SECONDS': 600,
+    'RETENTION_DAYS': 7,
+    'SINKS': {},
+}
+
+DISPATCHED = registry.counter(
+    'auditflow_outbox_dispatched_total',
+    'Outbox events delivered to every sink, by topic.',
+    ['topic'],
+)
+FAILURES = registry.counter(
+    'auditflow_outbox_delivery_failures_total',
+    'Failed deliveries of an account\'s events to a sink.',
+    ['sink'],
+)
+BATCH_SECONDS = registry.histogram(
+    'auditflow_outbox_batch_seconds',
+    'Time to claim, deliver and acknowledge one outbox batch.',
+)
+PENDING = registry.gauge(
+    'auditflow_outbox_pending',
+    'Outbox events not yet delivered, per shard.',
+    ['database'],
+)
+LAG_SECONDS = registry.gauge(
+    'auditflow_outbox_lag_seconds',
+    'Age of the oldest undelivered outbox event, per shard.',
+    ['database'],
+)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def _collect():
+    # Every shard has its own outbox and dispatchers.
+    for alias in sharding.shards():
+        stats = OutboxEvent.objects.using(alias).filter(status='pending').aggregate(
+            count=Count('id'), oldest=Min('created_at'),
+        )
+        PENDING.set(stats['count'], database=alias)
+        LAG_SECONDS.set((timezone.now() - stats['oldest']).total_seconds() if stats['oldest'] else 0, database=alias)
+
+
+registry.add_collector(_collect)
+
+
+class OutboxService:
+    @staticmethod
+    def partition_for(key):
+        return zlib.crc32(key.encode()) % config()['PARTITIONS']
+
+    @staticmethod
+    def enqueue(events):
+        """Write ``(topic, key, payload)`` events; call inside the atomic
+        block of the change they describe so both commit or neither does."""
+        return OutboxEvent.objects.bulk_create([
+            OutboxEvent(topic=topic, key=key, partition=OutboxService.partition_for(key), payload=payload)
+            for topic, key, payload in events
+        ])
+
+    @staticmethod
+    def claim(batch_size=None, partition=None):
+        """Lease the next deliverable events, oldest first.
+
+        Only events that are due and not leased are scanned, so leased and
+        backing-off events never fill the window. An event is skipped
+        while an earlier pending event of the same key is outside that set
+        (leased elsewhere or backing off), which keeps per-key order. On
+        PostgreSQL the scan uses SKIP LOCKED so concurrent dispatchers do
+        not queue behind each other; elsewhere the conditional UPDATE is
+        what prevents double claims (run one dispatcher per partition).
+        """
+        options = config()
+        now = timezone.now()
+        pending = OutboxEvent.objects.filter(status='pending')
+        if partition is not None:
+            pending = pending.filter(partition=partition)
+
+        token = uuid.uuid4()
+        # Each shard has its own outbox; a dispatcher drains the pinned one.
+        using = sharding.db()
+        skip_locked = connections[using].features.has_select_for_update_skip_locked
+        with db_transaction.atomic(using=using) if skip_locked else nullcontext():
+            candidates = pending.filter(available_at__lte=now).filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+            ).order_by('id')
+            if skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            rows = list(candidates.values_list('id', 'key')[:batch_size or options['BATCH_SIZE']])
+            if not rows:
+                return []
+
+            ids = [row[0] for row in rows]
+            earlier = dict(
+                OutboxEvent.objects.filter(status='pending', key__in={row[1] for row in rows}, id__lt=ids[-1])
+                .exclude(id__in=ids)
+                .values('key')
+                .annotate(first=Min('id'))
+                .values_list('key', 'first')
+            )
+            claimable = [event_id for event_id, key in rows if event_id < earlier.get(key, event_id + 1)]
+
+            OutboxEvent.objects.filter(id__in=claimable, status='pending').filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lte=now)
+            ).update(claim_token=token, claimed_until=now + timedelta(seconds=options['LEASE_SECONDS']))
+        return list(OutboxEvent.objects.filter(id__in=claimable, claim_token=token).order_by('id'))
+
+    @staticmethod
+    def dispatch_batch(batch_size=None, partition=None, sinks=None):
+        """Deliver one claimed batch to every sink; returns events delivered.
+
+        A sink is first handed the whole batch. If that raises, the batch is
+        retried one key at a time so a single bad account only delays its
+        own events.
+        """
+        sinks = get_sinks() if sinks is None else sinks
+        if not sinks:
+            raise ImproperlyConfigured('OUTBOX["SINKS"] is empty; events would be acknowledged undelivered')
+        started = time.perf_counter()
+        events = OutboxService.claim(batch_size, partition)
+        if not events:
+            return 0
+        messages = [event.as_message() for event in events]
+
+        failed = {}
+        for sink in sinks:
+            remaining = [message for message in messages if message['key'] not in failed]
+            if not remaining:
+                break
+            try:
+                sink.deliver(remaining)
+                continue
+            except Exception:
+                pass
+            for key, group in groupby(sorted(remaining, key=lambda m: (m['key'], m['id'])), key=lambda m: m['key']):
+                try:
+                    sink.deliver(list(group))
+                except Exception as exc:
+                    failed[key] = f'{sink.name}: {exc}'
+                    FAILURES.inc(sink=sink.name)
+
+        OutboxService._acknowledge([event for event in events if event.key not in failed])
+        for key, error in failed.items():
+            OutboxService._retry([event for event in events if event.key == key], error)
+        BATCH_SECONDS.observe(time.perf_counter() - started)
+        return len(events) - sum(1 for event in events if event.key in failed)
+
+    @staticmethod
+    def _acknowledge(events):
+        if not events:
+            return
+        OutboxEvent.objects.filter(id__in=[event.pk for event in events]).update(
+            status='dispatched',
+            dispatched_at=timezone.now(),
+            attempts=F('attempts') + 1,
+            claim_token=None,
+            claimed_until=None,
+            last_error='',
+        )
+        for event in events:
+            DISPATCHED.inc(topic=event.topic)
+
+    @staticmethod
+    def _retry(events, error):
+        options = config()
+        attempts = events[0].attempts + 1
+        delay = min(options['BACKOFF_SECONDS'] * 2 ** (attempts - 1), options['MAX_BACKOFF_SECONDS'])
+        ids = [event.pk for event in events]
+        OutboxEvent.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            available_at=timezone.now() + timedelta(seconds=delay),
+            claim_token=None,
+            claimed_until=None,
+            last_error=error[:2000],
+        )
+        # Give up on events that keep failing so the rest of the account's
+        # stream can move on; they stay in the table for inspection.
+        OutboxEvent.objects.filter(id__in=ids, attempts__gte=options['MAX_ATTEMPTS']).update(status='dead')
+
+    @staticmethod
+    def run(batch_size=None, partition=None, poll_interval=1.0, max_batches=None, stop=None):
+        """Dispatch until ``stop()`` is true or ``max_batches`` batches have
+        run, sleeping ``poll_interval`` when there is nothing to claim.
+        Returns the number of events delivered."""
+        sinks = get_sinks()
+        delivered = batches = 0
+        while not (stop and stop()) and (max_batches is None or batches < max_batches):
+            count = OutboxService.dispatch_batch(batch_size, partition, sinks)
+            delivered += count
+            batches += 1
+            if not count:
+                time.sleep(poll_interval)
+        return delivered
+
+    @staticmethod
+    def purge(retention_days=None, chunk_size=5000):
+        """Delete dispatched events older than the retention window."""
+        days = config()['RETENTION_DAYS'] if retention_days is None else retention_days
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted = 0
+        while True:
+            ids = list(
+                OutboxEvent.objects.filter(status='dispatched', dispatched_at__lt=cutoff)
+                .values_list('id', flat=True)[:chunk_size]
+            )
+            if not ids:
+                return deleted
+            deleted += OutboxEvent.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,14 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from apps.core.views.jobs import JobViewSet
+from apps.core.views.profiles import ProfileViewSet
+from apps.core.views.slow_queries import SlowQueryViewSet
+
+router = DefaultRouter()
+router.register(r'slow-queries', SlowQueryViewSet, basename='slow_query')
+router.register(r'profiles', ProfileViewSet, basename='profile')
+router.register(r'jobs', JobViewSet, basename='job')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
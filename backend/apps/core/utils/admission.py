@@ -0,0 +1,200 @@
+import math
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+from apps.core.exceptions.base import AdmissionRejected
+from apps.core.utils.metrics import registry
+
+# Admission control for write endpoints. Each scope (e.g. "transfers")
+# admits at most MAX_CONCURRENCY requests at a time per worker process,
+# and at most MAX_PER_USER in flight or queued per client. Requests
+# beyond the global limit wait in a FIFO queue; a request is shed at
+# once when the queue is full or its expected wait exceeds the deadline,
+# and otherwise when the deadline passes. Reads are never held back.
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_CONCURRENCY': 8,
+    'MAX_PER_USER': 2,
+    'MAX_QUEUE': 32,
+    'QUEUE_TIMEOUT_SECONDS': 2.0,
+    'SCOPES': {},
+}
+
+IN_FLIGHT = registry.gauge(
+    'auditflow_admission_in_flight',
+    'Admitted write requests currently running.',
+    labelnames=('scope',),
+)
+QUEUE_DEPTH = registry.gauge(
+    'auditflow_admission_queue_depth',
+    'Write requests waiting for admission.',
+    labelnames=('scope',),
+)
+REJECTED = registry.counter(
+    'auditflow_admission_rejected_total',
+    'Write requests shed by admission control.',
+    labelnames=('scope', 'reason'),
+)
+WAIT = registry.histogram(
+    'auditflow_admission_wait_seconds',
+    'Time admitted write requests spent queued.',
+    labelnames=('scope',),
+)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'ADMISSION_CONTROL', {})}
+
+
+def scope_options(scope):
+    options = config()
+    return {**options, **options['SCOPES'].get(scope, {})}
+
+
+class AdmissionController:
+    """Concurrency slots for one scope. ``acquire`` returns a ticket to
+    pass to ``release``, or raises AdmissionRejected."""
+
+    def __init__(self, scope, options):
+        self.scope = scope
+        self.max_concurrency = options['MAX_CONCURRENCY']
+        self.max_per_user = options['MAX_PER_USER']
+        self.max_queue = options['MAX_QUEUE']
+        self.timeout = options['QUEUE_TIMEOUT_SECONDS']
+        self.in_flight = 0
+        self.per_user = {}
+        self.waiters = deque()
+        # Moving average of how long a request holds its slot, used to
+        # estimate queueing delay.
+        self.service_time = 0.0
+        self._lock = threading.Lock()
+
+    def expected_wait(self, position):
+        return position * self.service_time / self.max_concurrency
+
+    def acquire(self, key):
+        with self._lock:
+            held = self.per_user.get(key, 0)
+            if self.max_per_user and held >= self.max_per_user:
+                self._reject('user', self.service_time)
+            if self.in_flight < self.max_concurrency and not self.waiters:
+                self.in_flight += 1
+                self.per_user[key] = held + 1
+                self._publish()
+                return key, time.monotonic()
+
+            expected = self.expected_wait(len(self.waiters) + 1)
+            if len(self.waiters) >= self.max_queue:
+                self._reject('queue_full', expected)
+            if expected > self.timeout:
+                self._reject('deadline', expected)
+            admitted = threading.Event()
+            self.waiters.append(admitted)
+            self.per_user[key] = held + 1
+            self._publish()
+
+        queued_at = time.monotonic()
+        if not admitted.wait(self.timeout):
+            with self._lock:
+                # A release may have handed over the slot just now.
+                if not admitted.is_set():
+                    self.waiters.remove(admitted)
+                    self._forget(key)
+                    self._publish()
+                    self._reject('timeout', self.expected_wait(len(self.waiters) + 1))
+        now = time.monotonic()
+        WAIT.observe(now - queued_at, scope=self.scope)
+        return key, now
+
+    def release(self, ticket):
+        key, admitted_at = ticket
+        held = time.monotonic() - admitted_at
+        with self._lock:
+            self.service_time = held if not self.service_time else 0.8 * self.service_time + 0.2 * held
+            self._forget(key)
+            if self.waiters:
+                # Hand the slot straight to the oldest waiter.
+                self.waiters.popleft().set()
+            else:
+                self.in_flight -= 1
+            self._publish()
+
+    def _forget(self, key):
+        remaining = self.per_user[key] - 1
+        if remaining:
+            self.per_user[key] = remaining
+        else:
+            del self.per_user[key]
+
+    def _publish(self):
+        IN_FLIGHT.set(self.in_flight, scope=self.scope)
+        QUEUE_DEPTH.set(len(self.waiters), scope=self.scope)
+
+    def _reject(self, reason, retry_after):
+        REJECTED.inc(scope=self.scope, reason=reason)
+        raise AdmissionRejected(reason, retry_after)
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(scope):
+    controller = _controllers.get(scope)
+    if controller is None:
+        with _controllers_lock:
+            controller = _controllers.get(scope)
+            if controller is None:
+                controller = _controllers[scope] = AdmissionController(scope, scope_options(scope))
+    return controller
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The service is busy, please retry shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class AdmissionThrottle(BaseThrottle):
+    """Holds one of the view's ``admission_scope`` slots for the rest of
+    the request; AdmissionControlMixin gives it back. Safe methods pass
+    straight through.
+
+    Over the per-user cap the request is throttled (429); when the scope
+    is saturated it is shed with 503. Both carry Retry-After.
+    """
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS or not config()['ENABLED']:
+            return True
+        controller = get_controller(getattr(view, 'admission_scope', 'default'))
+        key = request.user.pk if request.user.is_authenticated else self.get_ident(request)
+        try:
+            request.admission_ticket = (controller, controller.acquire(key))
+        except AdmissionRejected as e:
+            self.retry_after = max(1, math.ceil(e.retry_after))
+            if e.reason == 'user':
+                return False
+            raise ServiceOverloaded(self.retry_after)
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+def release(request):
+    """Give back the slot ``request`` holds, if any. Safe to call twice."""
+    admission = request.__dict__.pop('admission_ticket', None)
+    if admission is not None:
+        controller, ticket = admission
+        controller.release(ticket)
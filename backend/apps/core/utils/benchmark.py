@@ -0,0 +1,114 @@
+import statistics
+import threading
+from time import perf_counter
+
+# Registry for the performance benchmark suite run by
+# ``python manage.py run_benchmarks``. Each app declares its cases in a
+# ``benchmarks`` module:
+#
+#     @benchmark('transactions.create_single')
+#     def create_single(scale):
+#         ...
+#         return {'ops_per_sec': ...}
+#
+# A case returns a flat dict of metrics. Metrics whose name ends in
+# ``_per_sec`` are better when higher; every other metric (latencies in
+# ms, query counts) is better when lower.
+
+_cases = {}
+
+
+def benchmark(name):
+    def register(func):
+        _cases[name] = func
+        return func
+    return register
+
+
+def cases():
+    return dict(sorted(_cases.items()))
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_sec')
+
+
+def latency_summary(samples, prefix=''):
+    """p50/p95/mean in milliseconds for a list of durations in seconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        f'{prefix}p50_ms': statistics.median(ordered) * 1000,
+        f'{prefix}p95_ms': ordered[p95_index] * 1000,
+        f'{prefix}mean_ms': statistics.fmean(ordered) * 1000,
+    }
+
+
+def time_calls(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = perf_counter()
+        func()
+        samples.append(perf_counter() - start)
+    return samples
+
+
+def render_timings(serialize, iterations):
+    """Mean milliseconds to build a page with ``serialize()`` and to encode
+    it with each API renderer."""
+    from rest_framework.renderers import JSONRenderer
+    from apps.core.utils.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+
+    data = serialize()
+    metrics = {'serialize_mean_ms': statistics.fmean(time_calls(serialize, iterations)) * 1000}
+    encoders = {'json': JSONRenderer(), 'orjson': FastJSONRenderer()}
+    if msgpack is not None:
+        encoders['msgpack'] = MessagePackRenderer()
+    for name, renderer in encoders.items():
+        samples = time_calls(lambda: renderer.render(data), iterations)
+        metrics[f'{name}_render_mean_ms'] = statistics.fmean(samples) * 1000
+        metrics[f'{name}_bytes'] = len(renderer.render(data))
+    return metrics
+
+
+def run_threads(worker, thread_count):
+    """Run ``worker(index)`` in ``thread_count`` threads and return the wall
+    time. Each thread closes its own DB connections when done."""
+    from django.db import connections
+
+    errors = []
+
+    def target(index):
+        try:
+            worker(index)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(thread_count)]
+    start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - start
+    if errors:
+        raise errors[0]
+    return elapsed
+
+
+def compare(results, baseline, threshold):
+    """Return ``(case, metric, old, new, change)`` for every metric that got
+    worse than ``baseline`` by more than ``threshold`` (0.2 == 20%)."""
+    regressions = []
+    for case, metrics in results.items():
+        for metric, new in metrics.items():
+            old = baseline.get(case, {}).get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better(metric) else change
+            if worse > threshold:
+                regressions.append((case, metric, old, new, change))
+    return regressions
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from apps.core.utils.metrics import registry
+from apps.core.utils.renderers import FastJSONRenderer
+
+# In-process publish/subscribe for server-sent events. Publishers are
+# plain sync code (usually a transaction.on_commit callback); subscribers
+# are asyncio tasks, one per open stream, each with a small bounded queue.
+# The fan-out backend decides how a published message reaches the
+# subscribers of every worker process.
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'apps.core.utils.broker.LocalBackend',
+    'QUEUE_SIZE': 100,
+    'HEARTBEAT_SECONDS': 15,
+    'REDIS_URL': 'redis://localhost:6379/0',
+}
+
+SUBSCRIBERS = registry.gauge(
+    'auditflow_event_subscribers',
+    'Open server-sent event streams in this worker.',
+)
+DROPPED = registry.counter(
+    'auditflow_event_messages_dropped_total',
+    'Messages discarded because a subscriber queue was full.',
+)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'EVENTS', {})}
+
+
+def encode(event, data):
+    """One SSE frame; encoded once per publish and shared by subscribers."""
+    body = FastJSONRenderer().render(data).decode('utf-8')
+    return f'event: {event}\ndata: {body}\n\n'
+
+
+class LocalBackend:
+    """Single-worker fan-out: delivers straight to this process."""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class SharedMemoryBackend:
+    """Stand-in for a multi-worker backend: every Broker in the process acts
+    as a separate worker connected to one shared hub."""
+
+    _workers = []
+    _lock = threading.Lock()
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+        with self._lock:
+            self._workers.append(deliver)
+
+    def publish(self, channel, message):
+        with self._lock:
+            workers = list(self._workers)
+        for deliver in workers:
+            deliver(channel, message)
+
+    def close(self):
+        with self._lock:
+            self._workers.remove(self.deliver)
+
+
+class RedisBackend:
+    """Fan-out across worker processes through Redis pub/sub."""
+
+    prefix = 'auditflow:events:'
+
+    def __init__(self, deliver):
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured('RedisBackend requires the redis package')
+        self.deliver = deliver
+        self.client = redis.Redis.from_url(config()['REDIS_URL'])
+        self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        self.pubsub.psubscribe(**{f'{self.prefix}*': self._handle})
+        self.thread = self.pubsub.run_in_thread(sleep_time=1.0, daemon=True, exception_handler=self._on_error)
+
+    def publish(self, channel, message):
+        self.client.publish(f'{self.prefix}{channel}', message)
+
+    def _handle(self, item):
+        self.deliver(item['channel'].decode()[len(self.prefix):], item['data'].decode())
+
+    def _on_error(self, exc, pubsub, thread):
+        logger.warning('Redis event listener error: %s', exc)
+
+    def close(self):
+        self.thread.stop()
+        self.pubsub.close()
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message):
+        if self.queue.full():
+            # Slow consumer: keep the newest messages, balance events
+            # supersede older ones anyway.
+            self.queue.get_nowait()
+            DROPPED.inc()
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Next message, or None after ``timeout`` seconds of silence."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Broker:
+    def __init__(self, backend=None):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        backend_class = import_string(backend or config()['BACKEND'])
+        self.backend = backend_class(self._deliver)
+
+    def publish(self, channel, event, data):
+        self.backend.publish(channel, encode(event, data))
+
+    def subscribe(self, channel):
+        """Register the calling asyncio task for ``channel`` messages."""
+        subscription = Subscription(self, channel, config()['QUEUE_SIZE'])
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.channel]
+        SUBSCRIBERS.dec()
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                # The subscriber's event loop has shut down.
+                self.unsubscribe(subscription)
+
+    def close(self):
+        close = getattr(self.backend, 'close', None)
+        if close is not None:
+            close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = Broker()
+    return _broker
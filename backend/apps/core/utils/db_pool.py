@@ -0,0 +1,93 @@
+from django.db import connections
+from apps.core.utils.metrics import registry
+
+# Metrics for database connections. ``apps.core.db.postgresql`` times
+# every connection it hands to Django: a checkout from the process's
+# psycopg pool (including any wait for a free connection) when
+# OPTIONS['pool'] is set, otherwise a fresh connect and authentication.
+# Pool occupancy and the pool's own counters are read at scrape time.
+
+ACQUIRE_SECONDS = registry.histogram(
+    'auditflow_db_connection_acquire_seconds',
+    'Time to obtain a database connection: a pool checkout, or a new connection when not pooled.',
+    labelnames=('database', 'pooled'),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+POOL_SIZE = registry.gauge(
+    'auditflow_db_pool_size',
+    'Connections currently open in the pool, in use or idle.',
+    labelnames=('database',),
+)
+POOL_MAX_SIZE = registry.gauge(
+    'auditflow_db_pool_max_size',
+    'Upper bound on the pool size.',
+    labelnames=('database',),
+)
+POOL_AVAILABLE = registry.gauge(
+    'auditflow_db_pool_available',
+    'Idle connections ready for checkout.',
+    labelnames=('database',),
+)
+POOL_WAITING = registry.gauge(
+    'auditflow_db_pool_waiting',
+    'Checkouts waiting for a connection to be returned.',
+    labelnames=('database',),
+)
+POOL_WAIT_SECONDS = registry.counter(
+    'auditflow_db_pool_wait_seconds_total',
+    'Time checkouts spent waiting for a free connection.',
+    labelnames=('database',),
+)
+POOL_REQUESTS = registry.counter(
+    'auditflow_db_pool_requests_total',
+    'Connection checkouts served by the pool.',
+    labelnames=('database',),
+)
+POOL_TIMEOUTS = registry.counter(
+    'auditflow_db_pool_timeouts_total',
+    'Checkouts that failed, mostly after waiting longer than the pool timeout.',
+    labelnames=('database',),
+)
+POOL_CONNECTIONS = registry.counter(
+    'auditflow_db_pool_connections_total',
+    'Connections opened by the pool (initial fill, growth and replacements).',
+    labelnames=('database',),
+)
+
+
+def pools():
+    """``(alias, pool)`` for every database configured with OPTIONS['pool']."""
+    found = []
+    for alias in connections:
+        if connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            pool = getattr(connections[alias], 'pool', None)
+            if pool is not None:
+                found.append((alias, pool))
+    return found
+
+
+def close_pools():
+    """Close this process's pools. Call before forking workers: a child
+    must not share the parent's pooled sockets or its pool threads."""
+    for alias in connections:
+        if connections.settings[alias].get('OPTIONS', {}).get('pool'):
+            connections[alias].close_pool()
+
+
+def _collect():
+    for alias, pool in pools():
+        # get_stats leaves the pool's counters running (pop_stats would
+        # reset them for every other reader, such as the benchmarks), so
+        # the *_total metrics mirror them; pool_* is current occupancy.
+        stats = pool.get_stats()
+        POOL_SIZE.set(stats.get('pool_size', 0), database=alias)
+        POOL_MAX_SIZE.set(stats.get('pool_max', 0), database=alias)
+        POOL_AVAILABLE.set(stats.get('pool_available', 0), database=alias)
+        POOL_WAITING.set(stats.get('requests_waiting', 0), database=alias)
+        POOL_WAIT_SECONDS.set_total(stats.get('requests_wait_ms', 0) / 1000, database=alias)
+        POOL_REQUESTS.set_total(stats.get('requests_num', 0), database=alias)
+        POOL_TIMEOUTS.set_total(stats.get('requests_errors', 0), database=alias)
+        POOL_CONNECTIONS.set_total(stats.get('connections_num', 0), database=alias)
+
+
+registry.add_collector(_collect)
@@ -0,0 +1,59 @@
+import threading
+import time
+from django.utils.module_loading import autodiscover_modules
+
+# Handlers for background jobs (see apps.core.services.job_service). Each
+# app declares them in a ``jobs`` module:
+#
+#     @job('audit.rebuild_rollups')
+#     def rebuild_rollups(context, batch_size=50000):
+#         ...
+#         context.progress(done, total)
+#         return {'events': total}
+#
+# Keyword arguments come from Job.params; the return value must be JSON
+# serialisable and is stored as Job.result.
+
+_handlers = {}
+_discovered = False
+_lock = threading.Lock()
+
+
+def job(name):
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def handlers():
+    global _discovered
+    if not _discovered:
+        with _lock:
+            if not _discovered:
+                autodiscover_modules('jobs')
+                _discovered = True
+    return dict(sorted(_handlers.items()))
+
+
+def get_handler(name):
+    return handlers().get(name)
+
+
+class JobContext:
+    """Passed to handlers to report progress. Progress writes are
+    throttled to one per ``interval`` seconds; each one also renews the
+    lease and raises JobInterrupted if the job was cancelled meanwhile."""
+
+    def __init__(self, job, report, interval=1.0):
+        self.job = job
+        self._report = report
+        self._interval = interval
+        self._last = 0.0
+
+    def progress(self, done, total=None, message=None, force=False):
+        now = time.monotonic()
+        if not force and now - self._last < self._interval:
+            return
+        self._last = now
+        self._report(self.job, done, total, message)
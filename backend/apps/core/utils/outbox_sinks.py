@@ -0,0 +1,69 @@
+import json
+import logging
+import threading
+import urllib.request
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Destinations for outbox events. A sink receives a list of messages (see
+# OutboxEvent.as_message) in id order and either returns or raises; a raise
+# means none of the messages count as delivered. Delivery is at-least-once,
+# so sinks and their consumers must tolerate repeats (dedupe on ``id``).
+
+logger = logging.getLogger(__name__)
+
+
+class LogSink:
+    def __init__(self, name, level='INFO'):
+        self.name = name
+        self.level = logging.getLevelName(level)
+
+    def deliver(self, messages):
+        for message in messages:
+            logger.log(self.level, 'outbox %s %s #%s', message['topic'], message['key'], message['id'])
+
+
+class WebhookSink:
+    """POST ``{"events": [...]}`` as JSON; any non-2xx status is a failure."""
+
+    def __init__(self, name, url, timeout=5, headers=None):
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+
+    def deliver(self, messages):
+        body = json.dumps({'events': messages}).encode()
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise RuntimeError(f'{self.url} returned {response.status}')
+
+
+class MemorySink:
+    """Keeps delivered messages in process; for tests and local development."""
+
+    delivered = []
+    _lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+
+    def deliver(self, messages):
+        with self._lock:
+            self.delivered.extend(messages)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls.delivered.clear()
+
+
+def get_sinks():
+    """Sinks from OUTBOX['SINKS'], a mapping of name to
+    ``{'BACKEND': dotted.path, 'OPTIONS': {...}}`` like CACHES."""
+    configured = getattr(settings, 'OUTBOX', {}).get('SINKS', {})
+    return [
+        import_string(entry['BACKEND'])(name, **entry.get('OPTIONS', {}))
+        for name, entry in configured.items()
+    ]
@@ -0,0 +1,135 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from django.conf import settings
+from django.core import signing
+
+# On-demand statistical profiling of live requests. A profiled request
+# gets a sampler thread that snapshots the request thread's stack every
+# INTERVAL_MS; the result is written in the collapsed-stack format read by
+# flamegraph.pl, speedscope and inferno ("frame;frame;frame count").
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,
+    'ROUTES': [],
+    'INTERVAL_MS': 5,
+    'DIR': None,
+    'MAX_FILES': 200,
+    'TOKEN_MAX_AGE': 3600,
+}
+
+HEADER = 'HTTP_X_PROFILE_TOKEN'
+_SALT = 'apps.core.profiling'
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'PROFILING', {})}
+
+
+def mint_token(user, route=None):
+    """Signed token that enables profiling for requests carrying it in the
+    ``X-Profile-Token`` header, optionally only for one route."""
+    return signing.dumps({'user': user.pk, 'route': route}, salt=_SALT)
+
+
+def token_allows(token, route):
+    try:
+        payload = signing.loads(token, salt=_SALT, max_age=config()['TOKEN_MAX_AGE'])
+    except signing.BadSignature:
+        return False
+    return payload.get('route') in (None, route)
+
+
+def should_profile(request, route):
+    token = request.META.get(HEADER)
+    if token is not None:
+        return token_allows(token, route)
+    options = config()
+    if not options['SAMPLE_RATE'] or (options['ROUTES'] and route not in options['ROUTES']):
+        return False
+    return random.random() < options['SAMPLE_RATE']
+
+
+def _label(code):
+    filename = code.co_filename
+    for marker in ('site-packages/', 'backend/'):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + len(marker):]
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    def __init__(self, thread_id=None, interval=0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            labels = []
+            while frame is not None:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def profile_dir():
+    return Path(config()['DIR'] or Path(settings.BASE_DIR) / 'profiles')
+
+
+def save(sampler, route, method):
+    """Write a profile and drop the oldest ones beyond MAX_FILES."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = '{}-{}-{}-{:.0f}ms.folded'.format(
+        datetime.now(dt_timezone.utc).strftime('%Y%m%dT%H%M%S%f'),
+        method.lower(),
+        ''.join(c if c.isalnum() or c in '-_' else '_' for c in route),
+        sampler.elapsed * 1000,
+    )
+    (directory / name).write_text(sampler.collapsed())
+
+    stored = list_profiles()
+    for old in stored[config()['MAX_FILES']:]:
+        old.unlink(missing_ok=True)
+    return name
+
+
+def list_profiles():
+    """Stored profiles, newest first."""
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    return sorted(directory.glob('*.folded'), reverse=True)
+
+
+def get_profile(name):
+    path = profile_dir() / Path(name).name
+    return path if path.suffix == '.folded' and path.is_file() else None
@@ -0,0 +1,137 @@
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from apps.core.exceptions.base import QueryBudgetExceeded
+from apps.core.utils.metrics import registry
+
+# N+1 and query-budget detection. SQL is reduced to a fingerprint (literals
+# and IN lists collapsed) so ``SELECT ... WHERE id = 1`` and ``... id = 2``
+# count as the same shape. Used by QueryBudgetMiddleware on a sample of
+# requests and by ``assert_query_budget`` in tests.
+
+logger = logging.getLogger('apps.core.query_budget')
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.0,
+    'STRICT': False,
+    'REPEAT_THRESHOLD': 5,
+    'DEFAULT_BUDGET': None,
+    'BUDGETS': {},
+}
+
+VIOLATIONS = registry.counter(
+    'auditflow_query_budget_violations_total',
+    'Requests that repeated a query shape or exceeded their query budget.',
+    ['route', 'kind'],
+)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_SPACE = re.compile(r'\s+')
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+# Frames from this module and from other execute wrappers are never the
+# code responsible for a query.
+_SKIP_PREFIXES = (__file__.rsplit('.', 1)[0], str(Path(__file__).resolve().parents[1] / 'middleware'))
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+
+
+def fingerprint(sql):
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql.replace('%s', '?'))
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def _app_frame():
+    """First frame from project code (not Django, DRF or a query wrapper)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (
+            filename.startswith(_PROJECT_ROOT)
+            and 'site-packages' not in filename
+            and not filename.startswith(_SKIP_PREFIXES)
+        ):
+            return f'{filename}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryInspector:
+    """``execute_wrapper`` that counts statements per fingerprint. The stack
+    frame is only captured when a shape hits the repeat threshold or the
+    budget is crossed, which keeps the common path to a regex and a dict
+    update."""
+
+    def __init__(self, repeat_threshold, budget=None):
+        self.repeat_threshold = repeat_threshold
+        self.budget = budget
+        self.total = 0
+        self.counts = Counter()
+        self.frames = {}
+        self.budget_frame = None
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = fingerprint(sql)
+        self.counts[shape] += 1
+        self.total += 1
+        if self.counts[shape] == self.repeat_threshold:
+            self.frames[shape] = _app_frame()
+        if self.budget is not None and self.total > self.budget and self.budget_frame is None:
+            self.budget_frame = _app_frame()
+        return execute(sql, params, many, context)
+
+    def violations(self):
+        """``(kind, message)`` pairs for every problem seen so far."""
+        found = [
+            ('repeated', f'{count}x {shape} (at {self.frames.get(shape, "unknown")})')
+            for shape, count in self.counts.items()
+            if count >= self.repeat_threshold
+        ]
+        if self.budget is not None and self.total > self.budget:
+            found.append((
+                'budget',
+                f'{self.total} queries, budget {self.budget} (exceeded at {self.budget_frame or "unknown"})',
+            ))
+        return found
+
+
+@contextmanager
+def inspect_queries(inspector):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
+
+
+def report(inspector, route, strict=False):
+    violations = inspector.violations()
+    for kind, message in violations:
+        VIOLATIONS.inc(route=route, kind=kind)
+        logger.warning('Query budget violation on %s: %s', route, message)
+    if violations and strict:
+        raise QueryBudgetExceeded(
+            f'{route}: ' + '; '.join(message for _, message in violations)
+        )
+
+
+@contextmanager
+def assert_query_budget(max_queries=None, repeat_threshold=None):
+    """Fail if the block runs more than ``max_queries`` statements or repeats
+    one query shape ``repeat_threshold`` times (an N+1)."""
+    inspector = QueryInspector(repeat_threshold or config()['REPEAT_THRESHOLD'], max_queries)
+    with inspect_queries(inspector):
+        yield inspector
+    violations = inspector.violations()
+    if violations:
+        raise QueryBudgetExceeded('; '.join(message for _, message in violations))
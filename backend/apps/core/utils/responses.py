@@ -0,0 +1,83 @@
+import json
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+
+def etag_matches(request, *etags):
+    """Whether If-None-Match lists any of ``etags`` (or ``*``), compared
+    weakly as RFC 9110 asks for If-None-Match."""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    listed = parse_etags(header)
+    if listed == ['*']:
+        return True
+
+    def opaque(tag):
+        return tag[2:] if tag.startswith('W/') else tag
+
+    return not {opaque(tag) for tag in listed}.isdisjoint(opaque(tag) for tag in etags)
+
+
+class FragmentResponse(Response):
+    """Response built from items that are already JSON-encoded.
+
+    JSON renderers get the fragments joined verbatim into the body, so no
+    serializer or encoder runs per item. With an ``envelope`` they are the
+    list under ``key`` at its end. Any other renderer (e.g. the browsable
+    API) falls back to the decoded ``data``.
+    """
+
+    def __init__(self, fragments, envelope=None, many=True, key='results', **kwargs):
+        super().__init__(None, **kwargs)
+        self.fragments = fragments
+        self.envelope = envelope
+        self.many = many
+        self.key = key
+
+    @property
+    def data(self):
+        if self._data is None and self.fragments is not None:
+            results = [json.loads(fragment) for fragment in self.fragments]
+            if not self.many:
+                self._data = results[0]
+            elif self.envelope is None:
+                self._data = results
+            else:
+                self._data = {**self.envelope, self.key: results}
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = getattr(self, 'accepted_renderer', None)
+        accepted_media_type = getattr(self, 'accepted_media_type', None)
+        context = getattr(self, 'renderer_context', None)
+        if (
+            not isinstance(renderer, JSONRenderer)
+            or renderer.get_indent(accepted_media_type, context or {}) is not None
+        ):
+            return super().rendered_content
+
+        context['response'] = self
+        if self.content_type is None and renderer.charset is not None:
+            self['Content-Type'] = f"{renderer.media_type}; charset={renderer.charset}"
+        else:
+            self['Content-Type'] = self.content_type or renderer.media_type
+
+        fragments = [
+            fragment if isinstance(fragment, bytes) else fragment.encode('utf-8')
+            for fragment in self.fragments
+        ]
+        if not self.many:
+            return fragments[0]
+        items = b'[' + b','.join(fragments) + b']'
+        if self.envelope is None:
+            return items
+        head = renderer.render(self.envelope, accepted_media_type, context)
+        separator = b',' if self.envelope else b''
+        return head[:-1] + separator + json.dumps(self.key).encode() + b':' + items + b'}'
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import threading
+from functools import lru_cache
+from pathlib import Path
+from django.conf import settings
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+# The OpenAPI schema only changes when the code does, so it is built once
+# per code version: either ahead of time by ``manage.py generate_schema``
+# (written to SCHEMA_CACHE_DIR) or on the first request, then kept in
+# memory together with a gzipped copy and an ETag for each.
+
+RENDERERS = {
+    'yaml': OpenApiYamlRenderer,
+    'json': OpenApiJsonRenderer,
+}
+
+_memory = {}
+_lock = threading.Lock()
+
+
+class CachedSchema:
+    def __init__(self, body, version):
+        self.body = body
+        self.gzipped = gzip.compress(body, mtime=0)
+        self.etag = '"{}-{}"'.format(version, hashlib.sha256(body).hexdigest()[:16])
+        # Strong tags name exact bytes, so the gzipped copy needs its own.
+        self.gzip_etag = self.etag[:-1] + '-gzip"'
+
+
+def code_version():
+    """CODE_VERSION (e.g. the deployed git sha) or a fingerprint of the
+    project's Python sources."""
+    return getattr(settings, 'CODE_VERSION', '') or _source_fingerprint()
+
+
+@lru_cache(maxsize=1)
+def _source_fingerprint():
+    import drf_spectacular
+
+    digest = hashlib.sha256(drf_spectacular.__version__.encode())
+    base = Path(settings.BASE_DIR)
+    for package in ('apps', 'config'):
+        for path in sorted((base / package).rglob('*.py')):
+            stat = path.stat()
+            digest.update(f'{path.relative_to(base)}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:12]
+
+
+def cache_dir():
+    return Path(getattr(settings, 'SCHEMA_CACHE_DIR', '') or Path(settings.BASE_DIR) / 'schema_cache')
+
+
+def schema_path(fmt, directory=None):
+    return Path(directory or cache_dir()) / f'openapi-{code_version()}.{fmt}'
+
+
+def build(fmt):
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return RENDERERS[fmt]().render(schema, renderer_context={})
+
+
+def get(fmt):
+    version = code_version()
+    entry = _memory.get((fmt, version))
+    if entry is None:
+        with _lock:
+            entry = _memory.get((fmt, version))
+            if entry is None:
+                path = schema_path(fmt)
+                body = path.read_bytes() if path.is_file() else build(fmt)
+                entry = _memory[(fmt, version)] = CachedSchema(body, version)
+    return entry
+
+
+def write_files(directory=None):
+    paths = []
+    for fmt in RENDERERS:
+        path = schema_path(fmt, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(build(fmt))
+        paths.append(path)
+    return paths
+
+
+def clear():
+    with _lock:
+        _memory.clear()
@@ -0,0 +1,165 @@
+import heapq
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Optional horizontal sharding. Each account lives on one of the
+# databases listed in SHARDING['SHARDS'], picked by a hash of its
+# recipient_id, together with its transactions and audit logs. Row ids
+# are allocated in per-shard blocks of ID_BLOCK (see ``prepare``), so the
+# shard of a user or transaction can also be read off its id, e.g. the
+# user id inside a JWT.
+#
+# Code that handles one account pins its shard with ``use(alias)``;
+# ShardRouter sends every query without an explicit database there.
+# With fewer than two shards everything stays on ``default``.
+
+DEFAULTS = {
+    'SHARDS': [],
+    'ID_BLOCK': 10 ** 12,
+}
+
+# Models whose ids must not collide between shards (outbox event ids are
+# what consumers deduplicate on).
+SHARDED_MODELS = ('users.CustomUser', 'transactions.Transaction', 'audit.AuditLog', 'core.OutboxEvent')
+
+_pinned = ContextVar('auditflow_shard', default=None)
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'SHARDING', {})}
+
+
+def shards():
+    return list(config()['SHARDS']) or [DEFAULT_DB_ALIAS]
+
+
+def enabled():
+    return len(shards()) > 1
+
+
+def shard_for(recipient_id):
+    """Database alias holding the account with ``recipient_id``."""
+    aliases = shards()
+    return aliases[zlib.crc32(str(recipient_id).encode()) % len(aliases)]
+
+
+def shard_of(user):
+    return shard_for(user.recipient_id)
+
+
+def shard_for_id(pk):
+    """Database alias a user, transaction or audit log id was allocated
+    on; ``default`` for ids that are not valid on any shard."""
+    aliases = shards()
+    try:
+        index = int(pk) // config()['ID_BLOCK']
+    except (TypeError, ValueError):
+        return DEFAULT_DB_ALIAS
+    return aliases[index] if 0 <= index < len(aliases) else DEFAULT_DB_ALIAS
+
+
+def db():
+    """The pinned shard, or ``default``."""
+    return _pinned.get() or DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use(alias):
+    token = _pinned.set(alias)
+    try:
+        yield alias
+    finally:
+        _pinned.reset(token)
+
+
+def pin(alias):
+    """Pin ``alias`` until ShardMiddleware ends the request."""
+    _pinned.set(alias)
+
+
+def reset():
+    _pinned.set(None)
+
+
+def find(model, **lookup):
+    """First shard with a ``model`` row matching ``lookup``, or None. One
+    query per shard; for lookups not keyed by recipient_id or id."""
+    for alias in shards():
+        if model._default_manager.db_manager(alias).filter(**lookup).exists():
+            return alias
+    return None
+
+
+def prepare(alias):
+    """Start the id sequences of SHARDED_MODELS on ``alias`` at its block.
+    Run once after migrating a shard (``manage.py prepare_shards``);
+    tables whose ids are already in the block are left alone."""
+    start = shards().index(alias) * config()['ID_BLOCK']
+    if not start:
+        return
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for label in SHARDED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            cursor.execute(f'SELECT MAX(id) FROM {quote(table)}')
+            if (cursor.fetchone()[0] or 0) >= start:
+                continue
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)", [table, start])
+            elif connection.vendor == 'sqlite':
+                cursor.execute('DELETE FROM sqlite_sequence WHERE name = %s', [table])
+                cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, start - 1])
+            elif connection.vendor == 'mysql':
+                cursor.execute(f'ALTER TABLE {quote(table)} AUTO_INCREMENT = {int(start)}')
+            else:
+                raise NotImplementedError(f'Cannot set id sequences on {connection.vendor}')
+
+
+class Merged:
+    """The same ordered query run on every shard, read as one sequence
+    for listings that span accounts (paginates like a queryset).
+
+    ``queryset`` must be ordered by ``key`` (descending if ``reverse``).
+    Slicing ``[start:stop]`` reads at most ``stop`` rows per shard.
+    """
+
+    def __init__(self, queryset, key, reverse=False):
+        self.querysets = [queryset.using(alias) for alias in shards()]
+        self.key = key
+        self.reverse = reverse
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('Merged only supports slicing')
+        start, stop = index.start or 0, index.stop
+        parts = [queryset[:stop] if stop is not None else queryset for queryset in self.querysets]
+        return list(islice(heapq.merge(*parts, key=self.key, reverse=self.reverse), start, stop))
+
+
+class ShardRouter:
+    """Routes queries without an explicit database to the pinned shard.
+    Queries through a model instance (related managers, ``save``) are
+    left to Django, which keeps them on the instance's database."""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return None
+        return _pinned.get()
+
+    db_for_write = db_for_read
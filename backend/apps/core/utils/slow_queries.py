@@ -0,0 +1,137 @@
+import json
+import logging
+import queue
+import threading
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from django.conf import settings
+from django.db import connections
+from apps.core.utils.metrics import registry
+from apps.core.utils.query_budget import fingerprint
+
+# Slow statements seen by PerformanceMiddleware are kept in a bounded
+# in-process ring buffer. Only the parameter *shape* is stored; the values
+# are handed to a background thread that runs EXPLAIN on its own
+# connection so the request never waits for the plan.
+
+logger = logging.getLogger('apps.core.slow_queries')
+
+DEFAULTS = {
+    'THRESHOLD_MS': 200,
+    'BUFFER_SIZE': 200,
+    'EXPLAIN': True,
+    'ANALYZE': False,
+    'DUMP_DIR': None,
+}
+
+SLOW_QUERIES = registry.counter(
+    'auditflow_slow_queries_total',
+    'Statements slower than SLOW_QUERY THRESHOLD_MS, by route.',
+    ['route'],
+)
+
+_buffer = deque(maxlen=DEFAULTS['BUFFER_SIZE'])
+_lock = threading.Lock()
+_explain_queue = queue.Queue(maxsize=100)
+_worker = None
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'SLOW_QUERY', {})}
+
+
+def params_shape(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: _shape(value) for key, value in params.items()}
+    return [_shape(value) for value in params]
+
+
+def _shape(value):
+    if isinstance(value, (list, tuple)):
+        return f'{type(value).__name__}[{len(value)}]'
+    return type(value).__name__
+
+
+def record(sql, params, duration, route, using='default', many=False):
+    global _buffer
+    options = config()
+    entry = {
+        'recorded_at': datetime.now(dt_timezone.utc).isoformat(),
+        'duration_ms': round(duration * 1000, 2),
+        'route': route,
+        'database': using,
+        'sql': fingerprint(sql),
+        'params': None if many else params_shape(params),
+        'explain': None,
+    }
+    with _lock:
+        if _buffer.maxlen != options['BUFFER_SIZE']:
+            _buffer = deque(_buffer, maxlen=options['BUFFER_SIZE'])
+        _buffer.append(entry)
+    SLOW_QUERIES.inc(route=route)
+
+    if options['EXPLAIN'] and not many and sql.lstrip()[:6].upper() == 'SELECT':
+        try:
+            _explain_queue.put_nowait((entry, sql, params, using, options['ANALYZE']))
+        except queue.Full:
+            entry['explain'] = 'skipped: explain queue full'
+            return entry
+        _ensure_worker()
+    return entry
+
+
+def entries():
+    """Buffered entries, newest first."""
+    with _lock:
+        return list(reversed(_buffer))
+
+
+def clear():
+    with _lock:
+        _buffer.clear()
+
+
+def dump(directory=None):
+    """Write the buffer to ``<directory>/slow-queries-<timestamp>.json``."""
+    directory = Path(directory or config()['DUMP_DIR'] or Path(settings.BASE_DIR) / 'slow_queries')
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"slow-queries-{datetime.now(dt_timezone.utc):%Y%m%dT%H%M%S%f}.json"
+    path.write_text(json.dumps(entries(), indent=2, default=str))
+    return path
+
+
+def wait_for_explains():
+    _explain_queue.join()
+
+
+def _ensure_worker():
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_explain_loop, name='slow-query-explain', daemon=True)
+            _worker.start()
+
+
+def _explain_loop():
+    while True:
+        entry, sql, params, using, analyze = _explain_queue.get()
+        try:
+            entry['explain'] = _explain(sql, params, using, analyze)
+        except Exception as e:
+            entry['explain'] = f'failed: {e}'
+            logger.debug('EXPLAIN failed for %s', entry['sql'], exc_info=True)
+        finally:
+            connections[using].close()
+            _explain_queue.task_done()
+
+
+def _explain(sql, params, using, analyze):
+    connection = connections[using]
+    options = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+    prefix = connection.ops.explain_query_prefix(**options)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
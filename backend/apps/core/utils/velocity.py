@@ -0,0 +1,301 @@
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from apps.core.exceptions.base import VelocityLimitExceeded
+from apps.core.utils.metrics import registry
+
+# Sliding-window velocity limits: at most ``count`` hits and ``amount``
+# in total per ``window`` seconds for one key. Amounts are tracked as
+# integer minor units (paise) so the hot path never touches Decimal
+# arithmetic. The local backend keeps a small ring buffer per key and
+# limit and needs no I/O; the cache backend shares counters between
+# worker processes at the cost of cache round trips.
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'apps.core.utils.velocity.LocalBackend',
+    'CACHE': 'default',
+    'BUCKETS': 12,
+    'MAX_KEYS': 100000,
+    'TIERS': {},
+}
+
+REJECTIONS = registry.counter(
+    'auditflow_velocity_rejections_total',
+    'Transfers rejected by a velocity limit.',
+    labelnames=('tier', 'window'),
+)
+
+Limit = namedtuple('Limit', 'window count amount')
+
+
+def config():
+    return {**DEFAULTS, **getattr(settings, 'VELOCITY_LIMITS', {})}
+
+
+def minor_units(amount):
+    return int(Decimal(amount) * 100)
+
+
+def parse_limits(entries):
+    """``[{'window': 60, 'count': 10, 'amount': '50000'}, ...]`` to Limits;
+    ``count`` or ``amount`` may be left out."""
+    return tuple(
+        Limit(
+            window=int(entry['window']),
+            count=entry.get('count'),
+            amount=minor_units(entry['amount']) if entry.get('amount') is not None else None,
+        )
+        for entry in entries
+    )
+
+
+def describe(limit):
+    if limit.window % 86400 == 0:
+        span = f'{limit.window // 86400} day(s)'
+    elif limit.window % 3600 == 0:
+        span = f'{limit.window // 3600} hour(s)'
+    elif limit.window % 60 == 0:
+        span = f'{limit.window // 60} minute(s)'
+    else:
+        span = f'{limit.window} seconds'
+    parts = []
+    if limit.count is not None:
+        parts.append(f'{limit.count} transfers')
+    if limit.amount is not None:
+        parts.append(f'₹{Decimal(limit.amount) / 100:.2f}')
+    return f"Velocity limit exceeded: at most {' and '.join(parts)} per {span}"
+
+
+def _fits(limit, count, amount):
+    return (
+        (limit.count is None or count <= limit.count)
+        and (limit.amount is None or amount <= limit.amount)
+    )
+
+
+class _Window:
+    """Ring buffer of per-bucket counts and amounts for one key and limit,
+    with running totals. Buckets that slid out of the window are cleared
+    lazily, so a hit costs O(1) amortised."""
+
+    __slots__ = ('counts', 'amounts', 'epoch', 'count', 'amount')
+
+    def __init__(self, buckets):
+        self.counts = array('q', bytes(8 * buckets))
+        self.amounts = array('q', bytes(8 * buckets))
+        self.epoch = 0
+        self.count = 0
+        self.amount = 0
+
+    def advance(self, epoch):
+        buckets = len(self.counts)
+        stale = epoch - self.epoch
+        if stale <= 0:
+            return
+        if stale >= buckets:
+            for slot in range(buckets):
+                self.counts[slot] = self.amounts[slot] = 0
+            self.count = self.amount = 0
+        else:
+            for old in range(self.epoch + 1, epoch + 1):
+                slot = old % buckets
+                self.count -= self.counts[slot]
+                self.amount -= self.amounts[slot]
+                self.counts[slot] = self.amounts[slot] = 0
+        self.epoch = epoch
+
+    def retry_after(self, limit, amount, width, now):
+        """Seconds until enough of the oldest buckets slide out for one more
+        hit of ``amount`` to fit."""
+        buckets = len(self.counts)
+        count, total = self.count, self.amount
+        for age in range(buckets - 1, -1, -1):
+            slot = (self.epoch - age) % buckets
+            count -= self.counts[slot]
+            total -= self.amounts[slot]
+            if _fits(limit, count + 1, total + amount):
+                return (self.epoch - age + buckets) * width - now
+        return limit.window
+
+
+class LocalBackend:
+    """Per-process counters. Each worker enforces the limits on its own,
+    so with N workers a sender can reach up to N times a limit; use the
+    cache backend where that matters. The least recently used keys are
+    forgotten beyond MAX_KEYS."""
+
+    def __init__(self, options):
+        self.buckets = options['BUCKETS']
+        self.max_keys = options['MAX_KEYS']
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limits, amount):
+        """Record a hit unless it would exceed one of ``limits``. Returns a
+        token for ``release``, or raises VelocityLimitExceeded."""
+        now = time.monotonic()
+        with self._lock:
+            windows = self._keys.get(key)
+            if windows is None:
+                windows = self._keys[key] = [_Window(self.buckets) for _ in limits]
+                if len(self._keys) > self.max_keys:
+                    self._keys.popitem(last=False)
+            else:
+                self._keys.move_to_end(key)
+
+            epochs = []
+            for limit, window in zip(limits, windows):
+                width = limit.window / self.buckets
+                epoch = int(now / width)
+                window.advance(epoch)
+                if not _fits(limit, window.count + 1, window.amount + amount):
+                    retry_after = window.retry_after(limit, amount, width, now)
+                    raise VelocityLimitExceeded(describe(limit), limit.window, retry_after)
+                epochs.append(epoch)
+
+            for window, epoch in zip(windows, epochs):
+                slot = epoch % self.buckets
+                window.counts[slot] += 1
+                window.amounts[slot] += amount
+                window.count += 1
+                window.amount += amount
+        return epochs
+
+    def release(self, key, amount, token):
+        """Undo a hit, e.g. for a transfer that failed after all."""
+        with self._lock:
+            windows = self._keys.get(key)
+            if windows is None:
+                return
+            for window, epoch in zip(windows, token):
+                # Nothing to undo once the bucket slid out of the window.
+                if window.epoch - epoch < self.buckets:
+                    slot = epoch % self.buckets
+                    window.counts[slot] -= 1
+                    window.amounts[slot] -= amount
+                    window.count -= 1
+                    window.amount -= amount
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+class CacheBackend:
+    """Counters shared through a Django cache (Redis or memcached in
+    production), so limits hold across worker processes.
+
+    Uses the two-counter sliding window: the previous fixed window's
+    total, weighted by how much of it still overlaps the sliding window,
+    plus the current one. Check and increment are separate cache calls,
+    so concurrent transfers from one sender can overshoot a limit by the
+    number of requests in flight.
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options['CACHE']]
+
+    def _keys(self, key, limit, fixed):
+        prefix = f'velocity:{key}:{limit.window}'
+        return (f'{prefix}:{fixed}:n', f'{prefix}:{fixed}:a', f'{prefix}:{fixed - 1}:n', f'{prefix}:{fixed - 1}:a')
+
+    def hit(self, key, limits, amount):
+        now = time.time()
+        fixed = [int(now // limit.window) for limit in limits]
+        names = [self._keys(key, limit, epoch) for limit, epoch in zip(limits, fixed)]
+        values = self.cache.get_many([name for group in names for name in group])
+
+        for limit, epoch, group in zip(limits, fixed, names):
+            count, total, previous_count, previous_total = (values.get(name, 0) for name in group)
+            overlap = 1 - (now - epoch * limit.window) / limit.window
+            if not _fits(limit, previous_count * overlap + count + 1, previous_total * overlap + total + amount):
+                retry_after = self._retry_after(limit, amount, now, epoch, count, total, previous_count, previous_total)
+                raise VelocityLimitExceeded(describe(limit), limit.window, retry_after)
+
+        for limit, group in zip(limits, names):
+            for name, step in ((group[0], 1), (group[1], amount)):
+                self.cache.add(name, 0, timeout=2 * limit.window)
+                self.cache.incr(name, step)
+        return list(zip(limits, fixed))
+
+    @staticmethod
+    def _retry_after(limit, amount, now, epoch, count, total, previous_count, previous_total):
+        """Seconds until the weighted previous window has decayed enough;
+        when the current window alone is full, until it becomes the
+        previous one and decays in turn."""
+        elapsed = now - epoch * limit.window
+        wait = 0.0
+        for cap, current, previous, step in (
+            (limit.count, count, previous_count, 1),
+            (limit.amount, total, previous_total, amount),
+        ):
+            if cap is None:
+                continue
+            room = cap - current - step
+            if room < 0:
+                wait = max(wait, limit.window - elapsed + limit.window * min(1, -room / max(current, 1)))
+            elif previous > room:
+                wait = max(wait, limit.window * (1 - room / previous) - elapsed)
+        return wait or limit.window
+
+    def release(self, key, amount, token):
+        for limit, epoch in token:
+            count_name, amount_name = self._keys(key, limit, epoch)[:2]
+            try:
+                self.cache.decr(count_name, 1)
+                self.cache.decr(amount_name, amount)
+            except ValueError:
+                pass
+
+    def clear(self):
+        pass
+
+
+class Limiter:
+    def __init__(self, options=None):
+        options = options or config()
+        self.enabled = options['ENABLED']
+        self.backend = import_string(options['BACKEND'])(options)
+        self.tiers = {name: parse_limits(entries) for name, entries in options['TIERS'].items()}
+
+    def limits(self, tier):
+        return self.tiers.get(tier) or self.tiers.get('default', ())
+
+    def hit(self, key, tier, amount):
+        """Count one hit of ``amount`` (a Decimal) for ``key`` against the
+        tier's limits. Returns a token for ``release``; raises
+        VelocityLimitExceeded when a limit would be exceeded."""
+        limits = self.limits(tier)
+        if not self.enabled or not limits:
+            return None
+        units = minor_units(amount)
+        try:
+            token = self.backend.hit(f'{tier}:{key}', limits, units)
+        except VelocityLimitExceeded as e:
+            REJECTIONS.inc(tier=tier, window=str(e.window))
+            raise
+        return units, token
+
+    def release(self, key, tier, token):
+        if token is not None:
+            units, backend_token = token
+            self.backend.release(f'{tier}:{key}', units, backend_token)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = Limiter()
+    return _limiter
@@ -0,0 +1,51 @@
+import time
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.core.utils.broker import config, get_broker
+
+# Server-sent events for the current user (balance and transaction
+# updates). Each open stream is an async generator parked on its
+# subscription queue, so idle connections hold no thread and no database
+# connection. Needs an ASGI server; under WSGI a stream ties up a worker.
+
+
+def _access_token(request):
+    """Access token from the Authorization header, or ``?token=`` since
+    EventSource cannot send headers. Validated without a database hit."""
+    raw = request.GET.get('token', '')
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        raw = header[len('Bearer '):]
+    if not raw:
+        return None
+    try:
+        return AccessToken(raw)
+    except TokenError:
+        return None
+
+
+async def _stream(channel, expires_at):
+    heartbeat = config()['HEARTBEAT_SECONDS']
+    with get_broker().subscribe(channel) as subscription:
+        yield 'retry: 3000\n\n'
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                # The client reconnects with a fresh token.
+                yield 'event: token_expired\ndata: {}\n\n'
+                return
+            message = await subscription.get(timeout=min(heartbeat, remaining))
+            yield message if message is not None else ': ping\n\n'
+
+
+async def event_stream(request):
+    token = _access_token(request)
+    if token is None:
+        return JsonResponse({'error': 'Authentication credentials were not provided or are invalid'}, status=401)
+    channel = f'user:{token[api_settings.USER_ID_CLAIM]}'
+    response = StreamingHttpResponse(_stream(channel, token['exp']), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
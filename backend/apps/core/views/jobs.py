@@ -0,0 +1,51 @@
+from pathlib import Path
+from django.http import FileResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from apps.core.models.job import Job
+from apps.core.serializers.job import JobSerializer
+from apps.core.services.job_service import JobService, export_dir
+from apps.core.utils.jobs import handlers
+
+
+class JobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Staff API to enqueue background jobs and poll their progress."""
+    serializer_class = JobSerializer
+    permission_classes = [IsAdminUser]
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        for field in ('status', 'name'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=False, methods=['get'])
+    def types(self, request):
+        return Response({'names': list(handlers())})
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = self.get_object()
+        if not JobService.cancel(job):
+            return Response({'error': f'Job already {job.status}'}, status=status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @extend_schema(responses={(200, 'application/octet-stream'): OpenApiTypes.BINARY})
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        name = job.result.get('file') if isinstance(job.result, dict) else None
+        path = export_dir() / Path(name).name if name else None
+        if job.status != 'succeeded' or path is None or not path.is_file():
+            return Response({'error': 'This job has no file to download'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
@@ -0,0 +1,50 @@
+from apps.core.utils.admission import AdmissionThrottle, release as release_admission
+
+
+class SparseFieldsetMixin:
+    """Push a ``?fields=`` / ``?exclude=`` selection down into the queryset:
+    unselected columns are deferred and unneeded joins dropped. Requires a
+    serializer using SparseFieldsetSerializerMixin."""
+
+    def filter_queryset(self, queryset):
+        return self.sparse_queryset(super().filter_queryset(queryset))
+
+    def sparse_requested(self):
+        params = self.request.query_params
+        if 'fields' not in params and 'exclude' not in params:
+            return False
+        return getattr(self.get_serializer(), 'sparse', False)
+
+    def sparse_queryset(self, queryset):
+        if not self.sparse_requested():
+            return queryset
+        serializer = self.get_serializer()
+        paths = serializer.sparse_paths()
+        if paths is None:
+            return queryset
+
+        relations = set()
+        for path in paths:
+            parts = path.split('__')[:-1]
+            relations.update('__'.join(parts[:i]) for i in range(1, len(parts) + 1))
+        queryset = queryset.select_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*(paths | relations))
+
+
+class AdmissionControlMixin:
+    """Run write requests through AdmissionThrottle for the view's
+    ``admission_scope`` and release the slot once the response is built,
+    whether the view succeeded or raised."""
+
+    admission_scope = 'default'
+
+    def get_throttles(self):
+        return [*super().get_throttles(), AdmissionThrottle()]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        try:
+            return super().finalize_response(request, response, *args, **kwargs)
+        finally:
+            release_admission(request)
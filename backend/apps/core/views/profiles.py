@@ -0,0 +1,35 @@
+from django.http import FileResponse
+from drf_spectacular.utils import extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from apps.core.utils import profiling
+
+
+@extend_schema(exclude=True)
+class ProfileViewSet(viewsets.ViewSet):
+    """Staff access to request profiles stored by ProfilingMiddleware."""
+    permission_classes = [IsAdminUser]
+    lookup_value_regex = r'[^/]+'
+
+    def list(self, request):
+        return Response([
+            {'name': path.name, 'size': path.stat().st_size}
+            for path in profiling.list_profiles()
+        ])
+
+    def retrieve(self, request, pk=None):
+        path = profiling.get_profile(pk)
+        if path is None:
+            return Response({'error': 'Profile not found'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(path.open('rb'), content_type='text/plain; charset=utf-8')
+
+    @action(detail=False, methods=['post'])
+    def token(self, request):
+        route = request.data.get('route') or None
+        return Response({
+            'token': profiling.mint_token(request.user, route=route),
+            'header': 'X-Profile-Token',
+            'expires_in': profiling.config()['TOKEN_MAX_AGE'],
+        }, status=status.HTTP_201_CREATED)
@@ -0,0 +1,36 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from apps.core.utils import schema_cache
+from apps.core.utils.responses import etag_matches
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """SpectacularAPIView served from the per-code-version schema cache.
+
+    Requests that change the generated output (``?lang=``, ``?version=``)
+    still go through drf-spectacular.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if request.GET.get('lang') or request.GET.get('version') or request.version:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        entry = schema_cache.get(renderer.format)
+        gzipped = 'gzip' in request.headers.get('Accept-Encoding', '')
+        # Either tag names the current schema, whichever encoding it was
+        # cached in.
+        if etag_matches(request, entry.etag, entry.gzip_etag):
+            response = HttpResponseNotModified()
+        elif gzipped:
+            response = HttpResponse(entry.gzipped, content_type=renderer.media_type)
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(entry.body, content_type=renderer.media_type)
+        response['ETag'] = entry.gzip_etag if gzipped else entry.etag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+        return response
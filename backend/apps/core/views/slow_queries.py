@@ -0,0 +1,30 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from apps.core.utils import slow_queries
+
+
+@extend_schema(exclude=True)
+class SlowQueryViewSet(viewsets.ViewSet):
+    """Staff view of this worker's slow query buffer."""
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        results = slow_queries.entries()
+        return Response({
+            'threshold_ms': slow_queries.config()['THRESHOLD_MS'],
+            'count': len(results),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['post'])
+    def dump(self, request):
+        path = slow_queries.dump()
+        return Response({'path': str(path)}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def clear(self, request):
+        slow_queries.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,143 @@
+import hashlib
+import uuid
+from decimal import Decimal
+from itertools import count
+from time import perf_counter
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.core.utils import sharding
+from apps.core.utils.benchmark import benchmark, latency_summary, render_timings, run_threads, time_calls
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.serializers.transaction import TransactionSerializer
+from apps.transactions.services.transaction_service import TransactionService
+from apps.users.benchmarks import create_users
+from apps.users.models.user import CustomUser
+
+HISTORY_SIZES = (100, 1000, 10000)
+
+
+@benchmark('transactions.create_single_thread')
+def create_single_thread(scale):
+    sender, receiver = create_users(2, prefix='txn-single')
+    count = max(50, int(1000 * scale))
+    start = perf_counter()
+    for _ in range(count):
+        TransactionService.create_transaction(sender, receiver, Decimal('1.00'), 'transfer')
+    return {'ops_per_sec': count / (perf_counter() - start)}
+
+
+@benchmark('transactions.create_multi_thread')
+def create_multi_thread(scale):
+    thread_count = 8
+    per_thread = max(10, int(200 * scale))
+    users = create_users(thread_count * 2, prefix='txn-multi')
+    ids = [user.id for user in users]
+
+    def worker(index):
+        # Each thread moves money between its own pair of accounts so the
+        # measurement reflects engine throughput, not a single hot row.
+        sender = CustomUser.objects.get(id=ids[2 * index])
+        receiver = CustomUser.objects.get(id=ids[2 * index + 1])
+        for _ in range(per_thread):
+            TransactionService.create_transaction(sender, receiver, Decimal('1.00'), 'transfer')
+
+    elapsed = run_threads(worker, thread_count)
+    return {'ops_per_sec': thread_count * per_thread / elapsed}
+
+
+@benchmark('transactions.list_latency')
+def list_latency(scale):
+    metrics = {}
+    for nominal in HISTORY_SIZES:
+        size = max(10, int(nominal * scale))
+        owner, *others = create_users(11, prefix=f'txn-list-{nominal}-')
+        Transaction.objects.bulk_create(
+            [_transfer(owner, others[i % len(others)]) for i in range(size)],
+            batch_size=2000,
+        )
+        client = APIClient()
+        client.force_authenticate(user=owner)
+
+        def fetch():
+            assert client.get('/api/transactions/').status_code == 200
+
+        metrics.update(latency_summary(time_calls(fetch, 30), prefix=f'history_{nominal}_'))
+    return metrics
+
+
+@benchmark('transactions.serialize_page')
+def serialize_page(scale):
+    owner, *others = create_users(11, prefix='txn-page')
+    Transaction.objects.bulk_create([_transfer(owner, others[i % len(others)]) for i in range(100)])
+    page = list(Transaction.objects.select_related('from_user', 'to_user')[:100])
+    return render_timings(lambda: TransactionSerializer(page, many=True).data, max(20, int(200 * scale)))
+
+
+@benchmark('transactions.shard_scaling')
+def shard_scaling(scale):
+    """Transfer throughput of a fixed set of threads with their accounts
+    spread over 1, 2, ... of the configured databases. Locally those are
+    the SQLite files development.py declares as shards."""
+    aliases = list(settings.DATABASES)
+    thread_count = 6
+    per_thread = max(10, int(200 * scale))
+    metrics = {}
+    for shard_count in range(1, len(aliases) + 1):
+        shards = aliases[:shard_count]
+        with override_settings(SHARDING={**settings.SHARDING, 'SHARDS': shards}):
+            for alias in shards:
+                sharding.prepare(alias)
+            # Each thread's pair shares a shard, so every transfer is local.
+            pairs = [
+                _users_on(shards[i % shard_count], 2, prefix=f'txn-shards-{shard_count}-{i}-')
+                for i in range(thread_count)
+            ]
+
+            def worker(index):
+                sender, receiver = pairs[index]
+                for _ in range(per_thread):
+                    TransactionService.create_transaction(sender, receiver, Decimal('1.00'), 'transfer')
+
+            elapsed = run_threads(worker, thread_count)
+        metrics[f'shards_{shard_count}_ops_per_sec'] = thread_count * per_thread / elapsed
+    return metrics
+
+
+_recipient_ids = (str(1000000000 + n) for n in count(500000))
+
+
+def _users_on(alias, number, prefix):
+    """Bulk-create ``number`` users whose recipient ids hash to ``alias``."""
+    password = make_password('benchmark-password')
+    recipient_ids = [next(r for r in _recipient_ids if sharding.shard_for(r) == alias) for _ in range(number)]
+    users = [
+        CustomUser(
+            email=f'{prefix}{i}@example.com',
+            username=f'{prefix}{i}@example.com',
+            password=password,
+            recipient_id=recipient_id,
+            balance=Decimal('1000000.00'),
+        )
+        for i, recipient_id in enumerate(recipient_ids)
+    ]
+    CustomUser.objects.db_manager(alias).bulk_create(users)
+    return list(CustomUser.objects.using(alias).filter(email__startswith=prefix).order_by('id'))
+
+
+def _transfer(sender, receiver):
+    reference_id = str(uuid.uuid4())
+    return Transaction(
+        from_user=sender,
+        from_recipient_id=sender.recipient_id,
+        to_user=receiver,
+        to_recipient_id=receiver.recipient_id,
+        amount=Decimal('1.00'),
+        transaction_type='transfer',
+        status='completed',
+        completed_at=timezone.now(),
+        reference_id=reference_id,
+        transaction_hash=hashlib.sha256(reference_id.encode()).hexdigest(),
+    )
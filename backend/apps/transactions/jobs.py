@@ -0,0 +1,96 @@
+import csv
+from datetime import timedelta
+from itertools import count
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+from apps.core.services.job_service import export_dir
+from apps.core.utils import sharding
+from apps.core.utils.jobs import job
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.balance_history_service import BalanceHistoryService
+from apps.transactions.services.reconciliation_service import ReconciliationService
+from apps.transactions.services.transaction_service import TransactionService
+
+EXPORT_COLUMNS = [
+    'id', 'created_at', 'transaction_type', 'status', 'amount',
+    'from_recipient_id', 'to_recipient_id', 'reference_id', 'description',
+]
+
+
+@job('transactions.export_history')
+def export_history(context, user_id=None, date_from=None, date_to=None, chunk_size=5000):
+    """Write transactions (optionally one user's, within a date range) to a
+    CSV file and return its name for download. Without ``user_id`` every
+    shard is exported, one after the other (ids are allocated in shard
+    order)."""
+    aliases = [sharding.shard_for_id(user_id)] if user_id is not None else sharding.shards()
+    querysets = []
+    for alias in aliases:
+        queryset = Transaction.objects.using(alias)
+        if user_id is not None:
+            queryset = queryset.filter(Q(from_user_id=user_id) | Q(to_user_id=user_id))
+        if date_from:
+            queryset = queryset.filter(created_at__date__gte=parse_date(date_from))
+        if date_to:
+            queryset = queryset.filter(created_at__date__lte=parse_date(date_to))
+        querysets.append(queryset)
+
+    directory = export_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'transactions-{context.job.pk}.csv'
+    context.progress(0, sum(queryset.count() for queryset in querysets), 'Exporting transactions', force=True)
+
+    written = 0
+    with open(directory / name, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(EXPORT_COLUMNS)
+        for queryset in querysets:
+            last_id = 0
+            while True:
+                rows = list(queryset.filter(id__gt=last_id).order_by('id').values_list(*EXPORT_COLUMNS)[:chunk_size])
+                if not rows:
+                    break
+                writer.writerows(rows)
+                written += len(rows)
+                last_id = rows[-1][0]
+                context.progress(written)
+    return {'file': name, 'rows': written}
+
+
+@job('transactions.reconcile_balances')
+def reconcile_balances(context, incremental=False, workers=1, partition_size=100000, settle_seconds=30):
+    """Balance reconciliation as a job; the report keeps the first 1000
+    discrepancies."""
+    report = ReconciliationService.reconcile(
+        partition_size=partition_size,
+        workers=workers,
+        incremental=incremental,
+        settle_seconds=settle_seconds,
+        on_partition=lambda done, total: context.progress(done, total),
+    )
+    report['discrepancy_count'] = len(report['discrepancies'])
+    report['discrepancies'] = report['discrepancies'][:1000]
+    return report
+
+
+@job('transactions.create_balance_checkpoints')
+def create_balance_checkpoints(context, backfill=False, interval_hours=24, settle_seconds=None):
+    if backfill:
+        steps = count(1)
+        written = BalanceHistoryService.backfill(
+            interval=timedelta(hours=interval_hours),
+            settle_seconds=settle_seconds,
+            on_checkpoint=lambda moment: context.progress(next(steps), message=f'Checkpointed {moment.isoformat()}'),
+        )
+    else:
+        written = BalanceHistoryService.create_checkpoints(settle_seconds=settle_seconds)
+    return {'checkpoints': written}
+
+
+@job('transactions.expire_holds')
+def expire_holds(context, batch_size=500):
+    voided = TransactionService.expire_holds(
+        batch_size=batch_size,
+        on_batch=lambda done: context.progress(done, message=f'Voided {done} holds'),
+    )
+    return {'voided': voided}
@@ -0,0 +1,21 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.transactions.services.balance_history_service import BalanceHistoryService
+
+class Command(BaseCommand):
+    help = "Checkpoint account balances for point-in-time balance lookups (run periodically, e.g. daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', action='store_true',
+                            help="Also checkpoint every --interval-hours since the newest checkpoint or first transaction")
+        parser.add_argument('--interval-hours', type=float, default=24)
+        parser.add_argument('--settle-seconds', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            written = BalanceHistoryService.backfill(
+                interval=timedelta(hours=options['interval_hours']), settle_seconds=options['settle_seconds'],
+            )
+        else:
+            written = BalanceHistoryService.create_checkpoints(settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} balance checkpoints"))
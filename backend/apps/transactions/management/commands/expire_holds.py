@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.transactions.services.transaction_service import TransactionService
+
+class Command(BaseCommand):
+    help = "Void transfer holds past their expiry and return the funds to the senders (run every minute or so)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        voided = TransactionService.expire_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Voided {voided} expired holds"))
@@ -0,0 +1,41 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.transactions.services.reconciliation_service import ReconciliationService
+
+class Command(BaseCommand):
+    help = "Check stored balances against OPENING_BALANCE plus the net of completed transactions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help="Processes checking partitions in parallel")
+        parser.add_argument('--partition-size', type=int, default=100000, help="User ids per partition")
+        parser.add_argument('--incremental', action='store_true',
+                            help="Only accounts touched by transactions since the last clean incremental run")
+        parser.add_argument('--settle-seconds', type=int, default=30)
+        parser.add_argument('--output', help="Write the full report as JSON to this file")
+        parser.add_argument('--fail-on-discrepancy', action='store_true', help="Exit with an error if any account is off")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = ReconciliationService.reconcile(
+            partition_size=options['partition_size'],
+            workers=options['workers'],
+            incremental=options['incremental'],
+            settle_seconds=options['settle_seconds'],
+        )
+        elapsed = time.perf_counter() - started
+
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(report, handle, indent=2)
+        for entry in report['discrepancies'][:50]:
+            self.stdout.write(
+                f"user {entry['user_id']}: stored {entry['stored']}, expected {entry['expected']} ({entry['difference']})"
+            )
+        summary = (
+            f"Checked {report['checked']} accounts in {report['partitions']} partitions "
+            f"({report['mode']}) in {elapsed:.1f}s: {len(report['discrepancies'])} discrepancies"
+        )
+        if report['discrepancies'] and options['fail_on_discrepancy']:
+            raise CommandError(summary)
+        self.stdout.write(self.style.SUCCESS(summary) if not report['discrepancies'] else self.style.WARNING(summary))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0003_remove_transaction_from_account_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["from_recipient_id"], name="transaction_from_re_8672bf_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["to_recipient_id"], name="transaction_to_reci_21ea2a_idx"
+            ),
+        ),
+    ]
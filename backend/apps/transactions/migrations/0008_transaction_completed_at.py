@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:01
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Existing rows have no better record of when they completed.
+    Transaction = apps.get_model("transactions", "Transaction")
+    Transaction.objects.using(schema_editor.connection.alias).filter(
+        status="completed"
+    ).update(completed_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("transactions", "0007_transaction_to_user_nullable"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_to_user_8cc3dd_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="transaction",
+            name="transaction_from_us_77bc68_idx",
+        ),
+        migrations.AddField(
+            model_name="transaction",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["to_user", "completed_at"], name="transaction_to_user_f90ecf_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["from_user", "completed_at"],
+                name="transaction_from_us_d4c173_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,7 @@
+from .balance_checkpoint import BalanceCheckpoint
 from .transaction import Transaction
 
 __all__ = [
+	"BalanceCheckpoint",
 	"Transaction",
 ]
@@ -0,0 +1,24 @@
+from django.db import models
+from apps.users.models.user import CustomUser
+
+class BalanceCheckpoint(models.Model):
+    """An account's ledger balance at ``as_of``: the opening balance plus
+    every transaction completed at or before that moment.
+
+    A balance at any time is the nearest earlier checkpoint plus the
+    account's transactions after it, so lookups never replay the full
+    history.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='balance_checkpoints')
+    as_of = models.DateTimeField()
+    balance = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['user', '-as_of']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'as_of'], name='unique_balance_checkpoint'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.as_of}: {self.balance}"
@@ -9,6 +9,7 @@ class Transaction(AuditableModel):
         ('pending', 'Pending'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('voided', 'Voided'),
     ]
 
     TRANSACTION_TYPES = [
@@ -26,10 +27,14 @@ class Transaction(AuditableModel):
     )
     from_recipient_id = models.CharField(max_length=10, blank=True, default='')
     
+    # Empty on the sender's leg of a transfer to an account on another
+    # shard; the recipient is then only known by to_recipient_id.
     to_user = models.ForeignKey(
         CustomUser, 
         on_delete=models.PROTECT, 
-        related_name='received_transactions'
+        related_name='received_transactions',
+        null=True,
+        blank=True
     )
     to_recipient_id = models.CharField(max_length=10, default='0000000000')
     
@@ -43,9 +48,24 @@ class Transaction(AuditableModel):
     description = models.TextField(blank=True)
     transaction_hash = models.CharField(max_length=64, unique=True, editable=False)
     reference_id = models.CharField(max_length=50, unique=True)
+    # Set while a pending transfer holds the sender's funds; the hold is
+    # voided by the expiry sweep once this passes.
+    hold_expires_at = models.DateTimeField(null=True, blank=True)
+    # When the funds actually moved; later than created_at for settled
+    # holds and transfers between shards. Point-in-time balances count a
+    # transaction from this moment.
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['from_recipient_id']),
+            models.Index(fields=['to_recipient_id']),
+            # Bounded per-account time range scans for point-in-time balances
+            models.Index(fields=['to_user', 'completed_at']),
+            models.Index(fields=['from_user', 'completed_at']),
+            models.Index(fields=['status', 'hold_expires_at']),
+        ]
 
     def __str__(self):
         return f"Transaction {self.reference_id}"
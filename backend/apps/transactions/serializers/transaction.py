@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from apps.core.serializers.sparse_fields import SparseFieldsetSerializerMixin
 from apps.transactions.models.transaction import Transaction
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     from_user_name = serializers.SerializerMethodField()
     to_user_name = serializers.SerializerMethodField()
 
@@ -20,9 +21,14 @@ class TransactionSerializer(serializers.ModelSerializer):
             'status', 
             'description', 
             'reference_id', 
+            'hold_expires_at',
             'created_at'
         ]
-        read_only_fields = ['id', 'status', 'reference_id', 'from_recipient_id', 'to_recipient_id', 'created_at']
+        read_only_fields = ['id', 'status', 'reference_id', 'from_recipient_id', 'to_recipient_id', 'hold_expires_at', 'created_at']
+        sparse_dependencies = {
+            'from_user_name': ['from_user__first_name', 'from_user__last_name'],
+            'to_user_name': ['to_user__first_name', 'to_user__last_name'],
+        }
     
     def get_from_user_name(self, obj):
         if obj.from_user:
@@ -30,4 +36,6 @@ class TransactionSerializer(serializers.ModelSerializer):
         return None
     
     def get_to_user_name(self, obj):
-        return f"{obj.to_user.first_name} {obj.to_user.last_name}".strip()
+        if obj.to_user:
+            return f"{obj.to_user.first_name} {obj.to_user.last_name}".strip()
+        return None
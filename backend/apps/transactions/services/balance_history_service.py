@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Max, Min, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+from apps.core.utils import sharding
+from apps.transactions.models.balance_checkpoint import BalanceCheckpoint
+from apps.transactions.models.transaction import Transaction
+
+ZERO = Decimal('0.00')
+CENTS = Decimal('0.01')
+
+
+def _net(user=None, after=None, until=None):
+    """Received minus sent over transactions completed in ``(after,
+    until]``: one total for ``user``, otherwise a dict per account with
+    any such transaction. A settled hold counts from its settlement, not
+    from when it was reserved."""
+    completed = Transaction.objects.filter(status='completed').order_by()
+    if after is not None:
+        completed = completed.filter(completed_at__gt=after)
+    if until is not None:
+        completed = completed.filter(completed_at__lte=until)
+
+    if user is not None:
+        received = completed.filter(to_user=user).aggregate(total=Sum('amount'))['total'] or ZERO
+        sent = completed.filter(from_user=user).aggregate(total=Sum('amount'))['total'] or ZERO
+        return received - sent
+
+    net = {}
+    for field, sign in (('to_user_id', 1), ('from_user_id', -1)):
+        rows = completed.exclude(**{field: None}).values(field).annotate(total=Sum('amount'))
+        for user_id, total in rows.values_list(field, 'total'):
+            net[user_id] = net.get(user_id, ZERO) + sign * total
+    return net
+
+
+class BalanceHistoryService:
+    @staticmethod
+    def balance_at(user, as_of):
+        """The account's ledger balance at ``as_of``: nearest checkpoint at or
+        before it plus the transactions in between (index range scans on
+        (user, completed_at)). Returns (balance, checkpoint or None)."""
+        with sharding.use(sharding.shard_of(user)):
+            checkpoint = (
+                BalanceCheckpoint.objects.filter(user=user, as_of__lte=as_of).order_by('-as_of').first()
+            )
+            base = checkpoint.balance if checkpoint else settings.OPENING_BALANCE
+            after = checkpoint.as_of if checkpoint else None
+            balance = base + _net(user=user, after=after, until=as_of)
+        return balance.quantize(CENTS), checkpoint
+
+    @staticmethod
+    def held_at(user, as_of):
+        """Funds of the account held at ``as_of`` (its ``held_balance``
+        then): holds and transfers to other shards reserved by then and
+        settled, voided or failed only after it. The ledger balance still
+        includes them; the available balance is the difference."""
+        with sharding.use(sharding.shard_of(user)):
+            held = Transaction.objects.filter(from_user=user, created_at__lte=as_of).filter(
+                Q(status='pending')
+                | Q(status='completed', completed_at__gt=as_of)
+                | Q(status__in=['voided', 'failed'], updated_at__gt=as_of)
+            ).aggregate(total=Sum('amount'))['total']
+        return (held or ZERO).quantize(CENTS)
+
+    @staticmethod
+    def create_checkpoints(as_of=None, settle_seconds=None, batch_size=5000):
+        """Checkpoint every account, on every shard, with transactions since
+        the previous run.
+
+        ``as_of`` defaults to ``settle_seconds`` ago, because a transaction
+        completed just before it may still be uncommitted. Accounts without
+        new activity keep their previous checkpoint, which stays exact.
+        Returns the number of checkpoints written.
+        """
+        if as_of is None:
+            if settle_seconds is None:
+                settle_seconds = getattr(settings, 'BALANCE_CHECKPOINT_SETTLE_SECONDS', 60)
+            as_of = timezone.now() - timedelta(seconds=settle_seconds)
+        written = 0
+        for alias in sharding.shards():
+            with sharding.use(alias):
+                written += _checkpoint_shard(alias, as_of, batch_size)
+        return written
+
+    @staticmethod
+    def backfill(interval=timedelta(days=1), settle_seconds=None, on_checkpoint=None):
+        """Checkpoint at every ``interval`` from the newest checkpoint (or the
+        first transaction) up to now, so old lookups are bounded too.
+        Returns the number of checkpoints written."""
+        if settle_seconds is None:
+            settle_seconds = getattr(settings, 'BALANCE_CHECKPOINT_SETTLE_SECONDS', 60)
+        cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+        starts = []
+        for alias in sharding.shards():
+            with sharding.use(alias):
+                starts.append(
+                    BalanceCheckpoint.objects.aggregate(latest=Max('as_of'))['latest']
+                    or Transaction.objects.aggregate(first=Min('completed_at'))['first']
+                )
+        starts = [start for start in starts if start is not None]
+        if not starts:
+            return 0
+        # Shards already checkpointed past a moment skip it.
+        written = 0
+        moment = min(starts) + interval
+        while moment < cutoff:
+            written += BalanceHistoryService.create_checkpoints(as_of=moment)
+            if on_checkpoint is not None:
+                on_checkpoint(moment)
+            moment += interval
+        return written + BalanceHistoryService.create_checkpoints(as_of=cutoff)
+
+
+def _checkpoint_shard(alias, as_of, batch_size):
+    """Checkpoint the accounts on the current shard ``alias`` that changed
+    since its newest checkpoint."""
+    previous = BalanceCheckpoint.objects.aggregate(latest=Max('as_of'))['latest']
+    if previous is not None and previous >= as_of:
+        return 0
+
+    changes = _net(after=previous, until=as_of)
+    user_ids = sorted(changes)
+    newest = BalanceCheckpoint.objects.filter(user_id=OuterRef('user_id')).order_by('-as_of').values('as_of')[:1]
+    # All or nothing: the next run starts from the newest checkpoint, so
+    # a partial run would lose the changes of the accounts it missed.
+    with db_transaction.atomic(using=alias):
+        for start in range(0, len(user_ids), batch_size):
+            chunk = user_ids[start:start + batch_size]
+            latest = dict(
+                BalanceCheckpoint.objects.filter(user_id__in=chunk, as_of=Subquery(newest))
+                .values_list('user_id', 'balance')
+            )
+            BalanceCheckpoint.objects.bulk_create([
+                BalanceCheckpoint(
+                    user_id=user_id,
+                    as_of=as_of,
+                    balance=(latest.get(user_id, settings.OPENING_BALANCE) + changes[user_id]).quantize(CENTS),
+                )
+                for user_id in chunk
+            ])
+    return len(user_ids)
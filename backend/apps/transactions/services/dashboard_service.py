@@ -0,0 +1,59 @@
+import hashlib
+from datetime import datetime, time
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from apps.audit.services.audit_service import RENDER_COLUMNS, AuditService
+from apps.core.utils import sharding
+from apps.transactions.models.transaction import Transaction
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+class DashboardService:
+    @staticmethod
+    def summary(user, limit=DEFAULT_LIMIT):
+        """Everything the dashboard shows in three queries: recent
+        transactions, recent audit rows (RENDER_COLUMNS) and the
+        month-to-date totals. Balance comes from ``user`` itself."""
+        involved = Q(from_user=user) | Q(to_user=user)
+        ledger = Transaction.objects.using(sharding.shard_of(user))
+        transactions = list(
+            ledger.filter(involved).select_related('from_user', 'to_user')[:limit]
+        )
+        activity = list(
+            AuditService.get_audit_logs(user=user).values_list(*RENDER_COLUMNS)[:limit]
+        )
+
+        now = timezone.localtime()
+        month_start = timezone.make_aware(datetime.combine(now.date().replace(day=1), time.min))
+        # By when the funds moved, as point-in-time balances count them: a
+        # hold reserved last month and settled this month is this month's.
+        totals = ledger.filter(
+            involved, status='completed', completed_at__gte=month_start
+        ).aggregate(
+            sent=Sum('amount', filter=Q(from_user=user)),
+            received=Sum('amount', filter=Q(to_user=user)),
+            count=Count('id'),
+        )
+        return {
+            'transactions': transactions,
+            'activity': activity,
+            'month_start': month_start,
+            'totals': totals,
+        }
+
+    @staticmethod
+    def etag(user, summary, limit):
+        """Validator derived from the rows the response is built from, so a
+        304 can be answered before anything is serialized."""
+        state = (
+            user.pk,
+            str(user.balance),
+            limit,
+            [(t.pk, t.status, t.updated_at.isoformat()) for t in summary['transactions']],
+            [(pk, *related) for pk, _, *related in summary['activity']],
+            summary['month_start'].isoformat(),
+            sorted((key, str(value)) for key, value in summary['totals'].items()),
+        )
+        return '"{}"'.format(hashlib.sha256(repr(state).encode()).hexdigest()[:32])
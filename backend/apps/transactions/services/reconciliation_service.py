@@ -0,0 +1,198 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction as db_transaction
+from django.db.models import Max, Min, Q, Sum
+from django.utils import timezone
+from apps.core.models.watermark import Watermark
+from apps.core.utils import sharding
+from apps.core.utils.db_pool import close_pools
+from apps.transactions.models.transaction import Transaction
+from apps.users.models.user import CustomUser
+
+WATERMARK_NAME = 'balance_reconciliation'
+ZERO = Decimal('0.00')
+CENTS = Decimal('0.01')
+MAX_ID_LIST = 5000
+
+
+def opening_balance():
+    return settings.OPENING_BALANCE
+
+
+@contextmanager
+def _snapshot():
+    """Read a partition's queries from one snapshot so transfers committing
+    meanwhile cannot show up as discrepancies. SQLite read transactions
+    are snapshots already; PostgreSQL needs REPEATABLE READ, which can
+    only be set at the start of an outermost transaction."""
+    connection = connections[sharding.db()]
+    outermost = not connection.in_atomic_block
+    with db_transaction.atomic(using=connection.alias):
+        if connection.vendor == 'postgresql' and outermost:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        yield
+
+
+class ReconciliationService:
+    @staticmethod
+    def check(low=None, high=None, ids=None, opening=None):
+        """Compare stored balances of the accounts with ids in ``low..high``
+        (or in ``ids``) with opening balance + received - sent over
+        completed transactions. Funds held by pending transfers still
+        belong to the sender, so the stored side is balance + held_balance.
+
+        One aggregate query per side. Returns (accounts checked, list of
+        discrepancies as dicts).
+        """
+        opening = opening_balance() if opening is None else opening
+        if ids is not None:
+            users = CustomUser.objects.filter(id__in=ids)
+            to_side, from_side = {'to_user_id__in': ids}, {'from_user_id__in': ids}
+        else:
+            users = CustomUser.objects.filter(id__gte=low, id__lte=high)
+            to_side = {'to_user_id__gte': low, 'to_user_id__lte': high}
+            from_side = {'from_user_id__gte': low, 'from_user_id__lte': high}
+        completed = Transaction.objects.filter(status='completed').order_by()
+
+        with _snapshot():
+            balances = [
+                (user_id, balance + held)
+                for user_id, balance, held in users.order_by().values_list('id', 'balance', 'held_balance')
+            ]
+            if not balances:
+                return 0, []
+            received = dict(
+                completed.filter(**to_side).values('to_user_id')
+                .annotate(total=Sum('amount')).values_list('to_user_id', 'total')
+            )
+            sent = dict(
+                completed.filter(**from_side).values('from_user_id')
+                .annotate(total=Sum('amount')).values_list('from_user_id', 'total')
+            )
+
+        discrepancies = []
+        for user_id, stored in balances:
+            expected = (opening + received.get(user_id, ZERO) - sent.get(user_id, ZERO)).quantize(CENTS)
+            if stored != expected:
+                discrepancies.append({
+                    'user_id': user_id,
+                    'stored': str(stored),
+                    'expected': str(expected),
+                    'difference': str(stored - expected),
+                })
+        return len(balances), discrepancies
+
+    @staticmethod
+    def partitions(partition_size, user_ids=None):
+        """Id ranges ``(low, high)`` covering every account, or chunks of an
+        explicit id list for incremental runs (at most MAX_ID_LIST ids, to
+        keep the IN lists within database parameter limits)."""
+        if user_ids is not None:
+            ordered = sorted(user_ids)
+            size = min(partition_size, MAX_ID_LIST)
+            return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+        bounds = CustomUser.objects.aggregate(low=Min('id'), high=Max('id'))
+        if bounds['low'] is None:
+            return []
+        return [
+            (low, min(low + partition_size - 1, bounds['high']))
+            for low in range(bounds['low'], bounds['high'] + 1, partition_size)
+        ]
+
+    @staticmethod
+    def touched_since(position, settle_seconds=30):
+        """Accounts on either side of transactions newer than ``position``,
+        and the position the watermark may move to.
+
+        Like the audit rollup, the watermark stops short of transactions
+        younger than ``settle_seconds``: ids are allocated before commit,
+        so a lower id can still appear behind a higher one. It also stops
+        below the oldest pending transaction, which completes later (a
+        settled hold, a transfer between shards) without adding a row.
+        """
+        rows = Transaction.objects.filter(id__gt=position).order_by()
+        touched = set(rows.exclude(to_user_id=None).values_list('to_user_id', flat=True).distinct())
+        touched.update(rows.exclude(from_user_id=None).values_list('from_user_id', flat=True).distinct())
+        cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+        bounds = rows.aggregate(
+            upper=Max('id', filter=Q(created_at__lte=cutoff)),
+            pending=Min('id', filter=Q(status='pending')),
+        )
+        upper = bounds['upper'] or position
+        if bounds['pending'] is not None:
+            upper = min(upper, bounds['pending'] - 1)
+        return touched, upper
+
+    @staticmethod
+    def reconcile(partition_size=100000, workers=1, incremental=False, settle_seconds=30, on_partition=None):
+        """Check every account on every shard (or, incrementally, only
+        accounts touched by transactions since the last run) and return a
+        summary.
+
+        Partitions run in a process pool when ``workers`` > 1. Incremental
+        runs cannot see balances edited without a transaction; run a full
+        check for that. Each shard keeps its own watermark.
+        """
+        uppers = {}
+        parts = []
+        for alias in sharding.shards():
+            with sharding.use(alias):
+                user_ids = None
+                if incremental:
+                    with db_transaction.atomic(using=alias):
+                        position = Watermark.acquire(WATERMARK_NAME).position
+                    user_ids, uppers[alias] = ReconciliationService.touched_since(position, settle_seconds)
+                parts.extend((alias, part) for part in ReconciliationService.partitions(partition_size, user_ids))
+
+        checked = 0
+        discrepancies = []
+        off = set()
+        if workers > 1 and len(parts) > 1:
+            # Children must not inherit this process's database sockets
+            # or connection pools.
+            connections.close_all()
+            close_pools()
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+        else:
+            pool = None
+        with pool or nullcontext():
+            results = pool.map(_check_partition, parts) if pool else map(_check_partition, parts)
+            for index, ((alias, _), (count, found)) in enumerate(zip(parts, results), 1):
+                checked += count
+                discrepancies.extend(found)
+                if found:
+                    off.add(alias)
+                if on_partition is not None:
+                    on_partition(index, len(parts))
+
+        for alias, upper in uppers.items():
+            # Leave a shard's watermark alone while anything there is off
+            # so the next incremental run looks at the same accounts again.
+            if alias in off:
+                continue
+            with sharding.use(alias), db_transaction.atomic(using=alias):
+                watermark = Watermark.acquire(WATERMARK_NAME)
+                watermark.position = max(watermark.position, upper)
+                watermark.save()
+        return {
+            'mode': 'incremental' if incremental else 'full',
+            'partitions': len(parts),
+            'checked': checked,
+            'discrepancies': sorted(discrepancies, key=lambda d: d['user_id']),
+        }
+
+
+def _check_partition(task):
+    """Pool entry point for one partition (an id range or id list) of
+    the shard ``alias``."""
+    alias, part = task
+    close_old_connections()
+    with sharding.use(alias):
+        if isinstance(part, tuple):
+            return ReconciliationService.check(low=part[0], high=part[1])
+        return ReconciliationService.check(ids=part)
@@ -0,0 +1,232 @@
+import uuid
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.audit.services.audit_service import AuditService
+from apps.core.exceptions.base import InsufficientBalanceException
+from apps.core.services.outbox_service import OutboxService
+from apps.core.utils import sharding
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.transaction_service import TransactionService
+from apps.users.models.user import CustomUser
+
+# Transfers between accounts on different shards run as a saga of local
+# database transactions chained through each shard's outbox:
+#
+#   1. sender's shard:    funds move to held_balance, a pending leg is
+#                         recorded and ``transfer.credit`` is enqueued
+#   2. recipient's shard: the recipient is credited, a completed leg is
+#                         recorded and ``transfer.credited`` is enqueued
+#                         (``transfer.rejected`` if there is no recipient)
+#   3. sender's shard:    the held funds leave the sender and the leg
+#                         completes, or they are refunded and it fails
+#
+# Both legs share the reference_id. Each step checks the state the
+# previous one left, so redelivered events change nothing.
+
+
+def _full_name(first_name, last_name):
+    return f"{first_name} {last_name}".strip()
+
+
+class ShardTransferService:
+    @staticmethod
+    def begin(from_user, to_user, amount, description=""):
+        """Step 1. Returns the sender's pending leg; raises
+        InsufficientBalanceException when the balance does not cover it."""
+        using = sharding.shard_of(from_user)
+        with sharding.use(using), db_transaction.atomic(using=using):
+            moved = CustomUser.objects.filter(pk=from_user.pk, balance__gte=amount).update(
+                balance=F('balance') - amount,
+                held_balance=F('held_balance') + amount,
+            )
+            if not moved:
+                raise InsufficientBalanceException("Insufficient balance")
+
+            reference_id = str(uuid.uuid4())
+            txn = Transaction.objects.create(
+                from_user=from_user,
+                from_recipient_id=from_user.recipient_id,
+                to_recipient_id=to_user.recipient_id,
+                amount=amount,
+                transaction_type='transfer',
+                status='pending',
+                description=description,
+                reference_id=reference_id,
+                transaction_hash=TransactionService.generate_hash(reference_id),
+            )
+            AuditService.log_event(
+                event_type='transaction_created',
+                user=from_user,
+                transaction=txn,
+                description=description or f'Sending ₹{amount} to {to_user.recipient_id}',
+                data={
+                    'direction': 'sent',
+                    'amount': str(amount),
+                    'to_recipient_id': to_user.recipient_id,
+                    'reference_id': reference_id,
+                    'status': 'pending',
+                },
+            )
+            OutboxService.enqueue([('transfer.credit', f'user:{from_user.pk}', {
+                'reference_id': reference_id,
+                'amount': str(amount),
+                'description': description,
+                'from_user_id': from_user.pk,
+                'from_recipient_id': from_user.recipient_id,
+                'from_user_name': _full_name(from_user.first_name, from_user.last_name),
+                'to_recipient_id': to_user.recipient_id,
+            })])
+            from_user.refresh_from_db(fields=['balance', 'held_balance'])
+            db_transaction.on_commit(lambda: TransactionService.publish_balance(from_user), using=using, robust=True)
+            return txn
+
+    @staticmethod
+    def credit(payload):
+        """Step 2, on the recipient's shard."""
+        using = sharding.shard_for(payload['to_recipient_id'])
+        amount = Decimal(payload['amount'])
+        with sharding.use(using), db_transaction.atomic(using=using):
+            if Transaction.objects.filter(reference_id=payload['reference_id']).exists():
+                return
+            to_user = CustomUser.objects.filter(recipient_id=payload['to_recipient_id']).first()
+            if to_user is None:
+                OutboxService.enqueue([('transfer.rejected', f"user:{payload['from_user_id']}", {
+                    **payload, 'reason': 'Recipient not found',
+                })])
+                return
+
+            CustomUser.objects.filter(pk=to_user.pk).update(balance=F('balance') + amount)
+            to_user.refresh_from_db(fields=['balance'])
+            leg = Transaction.objects.create(
+                from_recipient_id=payload['from_recipient_id'],
+                to_user=to_user,
+                to_recipient_id=to_user.recipient_id,
+                amount=amount,
+                transaction_type='transfer',
+                status='completed',
+                completed_at=timezone.now(),
+                description=payload['description'],
+                reference_id=payload['reference_id'],
+                transaction_hash=TransactionService.generate_hash(payload['reference_id']),
+            )
+            reply = {
+                **payload,
+                'to_user_id': to_user.pk,
+                'to_user_name': _full_name(to_user.first_name, to_user.last_name),
+            }
+            AuditService.create_payload(leg, ShardTransferService.audit_data(reply))
+            AuditService.log_event(
+                event_type='transaction_completed',
+                user=to_user,
+                transaction=leg,
+                description=leg.description or f"Received ₹{amount} from {payload['from_recipient_id']}",
+                data={'direction': 'received'},
+            )
+            OutboxService.enqueue([
+                TransactionService.outbox_event(leg, to_user, 'received', payload['from_recipient_id']),
+                ('transfer.credited', f'user:{to_user.pk}', reply),
+            ])
+            db_transaction.on_commit(
+                lambda: TransactionService.publish_events(leg, None, to_user, 'transfer'),
+                using=using,
+                robust=True,
+            )
+
+    @staticmethod
+    def complete(payload):
+        """Step 3 after a credit, on the sender's shard."""
+        using = sharding.shard_for(payload['from_recipient_id'])
+        with sharding.use(using), db_transaction.atomic(using=using):
+            now = timezone.now()
+            if not Transaction.objects.filter(reference_id=payload['reference_id'], status='pending').update(
+                status='completed', completed_at=now, updated_at=now,
+            ):
+                return
+            txn = Transaction.objects.get(reference_id=payload['reference_id'])
+            CustomUser.objects.filter(pk=txn.from_user_id).update(held_balance=F('held_balance') - txn.amount)
+            sender = CustomUser.objects.get(pk=txn.from_user_id)
+            AuditService.create_payload(txn, ShardTransferService.audit_data(payload))
+            AuditService.log_event(
+                event_type='transaction_completed',
+                user=sender,
+                transaction=txn,
+                description=txn.description or f'Sent ₹{txn.amount} to {txn.to_recipient_id}',
+                data={'direction': 'sent'},
+            )
+            OutboxService.enqueue([TransactionService.outbox_event(txn, sender, 'sent', txn.to_recipient_id)])
+            db_transaction.on_commit(
+                lambda: TransactionService.publish_events(txn, sender, None, 'transfer'),
+                using=using,
+                robust=True,
+            )
+
+    @staticmethod
+    def compensate(payload):
+        """Step 3 after a rejection: refund the sender, fail the leg."""
+        using = sharding.shard_for(payload['from_recipient_id'])
+        with sharding.use(using), db_transaction.atomic(using=using):
+            if not Transaction.objects.filter(reference_id=payload['reference_id'], status='pending').update(
+                status='failed', updated_at=timezone.now(),
+            ):
+                return
+            txn = Transaction.objects.get(reference_id=payload['reference_id'])
+            CustomUser.objects.filter(pk=txn.from_user_id).update(
+                balance=F('balance') + txn.amount,
+                held_balance=F('held_balance') - txn.amount,
+            )
+            sender = CustomUser.objects.get(pk=txn.from_user_id)
+            AuditService.log_event(
+                event_type='transaction_failed',
+                user=sender,
+                transaction=txn,
+                description=f"Transfer of ₹{txn.amount} to {txn.to_recipient_id} failed: {payload['reason']}",
+                data={
+                    'direction': 'sent',
+                    'amount': str(txn.amount),
+                    'to_recipient_id': txn.to_recipient_id,
+                    'reference_id': txn.reference_id,
+                    'reason': payload['reason'],
+                    'status': 'failed',
+                },
+            )
+            db_transaction.on_commit(lambda: TransactionService.publish_balance(sender), using=using, robust=True)
+
+    @staticmethod
+    def audit_data(payload):
+        """The shared audit payload of either leg (see record_completion)."""
+        return {
+            'transaction_type': 'transfer',
+            'amount': payload['amount'],
+            'from_user_id': payload['from_user_id'],
+            'from_recipient_id': payload['from_recipient_id'],
+            'from_user_name': payload['from_user_name'],
+            'to_user_id': payload['to_user_id'],
+            'to_recipient_id': payload['to_recipient_id'],
+            'to_user_name': payload['to_user_name'],
+            'status': 'success',
+            'reference_id': payload['reference_id'],
+        }
+
+
+STEPS = {
+    'transfer.credit': ShardTransferService.credit,
+    'transfer.credited': ShardTransferService.complete,
+    'transfer.rejected': ShardTransferService.compensate,
+}
+
+
+class ShardTransferSink:
+    """Outbox sink that runs the next saga step for ``transfer.*`` events
+    and ignores every other topic. Configure it next to the other sinks
+    and run one dispatcher per shard."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def deliver(self, messages):
+        for message in messages:
+            step = STEPS.get(message['topic'])
+            if step is not None:
+                step(message['payload'])
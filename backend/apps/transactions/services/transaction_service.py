@@ -1,14 +1,23 @@
 import hashlib
 import uuid
+from datetime import timedelta
 from decimal import Decimal, InvalidOperation
-from django.db import transaction as db_transaction
+from django.conf import settings
+from django.db import connections, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
 from apps.transactions.models.transaction import Transaction
+from apps.transactions.serializers.transaction import TransactionSerializer
 from apps.core.exceptions.base import InsufficientBalanceException, InvalidTransactionException
 from apps.audit.services.audit_service import AuditService
+from apps.core.services.outbox_service import OutboxService
+from apps.core.utils import sharding
+from apps.core.utils.broker import get_broker
+from apps.users.models.user import CustomUser
 
 class TransactionService:
     @staticmethod
-    def create_transaction(from_user, to_user, amount, transaction_type, description=""):
+    def parse_amount(amount):
         try:
             amount = Decimal(str(amount))
         except (InvalidOperation, TypeError):
@@ -16,11 +25,21 @@ class TransactionService:
 
         if amount <= 0:
             raise InvalidTransactionException("Amount must be greater than zero")
+        return amount
+
+    @staticmethod
+    def create_transaction(from_user, to_user, amount, transaction_type, description=""):
+        amount = TransactionService.parse_amount(amount)
         
         if transaction_type == 'transfer' and from_user.balance < amount:
             raise InsufficientBalanceException("Insufficient balance")
 
-        with db_transaction.atomic():
+        using = sharding.shard_of(to_user)
+        if transaction_type == 'transfer' and sharding.shard_of(from_user) != using:
+            from apps.transactions.services.shard_transfer_service import ShardTransferService
+            return ShardTransferService.begin(from_user, to_user, amount, description)
+
+        with sharding.use(using), db_transaction.atomic(using=using):
             reference_id = str(uuid.uuid4())
             
             # Create transaction
@@ -37,62 +56,283 @@ class TransactionService:
                 transaction_hash=TransactionService.generate_hash(reference_id)
             )
 
-            # Update balances
+            # Update balances with conditional UPDATEs: the instances may
+            # predate a hold or settlement, so their columns must not be
+            # written back.
             if transaction_type == 'transfer':
-                from_user.balance -= amount
-                from_user.save()
-
-            to_user.balance += amount
-            to_user.save()
+                if not CustomUser.objects.filter(pk=from_user.pk, balance__gte=amount).update(
+                    balance=F('balance') - amount,
+                ):
+                    raise InsufficientBalanceException("Insufficient balance")
+            CustomUser.objects.filter(pk=to_user.pk).update(balance=F('balance') + amount)
+            if transaction_type == 'transfer':
+                from_user.refresh_from_db(fields=['balance', 'held_balance'])
+            to_user.refresh_from_db(fields=['balance', 'held_balance'])
 
             # Mark transaction as completed
             txn.status = 'completed'
+            txn.completed_at = timezone.now()
             txn.save()
 
-            # Log for sender
+            TransactionService.record_completion(txn, from_user, to_user, transaction_type, description)
+            return txn
+
+    @staticmethod
+    def record_completion(txn, from_user, to_user, transaction_type, description=""):
+        """Audit entries, outbox events and stream notifications for a
+        completed transaction; called inside its database transaction."""
+        amount = txn.amount
+        # Shared transaction details are stored once; each audit entry
+        # only records its direction.
+        AuditService.create_payload(txn, {
+            'transaction_type': transaction_type,
+            'amount': str(amount),
+            'from_user_id': getattr(from_user, 'id', None),
+            'from_recipient_id': getattr(from_user, 'recipient_id', ''),
+            'from_user_name': f"{from_user.first_name} {from_user.last_name}".strip() if from_user else '',
+            'to_user_id': getattr(to_user, 'id', None),
+            'to_recipient_id': to_user.recipient_id,
+            'to_user_name': f"{to_user.first_name} {to_user.last_name}".strip(),
+            'status': 'success',
+            'reference_id': txn.reference_id,
+        })
+
+        # Log for sender
+        AuditService.log_event(
+            event_type='transaction_completed',
+            user=from_user if transaction_type == 'transfer' else to_user,
+            transaction=txn,
+            description=description or f'Sent ₹{amount} to {to_user.recipient_id}',
+            data={'direction': 'sent'},
+        )
+
+        # Log for receiver (if transfer type)
+        if transaction_type == 'transfer':
             AuditService.log_event(
                 event_type='transaction_completed',
-                user=from_user if transaction_type == 'transfer' else to_user,
+                user=to_user,
+                transaction=txn,
+                description=description or f'Received ₹{amount} from {from_user.recipient_id}',
+                data={'direction': 'received'},
+            )
+
+        # Downstream consumers read these instead of the primary tables;
+        # one event per affected account so each stream stays ordered.
+        OutboxService.enqueue(TransactionService.outbox_events(txn, from_user, to_user, transaction_type))
+
+        # Push to open event streams once the rows are visible; a
+        # broker failure must not affect the committed transfer.
+        db_transaction.on_commit(
+            lambda: TransactionService.publish_events(txn, from_user, to_user, transaction_type),
+            using=txn._state.db,
+            robust=True,
+        )
+
+    @staticmethod
+    def reserve_transfer(from_user, to_user, amount, description="", expires_in=None):
+        """Hold ``amount`` of the sender's balance for a transfer that is
+        settled or voided later, e.g. after a fraud check.
+
+        The funds move from ``balance`` to ``held_balance`` in one
+        conditional UPDATE, so no row lock outlives this call. Returns the
+        pending transaction; its hold expires after ``expires_in`` seconds
+        (TRANSFER_HOLD_SECONDS by default). Both accounts must be on the
+        same shard.
+        """
+        amount = TransactionService.parse_amount(amount)
+        if expires_in is None:
+            expires_in = getattr(settings, 'TRANSFER_HOLD_SECONDS', 900)
+        using = sharding.shard_of(from_user)
+        if sharding.shard_of(to_user) != using:
+            raise InvalidTransactionException("Holds are not supported between accounts on different shards")
+
+        with sharding.use(using), db_transaction.atomic(using=using):
+            moved = CustomUser.objects.filter(pk=from_user.pk, balance__gte=amount).update(
+                balance=F('balance') - amount,
+                held_balance=F('held_balance') + amount,
+            )
+            if not moved:
+                raise InsufficientBalanceException("Insufficient balance")
+
+            reference_id = str(uuid.uuid4())
+            txn = Transaction.objects.create(
+                from_user=from_user,
+                from_recipient_id=from_user.recipient_id,
+                to_user=to_user,
+                to_recipient_id=to_user.recipient_id,
+                amount=amount,
+                transaction_type='transfer',
+                status='pending',
+                description=description,
+                reference_id=reference_id,
+                transaction_hash=TransactionService.generate_hash(reference_id),
+                hold_expires_at=timezone.now() + timedelta(seconds=expires_in),
+            )
+            AuditService.log_event(
+                event_type='transaction_created',
+                user=from_user,
                 transaction=txn,
-                description=description or f'Sent ₹{amount} to {to_user.recipient_id}',
+                description=description or f'Held ₹{amount} for {to_user.recipient_id}',
                 data={
-                    'transaction_type': transaction_type,
+                    'direction': 'held',
                     'amount': str(amount),
-                    'from_user_id': getattr(from_user, 'id', None),
-                    'from_recipient_id': getattr(from_user, 'recipient_id', ''),
-                    'from_user_name': f"{from_user.first_name} {from_user.last_name}".strip() if from_user else '',
-                    'to_user_id': getattr(to_user, 'id', None),
                     'to_recipient_id': to_user.recipient_id,
-                    'to_user_name': f"{to_user.first_name} {to_user.last_name}".strip(),
-                    'status': 'success',
-                    'reference_id': txn.reference_id,
-                    'direction': 'sent',
+                    'reference_id': reference_id,
+                    'expires_at': txn.hold_expires_at.isoformat(),
+                    'status': 'pending',
                 },
             )
+            from_user.refresh_from_db(fields=['balance', 'held_balance'])
+            db_transaction.on_commit(lambda: TransactionService.publish_balance(from_user), using=using, robust=True)
+            return txn
 
-            # Log for receiver (if transfer type)
-            if transaction_type == 'transfer':
+    @staticmethod
+    def settle_hold(txn):
+        """Complete a held transfer: the held funds leave the sender and
+        are credited to the recipient.
+
+        Each step is a single conditional UPDATE; raises
+        InvalidTransactionException when the hold was already settled,
+        voided or has expired.
+        """
+        now = timezone.now()
+        using = txn._state.db
+        with sharding.use(using), db_transaction.atomic(using=using):
+            settled = Transaction.objects.filter(pk=txn.pk, status='pending', hold_expires_at__gt=now).update(
+                status='completed', hold_expires_at=None, completed_at=now, updated_at=now,
+            )
+            if not settled:
+                raise InvalidTransactionException("Hold is no longer pending")
+            CustomUser.objects.filter(pk=txn.from_user_id).update(held_balance=F('held_balance') - txn.amount)
+            CustomUser.objects.filter(pk=txn.to_user_id).update(balance=F('balance') + txn.amount)
+
+            txn.refresh_from_db()
+            users = CustomUser.objects.in_bulk([txn.from_user_id, txn.to_user_id])
+            TransactionService.record_completion(
+                txn, users[txn.from_user_id], users[txn.to_user_id], 'transfer', txn.description,
+            )
+            return txn
+
+    @staticmethod
+    def void_hold(txn, reason='voided'):
+        """Release a pending hold back to the sender's balance. Raises
+        InvalidTransactionException when it is no longer pending."""
+        using = txn._state.db
+        with sharding.use(using), db_transaction.atomic(using=using):
+            if not TransactionService._void([txn], reason):
+                raise InvalidTransactionException("Hold is no longer pending")
+        txn.refresh_from_db()
+        return txn
+
+    @staticmethod
+    def expire_holds(batch_size=500, on_batch=None):
+        """Void every hold past its expiry on every shard, ``batch_size``
+        per database transaction. Returns the number of holds voided."""
+        now = timezone.now()
+        voided = 0
+        for using in sharding.shards():
+            pending = (
+                Transaction.objects.using(using)
+                .filter(status='pending', hold_expires_at__lte=now)
+                .select_related('from_user', 'to_user')
+                .order_by('hold_expires_at')
+            )
+            if connections[using].features.has_select_for_update_skip_locked:
+                # Holds being settled right now are left for the next sweep.
+                pending = pending.select_for_update(skip_locked=True, of=('self',))
+            while True:
+                with sharding.use(using), db_transaction.atomic(using=using):
+                    batch = list(pending[:batch_size])
+                    if not batch:
+                        break
+                    voided += TransactionService._void(batch, 'expired')
+                if on_batch is not None:
+                    on_batch(voided)
+        return voided
+
+    @staticmethod
+    def _void(holds, reason):
+        """Flip pending ``holds`` to voided and refund their senders, one
+        UPDATE per hold and one per sender; call on the holds' shard.
+        Returns how many flipped; a hold settled concurrently is skipped,
+        and so is the pending leg of a transfer between shards, which only
+        ShardTransferService may finish."""
+        now = timezone.now()
+        refunds = {}
+        flipped = 0
+        for txn in holds:
+            if Transaction.objects.filter(pk=txn.pk, status='pending', hold_expires_at__isnull=False).update(
+                status='voided', hold_expires_at=None, updated_at=now,
+            ):
+                flipped += 1
+                refunds[txn.from_user_id] = refunds.get(txn.from_user_id, Decimal('0')) + txn.amount
                 AuditService.log_event(
-                    event_type='transaction_completed',
-                    user=to_user,
+                    event_type='transaction_failed',
+                    user=txn.from_user,
                     transaction=txn,
-                    description=description or f'Received ₹{amount} from {from_user.recipient_id}',
+                    description=f'Hold of ₹{txn.amount} for {txn.to_recipient_id} {reason}',
                     data={
-                        'transaction_type': transaction_type,
-                        'amount': str(amount),
-                        'from_user_id': getattr(from_user, 'id', None),
-                        'from_recipient_id': getattr(from_user, 'recipient_id', ''),
-                        'from_user_name': f"{from_user.first_name} {from_user.last_name}".strip() if from_user else '',
-                        'to_user_id': getattr(to_user, 'id', None),
-                        'to_recipient_id': to_user.recipient_id,
-                        'to_user_name': f"{to_user.first_name} {to_user.last_name}".strip(),
-                        'status': 'success',
+                        'direction': 'held',
+                        'amount': str(txn.amount),
+                        'to_recipient_id': txn.to_recipient_id,
                         'reference_id': txn.reference_id,
-                        'direction': 'received',
+                        'reason': reason,
+                        'status': 'voided',
                     },
                 )
+        for user_id, amount in refunds.items():
+            CustomUser.objects.filter(pk=user_id).update(
+                balance=F('balance') + amount,
+                held_balance=F('held_balance') - amount,
+            )
+        senders = CustomUser.objects.in_bulk(list(refunds))
+        db_transaction.on_commit(
+            lambda: [TransactionService.publish_balance(user) for user in senders.values()],
+            using=sharding.db(),
+            robust=True,
+        )
+        return flipped
 
-            return txn
+    @staticmethod
+    def outbox_events(txn, from_user, to_user, transaction_type):
+        if transaction_type == 'transfer':
+            return [
+                TransactionService.outbox_event(txn, from_user, 'sent', to_user.recipient_id),
+                TransactionService.outbox_event(txn, to_user, 'received', from_user.recipient_id),
+            ]
+        return [TransactionService.outbox_event(txn, to_user, 'deposit', None, transaction_type)]
+
+    @staticmethod
+    def outbox_event(txn, user, direction, counterparty_recipient_id, transaction_type='transfer'):
+        return ('transaction.completed', f'user:{user.pk}', {
+            'transaction_id': txn.pk,
+            'reference_id': txn.reference_id,
+            'transaction_type': transaction_type,
+            'direction': direction,
+            'amount': str(txn.amount),
+            'user_id': user.pk,
+            'recipient_id': user.recipient_id,
+            'counterparty_recipient_id': counterparty_recipient_id,
+            'balance': str(user.balance),
+            'created_at': txn.created_at.isoformat(),
+        })
+
+    @staticmethod
+    def publish_events(txn, from_user, to_user, transaction_type):
+        data = TransactionSerializer(txn).data
+        broker = get_broker()
+        parties = [to_user]
+        if transaction_type == 'transfer':
+            parties.insert(0, from_user)
+        # The other leg of a transfer between shards has no local party.
+        for user in filter(None, parties):
+            channel = f'user:{user.pk}'
+            broker.publish(channel, 'transaction', data)
+            broker.publish(channel, 'balance', {'balance': user.balance, 'transaction_id': txn.pk})
+
+    @staticmethod
+    def publish_balance(user):
+        get_broker().publish(f'user:{user.pk}', 'balance', {'balance': user.balance, 'held_balance': user.held_balance})
 
     @staticmethod
     def generate_hash(reference_id):
@@ -0,0 +1,30 @@
+from contextlib import contextmanager
+from apps.core.utils.velocity import get_limiter
+
+
+class VelocityService:
+    @staticmethod
+    def tier(user):
+        """Limit tier of an account; tiers without configured limits fall
+        back to ``default``."""
+        if user.is_staff:
+            return 'staff'
+        return 'verified' if user.is_verified else 'default'
+
+    @staticmethod
+    @contextmanager
+    def reserve(user, amount):
+        """Count a transfer against the sender's velocity limits for the
+        duration of the block, and give it back if the block raises.
+
+        Raises VelocityLimitExceeded before the block runs when the
+        transfer would exceed a limit. No database queries.
+        """
+        limiter = get_limiter()
+        tier = VelocityService.tier(user)
+        token = limiter.hit(user.pk, tier, amount)
+        try:
+            yield
+        except BaseException:
+            limiter.release(user.pk, tier, token)
+            raise
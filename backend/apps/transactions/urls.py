@@ -18,6 +18,9 @@ urlpatterns = [
         TransactionViewSet.as_view({'get': 'retrieve'}),
         name='transactions-clean-detail',
     ),
+    path('hold/', TransactionViewSet.as_view({'post': 'hold'}), name='transactions-clean-hold'),
+    path('<int:pk>/settle/', TransactionViewSet.as_view({'post': 'settle'}), name='transactions-clean-settle'),
+    path('<int:pk>/void/', TransactionViewSet.as_view({'post': 'void'}), name='transactions-clean-void'),
 
     # Backward-compatible router-generated paths:
     # /api/transactions/transactions/ and /api/transactions/transactions/<id>/
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from django.utils.cache import patch_vary_headers
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from apps.audit.services.audit_service import AuditService
+from apps.core.utils import sharding
+from apps.core.utils.responses import FragmentResponse, etag_matches
+from apps.transactions.serializers.transaction import TransactionSerializer
+from apps.transactions.services.dashboard_service import DEFAULT_LIMIT, MAX_LIMIT, DashboardService
+
+CENTS = Decimal('0.01')
+
+
+class DashboardView(APIView):
+    """Balance, recent transactions, recent activity and month-to-date
+    totals for the current user in one response."""
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(parameters=[OpenApiParameter('limit', int)], responses=OpenApiTypes.OBJECT)
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        user = request.user
+        summary = DashboardService.summary(user, limit)
+        etag = DashboardService.etag(user, summary, limit)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            totals = summary['totals']
+            activity = AuditService.rendered_bodies(summary['activity'], using=sharding.shard_of(user))
+            # The stored audit bodies go out as they are, after the rest.
+            response = FragmentResponse(activity, key='recent_activity', envelope={
+                'balance': user.balance,
+                'recipient_id': user.recipient_id,
+                'recent_transactions': TransactionSerializer(summary['transactions'], many=True).data,
+                'month_to_date': {
+                    'since': summary['month_start'],
+                    'sent': (totals['sent'] or Decimal('0')).quantize(CENTS),
+                    'received': (totals['received'] or Decimal('0')).quantize(CENTS),
+                    'count': totals['count'],
+                },
+            })
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        patch_vary_headers(response, ['Accept', 'Authorization'])
+        return response
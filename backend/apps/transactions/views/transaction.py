@@ -1,30 +1,88 @@
 import logging
+import math
 from decimal import Decimal, InvalidOperation
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.conf import settings
 from django.db import models
 from apps.transactions.models.transaction import Transaction
 from apps.transactions.serializers.transaction import TransactionSerializer
 from apps.transactions.services.transaction_service import TransactionService
+from apps.transactions.services.velocity_service import VelocityService
 from apps.users.models.user import CustomUser
-from apps.core.exceptions.base import InsufficientBalanceException, InvalidTransactionException
+from apps.core.exceptions.base import InsufficientBalanceException, InvalidTransactionException, VelocityLimitExceeded
+from apps.core.utils import sharding
+from apps.core.views.mixins import AdmissionControlMixin, SparseFieldsetMixin
 from apps.audit.services.audit_service import AuditService
 
 logger = logging.getLogger(__name__)
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(AdmissionControlMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [IsAuthenticated]
+    # Transfers wait for a slot instead of piling up on row locks.
+    admission_scope = 'transfers'
+
+    def get_permissions(self):
+        # Holds are settled or voided by the service running the external
+        # check, never by the parties themselves.
+        if self.action in ('settle', 'void'):
+            return [IsAdminUser()]
+        return super().get_permissions()
 
     def get_queryset(self):
+        if self.action in ('settle', 'void'):
+            # Transaction ids are allocated per shard, so the id says where
+            # the hold lives.
+            ledger = Transaction.objects.using(sharding.shard_for_id(self.kwargs.get('pk')))
+            return ledger.select_related('from_user', 'to_user')
         user = self.request.user
-        return Transaction.objects.filter(
+        # An account's transactions live on its shard; a transfer between
+        # shards shows up there as the account's own leg.
+        return Transaction.objects.using(sharding.shard_of(user)).filter(
             models.Q(from_user=user) | models.Q(to_user=user)
-        )
+        ).select_related('from_user', 'to_user')
 
     def create(self, request, *args, **kwargs):
+        return self._submit_transfer(request)
+
+    @action(detail=False, methods=['post'])
+    def hold(self, request):
+        """Reserve funds for a transfer that is settled or voided later;
+        ``expires_in`` (seconds) bounds how long the hold may wait."""
+        expires_in = request.data.get('expires_in')
+        if expires_in in (None, ''):
+            expires_in = None
+        else:
+            try:
+                expires_in = int(expires_in)
+            except (TypeError, ValueError):
+                return Response({'error': 'expires_in must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+            if not 0 < expires_in <= settings.TRANSFER_HOLD_MAX_SECONDS:
+                return Response(
+                    {'error': f'expires_in must be between 1 and {settings.TRANSFER_HOLD_MAX_SECONDS} seconds'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        return self._submit_transfer(request, hold=True, expires_in=expires_in)
+
+    @action(detail=True, methods=['post'])
+    def settle(self, request, pk=None):
+        return self._finish_hold(TransactionService.settle_hold)
+
+    @action(detail=True, methods=['post'])
+    def void(self, request, pk=None):
+        return self._finish_hold(TransactionService.void_hold)
+
+    def _finish_hold(self, finish):
+        try:
+            txn = finish(self.get_object())
+        except InvalidTransactionException as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(txn).data)
+
+    def _submit_transfer(self, request, hold=False, expires_in=None):
         try:
             from_user = request.user
             to_recipient_id = request.data.get('to_recipient_id')
@@ -58,7 +116,8 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 )
 
             try:
-                to_user = CustomUser.objects.get(recipient_id=to_recipient_id)
+                recipients = CustomUser.objects.using(sharding.shard_for(to_recipient_id))
+                to_user = recipients.get(recipient_id=to_recipient_id)
             except CustomUser.DoesNotExist:
                 return Response(
                     {'error': 'Recipient not found'}, 
@@ -71,16 +130,32 @@ class TransactionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            txn = TransactionService.create_transaction(
-                from_user=from_user,
-                to_user=to_user,
-                amount=amount,
-                transaction_type='transfer',
-                description=description
-            )
+            # Velocity check: in-memory counters, no queries on this path.
+            with VelocityService.reserve(from_user, amount):
+                if hold:
+                    txn = TransactionService.reserve_transfer(
+                        from_user, to_user, amount, description, expires_in=expires_in,
+                    )
+                else:
+                    txn = TransactionService.create_transaction(
+                        from_user=from_user,
+                        to_user=to_user,
+                        amount=amount,
+                        transaction_type='transfer',
+                        description=description
+                    )
 
             serializer = self.get_serializer(txn)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        except VelocityLimitExceeded as e:
+            retry_after = max(1, math.ceil(e.retry_after))
+            self._log_failure(request, to_recipient_id, raw_amount, e, reason='velocity_limit', window=e.window)
+            response = Response(
+                {'error': str(e), 'retry_after': retry_after},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
         except InsufficientBalanceException as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except InvalidTransactionException as e:
@@ -91,22 +166,26 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 getattr(request.user, 'id', None),
                 to_recipient_id,
             )
-            try:
-                AuditService.log_event(
-                    event_type='transaction_failed',
-                    user=request.user,
-                    description=f"Transaction of ₹{raw_amount} failed: {str(e)}",
-                    data={
-                        'to_recipient_id': to_recipient_id,
-                        'amount': str(raw_amount),
-                        'from_user_id': request.user.id,
-                        'from_recipient_id': request.user.recipient_id,
-                        'from_user_name': f"{request.user.first_name} {request.user.last_name}".strip(),
-                        'error': str(e),
-                        'status': 'failed',
-                    },
-                    request=request,
-                )
-            except Exception:
-                logger.exception("Audit logging for failed transaction also failed")
+            self._log_failure(request, to_recipient_id, raw_amount, e)
             return Response({'error': 'Transaction failed'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def _log_failure(self, request, to_recipient_id, raw_amount, error, **extra):
+        try:
+            AuditService.log_event(
+                event_type='transaction_failed',
+                user=request.user,
+                description=f"Transaction of ₹{raw_amount} failed: {str(error)}",
+                data={
+                    'to_recipient_id': to_recipient_id,
+                    'amount': str(raw_amount),
+                    'from_user_id': request.user.id,
+                    'from_recipient_id': request.user.recipient_id,
+                    'from_user_name': f"{request.user.first_name} {request.user.last_name}".strip(),
+                    'error': str(error),
+                    'status': 'failed',
+                    **extra,
+                },
+                request=request,
+            )
+        except Exception:
+            logger.exception("Audit logging for failed transaction also failed")
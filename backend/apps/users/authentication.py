@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from apps.core.utils import sharding
+
+
+class ShardedJWTAuthentication(JWTAuthentication):
+    """Loads the token's user from the shard its id was allocated on and
+    pins the rest of the request to that shard."""
+
+    def get_user(self, validated_token):
+        alias = sharding.shard_for_id(validated_token.get(api_settings.USER_ID_CLAIM))
+        with sharding.use(alias):
+            user = super().get_user(validated_token)
+        sharding.pin(alias)
+        return user
+
+
+class ShardedModelBackend(ModelBackend):
+    """Email/password login against whichever shard holds the account.
+    The password is only checked on that shard, so a login costs one
+    hash however many shards there are."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if not sharding.enabled():
+            return super().authenticate(request, username, password, **kwargs)
+        field = get_user_model().USERNAME_FIELD
+        if username is None:
+            username = kwargs.get(field)
+        alias = sharding.find(get_user_model(), **{field: username}) or sharding.shards()[0]
+        with sharding.use(alias):
+            return super().authenticate(request, username, password, **kwargs)
+
+    def get_user(self, user_id):
+        with sharding.use(sharding.shard_for_id(user_id)):
+            return super().get_user(user_id)
@@ -0,0 +1,39 @@
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from rest_framework.test import APIClient
+from apps.core.utils.benchmark import benchmark, latency_summary, time_calls
+from apps.users.models.user import CustomUser
+
+
+def create_users(count, balance=Decimal('1000000.00'), prefix='bench'):
+    """Bulk-create users sharing one pre-hashed password."""
+    password = make_password('benchmark-password')
+    start = CustomUser.objects.count()
+    users = [
+        CustomUser(
+            email=f'{prefix}{start + i}@example.com',
+            username=f'{prefix}{start + i}@example.com',
+            password=password,
+            recipient_id=str(1000000000 + start + i),
+            first_name='Bench',
+            last_name=str(start + i),
+            balance=balance,
+        )
+        for i in range(count)
+    ]
+    CustomUser.objects.bulk_create(users, batch_size=1000)
+    return list(CustomUser.objects.filter(email__startswith=prefix).order_by('id'))
+
+
+@benchmark('users.get_recipient')
+def get_recipient(scale):
+    users = create_users(max(100, int(1000 * scale)))
+    client = APIClient()
+    targets = [user.recipient_id for user in users[::max(1, len(users) // 50)]]
+    position = iter(range(10 ** 9))
+
+    def lookup():
+        recipient_id = targets[next(position) % len(targets)]
+        assert client.get(f'/api/users/users/recipient/{recipient_id}/').status_code == 200
+
+    return latency_summary(time_calls(lookup, max(50, int(200 * scale))))
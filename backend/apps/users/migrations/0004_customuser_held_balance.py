@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:26
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_customuser_balance_customuser_recipient_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="held_balance",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                max_digits=15,
+                validators=[django.core.validators.MinValueValidator(Decimal("0.00"))],
+            ),
+        ),
+    ]
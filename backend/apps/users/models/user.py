@@ -1,9 +1,11 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 import random
 from apps.core.models.base import TimeStampedModel
+from apps.core.utils import sharding
 
 class CustomUserManager(BaseUserManager):
     def _generate_recipient_id(self):
@@ -11,7 +13,9 @@ class CustomUserManager(BaseUserManager):
         while True:
             # Generate 10-digit number (1000000000 to 9999999999)
             recipient_id = str(random.randint(1000000000, 9999999999))
-            if not CustomUser.objects.filter(recipient_id=recipient_id).exists():
+            # An id can only collide on the shard it hashes to.
+            shard = sharding.shard_for(recipient_id)
+            if not CustomUser.objects.using(shard).filter(recipient_id=recipient_id).exists():
                 return recipient_id
     
     def create_user(self, email, password=None, **extra_fields):
@@ -24,12 +28,12 @@ class CustomUserManager(BaseUserManager):
         if 'recipient_id' not in extra_fields:
             extra_fields['recipient_id'] = self._generate_recipient_id()
         
-        # Set default balance to 500.00
-        extra_fields.setdefault('balance', Decimal('500.00'))
+        # Every account starts with OPENING_BALANCE (500.00)
+        extra_fields.setdefault('balance', settings.OPENING_BALANCE)
         
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
-        user.save(using=self._db)
+        user.save(using=self._db or sharding.shard_for(user.recipient_id))
         return user
 
     def create_superuser(self, email, password=None, **extra_fields):
@@ -52,7 +56,14 @@ class CustomUser(AbstractUser, TimeStampedModel):
     balance = models.DecimalField(
         max_digits=15, 
         decimal_places=2, 
-        default=Decimal('500.00'),
+        default=settings.OPENING_BALANCE,
+        validators=[MinValueValidator(Decimal('0.00'))]
+    )
+    # Reserved by pending transfer holds; not spendable until voided.
+    held_balance = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        default=Decimal('0.00'),
         validators=[MinValueValidator(Decimal('0.00'))]
     )
     
@@ -1,18 +1,24 @@
 from rest_framework import serializers
+from apps.core.serializers.sparse_fields import SparseFieldsetSerializerMixin
+from apps.core.serializers.timing import TimedSerializerMixin
+from apps.core.utils import sharding
 from apps.users.models.user import CustomUser
 
-class UserSerializer(serializers.ModelSerializer):
+FULL_NAME = ['first_name', 'last_name']
+
+class UserSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
     
     class Meta:
         model = CustomUser
-        fields = ['id', 'email', 'recipient_id', 'first_name', 'last_name', 'full_name', 'phone', 'balance', 'is_verified', 'created_at']
-        read_only_fields = ['id', 'recipient_id', 'balance', 'created_at']
+        fields = ['id', 'email', 'recipient_id', 'first_name', 'last_name', 'full_name', 'phone', 'balance', 'held_balance', 'is_verified', 'created_at']
+        read_only_fields = ['id', 'recipient_id', 'balance', 'held_balance', 'created_at']
+        sparse_dependencies = {'full_name': FULL_NAME}
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
-class RecipientInfoSerializer(serializers.ModelSerializer):
+class RecipientInfoSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for fetching recipient info by recipient_id"""
     full_name = serializers.SerializerMethodField()
     
@@ -20,11 +26,12 @@ class RecipientInfoSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ['recipient_id', 'first_name', 'last_name', 'full_name', 'email']
         read_only_fields = ['recipient_id', 'first_name', 'last_name', 'full_name', 'email']
+        sparse_dependencies = {'full_name': FULL_NAME}
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}".strip()
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
 
@@ -32,6 +39,12 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         model = CustomUser
         fields = ['email', 'password', 'password_confirm', 'first_name', 'last_name']
 
+    def validate_email(self, value):
+        # The unique constraint only covers the shard the account lands on.
+        if sharding.enabled() and sharding.find(CustomUser, email__iexact=value):
+            raise serializers.ValidationError("user with this email already exists.")
+        return value
+
     def validate(self, data):
         if data['password'] != data.pop('password_confirm'):
             raise serializers.ValidationError({"password_confirm": "Passwords do not match"})
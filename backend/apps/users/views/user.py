@@ -1,21 +1,57 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
+from apps.core.utils import sharding
+from apps.core.views.mixins import SparseFieldsetMixin
+from apps.transactions.services.balance_history_service import BalanceHistoryService
 from apps.users.models.user import CustomUser
 from apps.users.serializers.user import UserSerializer, UserRegistrationSerializer, RecipientInfoSerializer
 
-class UserViewSet(viewsets.ModelViewSet):
+AS_OF = OpenApiParameter('as_of', OpenApiTypes.DATETIME, description='ISO datetime, or a date meaning the end of that day')
+
+
+def _parse_as_of(value):
+    # Check for a bare date first: parse_datetime accepts one as midnight.
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is not None:
+        parsed = datetime.combine(day + timedelta(days=1), time.min) - timedelta(microseconds=1)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid as_of: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class UserViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
 
     def get_permissions(self):
         if self.action in ['create', 'get_recipient']:
             permission_classes = [AllowAny]
+        elif self.action == 'balance':
+            permission_classes = [IsAdminUser]
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        # An account is looked up on the shard its id was allocated on.
+        if 'pk' in self.kwargs:
+            return self.queryset.using(sharding.shard_for_id(self.kwargs['pk']))
+        return super().get_queryset()
+
     def get_serializer_class(self):
         if self.action == 'create':
             return UserRegistrationSerializer
@@ -23,17 +59,54 @@ class UserViewSet(viewsets.ModelViewSet):
             return RecipientInfoSerializer
         return UserSerializer
 
+    @extend_schema(parameters=[AS_OF])
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
         serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
+        as_of = request.query_params.get('as_of')
+        if not as_of:
+            return Response(serializer.data)
+        try:
+            moment = _parse_as_of(as_of)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        data = dict(serializer.data, as_of=moment)
+        if 'balance' in data:
+            # ``balance`` excludes held funds, so take them off the ledger.
+            ledger, _ = BalanceHistoryService.balance_at(request.user, moment)
+            data['balance'] = ledger - BalanceHistoryService.held_at(request.user, moment)
+        return Response(data)
+
+    @extend_schema(parameters=[AS_OF], responses=OpenApiTypes.OBJECT)
+    @action(detail=True, methods=['get'])
+    def balance(self, request, pk=None):
+        """Staff: an account's balance at ``as_of`` (default now), from the
+        nearest balance checkpoint plus later transactions. ``balance``
+        excludes funds held then, like ``current_balance``;
+        ``ledger_balance`` includes them."""
+        user = self.get_object()
+        try:
+            moment = _parse_as_of(request.query_params['as_of']) if request.query_params.get('as_of') else timezone.now()
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        ledger, checkpoint = BalanceHistoryService.balance_at(user, moment)
+        return Response({
+            'user_id': user.pk,
+            'recipient_id': user.recipient_id,
+            'as_of': moment,
+            'balance': ledger - BalanceHistoryService.held_at(user, moment),
+            'ledger_balance': ledger,
+            'checkpoint_as_of': checkpoint.as_of if checkpoint else None,
+            'current_balance': user.balance,
+        })
     
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='recipient/(?P<recipient_id>[^/.]+)')
     def get_recipient(self, request, recipient_id=None):
         """Fetch recipient info by recipient_id"""
         try:
-            user = CustomUser.objects.get(recipient_id=recipient_id)
-            serializer = RecipientInfoSerializer(user)
+            queryset = CustomUser.objects.using(sharding.shard_for(recipient_id))
+            user = self.sparse_queryset(queryset).get(recipient_id=recipient_id)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
         except CustomUser.DoesNotExist:
             return Response(
@@ -1,6 +1,8 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
+from decimal import Decimal
 import environ
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -35,6 +37,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.performance.PerformanceMiddleware',
+    'apps.core.middleware.query_budget.QueryBudgetMiddleware',
+    'apps.core.middleware.profiling.ProfilingMiddleware',
+    'apps.core.middleware.sharding.ShardMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -64,17 +70,55 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Connection reuse. With psycopg 3 and psycopg_pool installed, each
+# worker process keeps a pool of at most DB_POOL_MAX_SIZE connections
+# shared by its threads: a request checks one out on its first query and
+# returns it when it finishes. Without the pool, each thread keeps its
+# connection for DB_CONN_MAX_AGE seconds (use 0 under ASGI). Connections
+# are health-checked before reuse either way. Size the pool to the
+# worker's threads and keep workers * DB_POOL_MAX_SIZE below the
+# server's max_connections. The apps.core.db.postgresql engine exports
+# checkout latency and pool occupancy as auditflow_db_* metrics.
+DB_POOL = env.bool('DB_POOL', default=bool(find_spec('psycopg_pool')))
+DB_POOL_OPTIONS = {
+    'min_size': env.int('DB_POOL_MIN_SIZE', default=2),
+    'max_size': env.int('DB_POOL_MAX_SIZE', default=10),
+    # Seconds a checkout waits for a free connection before failing.
+    'timeout': env.float('DB_POOL_TIMEOUT', default=5.0),
+    # Idle connections above min_size are closed after this many seconds,
+    # and every connection is replaced after max_lifetime.
+    'max_idle': env.float('DB_POOL_MAX_IDLE', default=300.0),
+    'max_lifetime': env.float('DB_POOL_MAX_LIFETIME', default=1800.0),
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'apps.core.db.postgresql',
         'NAME': env('DB_NAME', default='auditflow'),
         'USER': env('DB_USER', default='postgres'),
         'PASSWORD': env('DB_PASSWORD', default='password'),
         'HOST': env('DB_HOST', default='localhost'),
         'PORT': env('DB_PORT', default='5432'),
+        # Django refuses persistent connections on top of a pool.
+        'CONN_MAX_AGE': 0 if DB_POOL else env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {'pool': DB_POOL_OPTIONS} if DB_POOL else {},
     }
 }
 
+# Optional sharding (see apps.core.utils.sharding): list DATABASES aliases,
+# 'default' first, to spread accounts over them. Shard databases are set
+# up with ``manage.py prepare_shards``, transfers between shards need the
+# ShardTransferSink in OUTBOX['SINKS'] and a dispatcher per shard
+# (``dispatch_outbox --database``). The list must not change once
+# accounts exist.
+SHARDING = {
+    'SHARDS': [],
+    'ID_BLOCK': 10 ** 12,
+}
+DATABASE_ROUTERS = ['apps.core.utils.sharding.ShardRouter']
+AUTHENTICATION_BACKENDS = ['apps.users.authentication.ShardedModelBackend']
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -98,7 +142,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.ShardedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -111,8 +155,23 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'apps.core.utils.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'apps.core.utils.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack (Accept / Content-Type: application/msgpack) for internal
+# service clients, when the msgpack package is installed.
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('apps.core.utils.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('apps.core.utils.renderers.MessagePackParser')
+
 # JWT
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
@@ -143,3 +202,136 @@ LOGGING = {
         'level': 'INFO',
     },
 }
+
+# Audit rollups: rows younger than this are left for the next catch-up run
+AUDIT_ROLLUP_SETTLE_SECONDS = env.int('AUDIT_ROLLUP_SETTLE_SECONDS', default=30)
+
+# Performance instrumentation (see apps.core.middleware.performance).
+# Server-Timing tells any client the query count and timings of each
+# response, so it is off unless enabled (development turns it on).
+SERVER_TIMING = env.bool('SERVER_TIMING', default=False)
+# When set, /api/metrics/ requires "Authorization: Bearer <token>";
+# unset, the endpoint is only served with DEBUG on.
+METRICS_TOKEN = env('METRICS_TOKEN', default='')
+
+# Balance every account starts with; reconcile_balances checks stored
+# balances against this plus the net of completed transactions.
+OPENING_BALANCE = Decimal('500.00')
+# Balance checkpoints stop this far behind now so that transactions still
+# committing are never left out of one.
+BALANCE_CHECKPOINT_SETTLE_SECONDS = 60
+# Two-phase transfers: default and maximum lifetime of a hold before the
+# expiry sweep (``manage.py expire_holds``) voids it.
+TRANSFER_HOLD_SECONDS = env.int('TRANSFER_HOLD_SECONDS', default=900)
+TRANSFER_HOLD_MAX_SECONDS = 86400
+
+# Per-sender transfer velocity limits (see apps.core.utils.velocity).
+# Each tier lists windows in seconds with a maximum transfer count and/or
+# total amount. The local backend counts per worker process; set
+# VELOCITY_BACKEND to apps.core.utils.velocity.CacheBackend to share the
+# counters through CACHES['default'].
+VELOCITY_LIMITS = {
+    'ENABLED': env.bool('VELOCITY_LIMITS_ENABLED', default=True),
+    'BACKEND': env('VELOCITY_BACKEND', default='apps.core.utils.velocity.LocalBackend'),
+    'TIERS': {
+        'default': [
+            {'window': 60, 'count': 10, 'amount': '25000'},
+            {'window': 3600, 'count': 60, 'amount': '100000'},
+            {'window': 86400, 'count': 200, 'amount': '200000'},
+        ],
+        'verified': [
+            {'window': 60, 'count': 30, 'amount': '100000'},
+            {'window': 3600, 'count': 300, 'amount': '500000'},
+            {'window': 86400, 'count': 1000, 'amount': '1000000'},
+        ],
+    },
+}
+
+# Admission control for write endpoints (see apps.core.utils.admission),
+# per worker process. Keep MAX_CONCURRENCY below the worker's thread count
+# and database connections so that reads keep flowing while writes queue.
+ADMISSION_CONTROL = {
+    'ENABLED': env.bool('ADMISSION_CONTROL_ENABLED', default=True),
+    'MAX_CONCURRENCY': env.int('ADMISSION_MAX_CONCURRENCY', default=8),
+    'MAX_PER_USER': 2,
+    'MAX_QUEUE': 32,
+    'QUEUE_TIMEOUT_SECONDS': env.float('ADMISSION_QUEUE_TIMEOUT_SECONDS', default=2.0),
+    'SCOPES': {},
+}
+
+# Deployed code version (e.g. git sha); keys the cached OpenAPI schema.
+# Without it, a fingerprint of the Python sources is used.
+CODE_VERSION = env('CODE_VERSION', default='')
+SCHEMA_CACHE_DIR = env('SCHEMA_CACHE_DIR', default=str(BASE_DIR / 'schema_cache'))
+
+# Slow query capture (see apps.core.utils.slow_queries). Statements slower
+# than THRESHOLD_MS are kept per worker with an EXPLAIN plan.
+SLOW_QUERY = {
+    'THRESHOLD_MS': env.int('SLOW_QUERY_THRESHOLD_MS', default=200),
+    'BUFFER_SIZE': 200,
+    'EXPLAIN': True,
+    'ANALYZE': env.bool('SLOW_QUERY_ANALYZE', default=False),
+    'DUMP_DIR': env('SLOW_QUERY_DUMP_DIR', default=str(BASE_DIR / 'slow_queries')),
+}
+
+# Request profiling (see apps.core.middleware.profiling). Staff can also
+# mint X-Profile-Token headers to profile individual requests.
+PROFILING = {
+    'SAMPLE_RATE': env.float('PROFILING_SAMPLE_RATE', default=0.0),
+    'ROUTES': env.list('PROFILING_ROUTES', default=[]),
+    'INTERVAL_MS': 5,
+    'DIR': env('PROFILING_DIR', default=str(BASE_DIR / 'profiles')),
+    'MAX_FILES': 200,
+    'TOKEN_MAX_AGE': 3600,
+}
+
+# Server-sent events (see apps.core.utils.broker). LocalBackend only
+# reaches streams in the same worker; use RedisBackend with several workers.
+EVENTS = {
+    'BACKEND': env('EVENTS_BACKEND', default='apps.core.utils.broker.LocalBackend'),
+    'REDIS_URL': env('EVENTS_REDIS_URL', default='redis://localhost:6379/0'),
+    'HEARTBEAT_SECONDS': 15,
+    'QUEUE_SIZE': 100,
+}
+
+# Transactional outbox (see apps.core.services.outbox_service), drained by
+# ``manage.py dispatch_outbox``. Events of one account keep their order;
+# PARTITIONS lets several dispatchers split the work (--partition N) and
+# must only be changed while the outbox is drained.
+OUTBOX = {
+    'PARTITIONS': env.int('OUTBOX_PARTITIONS', default=1),
+    'BATCH_SIZE': 500,
+    'LEASE_SECONDS': 60,
+    'MAX_ATTEMPTS': 10,
+    'BACKOFF_SECONDS': 2,
+    'MAX_BACKOFF_SECONDS': 600,
+    'RETENTION_DAYS': 7,
+    'SINKS': {
+        'log': {'BACKEND': 'apps.core.utils.outbox_sinks.LogSink'},
+    },
+}
+if env('OUTBOX_WEBHOOK_URL', default=''):
+    OUTBOX['SINKS']['webhook'] = {
+        'BACKEND': 'apps.core.utils.outbox_sinks.WebhookSink',
+        'OPTIONS': {'url': env('OUTBOX_WEBHOOK_URL')},
+    }
+
+# Background jobs (see apps.core.utils.jobs), run by ``manage.py run_jobs``.
+# Files produced by jobs (exports) are written to EXPORT_DIR.
+JOBS = {
+    'LEASE_SECONDS': 300,
+    'BACKOFF_SECONDS': 30,
+    'MAX_BACKOFF_SECONDS': 3600,
+    'PROGRESS_INTERVAL': 1.0,
+    'EXPORT_DIR': env('JOBS_EXPORT_DIR', default=str(BASE_DIR / 'exports')),
+}
+
+# N+1 / query budget detection (see apps.core.middleware.query_budget).
+# BUDGETS maps URL names to the maximum number of queries per request.
+QUERY_BUDGET = {
+    'SAMPLE_RATE': env.float('QUERY_BUDGET_SAMPLE_RATE', default=0.0),
+    'STRICT': False,
+    'REPEAT_THRESHOLD': 5,
+    'DEFAULT_BUDGET': 30,
+    'BUDGETS': {},
+}
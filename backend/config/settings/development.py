@@ -13,6 +13,8 @@ MIDDLEWARE += [
 
 INTERNAL_IPS = ['127.0.0.1']
 
+SERVER_TIMING = env.bool('SERVER_TIMING', default=True)
+
 # Use SQLite for local development to simplify setup
 DATABASES = {
     'default': {
@@ -20,3 +22,16 @@ DATABASES = {
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
+
+# Extra SQLite files stand in for shard databases when trying sharding
+# locally; SHARD_COUNT > 1 spreads accounts over that many of them. Two
+# are always declared so the test suite can enable sharding per test.
+SHARD_COUNT = env.int('SHARD_COUNT', default=1)
+for index in range(1, max(SHARD_COUNT, 3)):
+    DATABASES[f'shard{index}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'db_shard{index}.sqlite3',
+    }
+if SHARD_COUNT > 1:
+    SHARDING['SHARDS'] = ['default'] + [f'shard{index}' for index in range(1, SHARD_COUNT)]
+    OUTBOX['SINKS']['shards'] = {'BACKEND': 'apps.transactions.services.shard_transfer_service.ShardTransferSink'}
@@ -1,25 +1,45 @@
+import hmac
 from django.conf import settings
 from django.contrib import admin
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+from apps.core.views.events import event_stream
+from apps.core.views.schema import CachedSchemaView
+from apps.transactions.views.dashboard import DashboardView
+from apps.core.utils.metrics import registry
 
 
 def health_check(_request):
     return JsonResponse({"status": "ok"})
 
+
+def metrics(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if not token:
+        # Only development servers expose metrics without a token.
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/health/', health_check, name='health'),
     path('api/health', health_check),  # allow no-trailing-slash
+    path('api/metrics/', metrics, name='metrics'),
     
     # API Documentation
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    path('api/schema/', CachedSchemaView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     
     # Apps
+    path('api/core/', include('apps.core.urls')),
     path('api/users/', include('apps.users.urls')),
     path('api/transactions/', include('apps.transactions.urls')),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('api/events/', event_stream, name='events'),
     path('api/audit/', include('apps.audit.urls')),
 ]
 
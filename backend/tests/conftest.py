@@ -2,9 +2,20 @@ import pytest
 from decimal import Decimal
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
+from apps.core.utils import velocity
 
 User = get_user_model()
 
+@pytest.fixture(autouse=True)
+def strict_query_budget(settings):
+    """Inspect every request in the test suite and fail on N+1 queries"""
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, 'SAMPLE_RATE': 1.0, 'STRICT': True}
+
+@pytest.fixture(autouse=True)
+def fresh_velocity_limits(monkeypatch):
+    """Start every test with empty velocity counters built from its settings"""
+    monkeypatch.setattr(velocity, '_limiter', None)
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -50,3 +50,203 @@ def test_audit_logs_api_my_logs(authenticated_client, test_user):
     """Test retrieving current user's audit logs"""
     response = authenticated_client.get('/api/audit/logs/my_logs/')
     assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_audit_logs_search_full_text(authenticated_client, test_user):
+    """Test free-text search over audit descriptions"""
+    AuditService.log_event(event_type='user_login', user=test_user, description='Login from mobile app')
+    AuditService.log_event(event_type='user_login', user=test_user, description='Login from web browser')
+
+    response = authenticated_client.get('/api/audit/logs/search/', {'q': 'mobile'})
+    assert response.status_code == 200
+    assert [log['description'] for log in response.data['results']] == ['Login from mobile app']
+
+@pytest.mark.django_db
+def test_audit_logs_search_by_reference(authenticated_client, test_user, another_user):
+    """Test structured search by transaction reference and counterparty"""
+    from apps.transactions.services.transaction_service import TransactionService
+    txn = TransactionService.create_transaction(
+        from_user=test_user,
+        to_user=another_user,
+        amount='10.00',
+        transaction_type='transfer'
+    )
+
+    response = authenticated_client.get('/api/audit/logs/search/', {
+        'reference_id': txn.reference_id,
+        'recipient_id': another_user.recipient_id,
+    })
+    assert response.status_code == 200
+    assert response.data['count'] == 1
+    assert response.data['results'][0]['transaction_reference'] == txn.reference_id
+
+@pytest.mark.django_db
+def test_audit_logs_search_invalid_date(authenticated_client):
+    """Test search rejects malformed date bounds"""
+    response = authenticated_client.get('/api/audit/logs/search/', {'date_from': 'yesterday'})
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_audit_log_rendered_on_insert(authenticated_client, test_user):
+    """Test the stored representation matches the serializer output"""
+    from apps.audit.serializers.audit_log import AuditLogSerializer
+    log = AuditService.log_event(event_type='user_login', user=test_user, description='User logged in')
+
+    response = authenticated_client.get(f'/api/audit/logs/{log.id}/')
+    assert response.status_code == 200
+    assert response.json() == AuditLogSerializer(AuditLog.objects.get(pk=log.pk)).data
+
+@pytest.mark.django_db
+def test_audit_logs_read_current_user_and_transaction(authenticated_client, test_user, another_user):
+    """Test stored bodies pick up a changed email and a deleted transaction"""
+    from apps.audit.serializers.audit_log import AuditLogSerializer
+    from apps.transactions.services.transaction_service import TransactionService
+    txn = TransactionService.create_transaction(test_user, another_user, '10.00', 'transfer')
+    login = AuditService.log_event(event_type='user_login', user=test_user, description='User logged in')
+    AuditService.log_event(event_type='user_logout', description='Anonymous logout')
+    test_user.email = 'renamed@example.com'
+    test_user.save()
+
+    responses = [
+        authenticated_client.get('/api/audit/logs/').json()['results'],
+        authenticated_client.get('/api/audit/logs/my_logs/').json(),
+        authenticated_client.get('/api/audit/logs/search/').json()['results'],
+        [authenticated_client.get(f'/api/audit/logs/{login.id}/').json()],
+    ]
+    for logs in responses:
+        assert {log['user_email'] for log in logs} == {'renamed@example.com'}
+        assert all(
+            log == AuditLogSerializer(AuditLog.objects.get(pk=log['id'])).data for log in logs
+        )
+
+    sent = AuditLog.objects.get(transaction=txn, user=test_user)
+    assert authenticated_client.get(f'/api/audit/logs/{sent.id}/').json()['transaction_reference'] == txn.reference_id
+    AuditLog.objects.filter(transaction=txn).update(transaction=None)
+    body = authenticated_client.get(f'/api/audit/logs/{sent.id}/').json()
+    assert (body['transaction'], body['transaction_reference']) == (None, None)
+
+    test_user.is_staff = True
+    test_user.save()
+    logs = authenticated_client.get('/api/audit/logs/', {'event_type': 'user_logout'}).json()['results']
+    assert logs == [AuditLogSerializer(AuditLog.objects.get(event_type='user_logout')).data]
+
+@pytest.mark.django_db
+def test_audit_logs_list_renders_missing(authenticated_client, test_user):
+    """Test logs without a stored representation are rendered on read"""
+    AuditLog.objects.create(event_type='user_login', user=test_user, description='Bulk loaded')
+
+    response = authenticated_client.get('/api/audit/logs/')
+    assert response.status_code == 200
+    assert response.json()['results'][0]['description'] == 'Bulk loaded'
+    assert AuditService.render_missing() == 1
+
+@pytest.mark.django_db
+def test_transfer_audit_payload_shared(authenticated_client, test_user, another_user):
+    """Test sender and receiver entries share one stored payload"""
+    from apps.audit.serializers.audit_log import AuditLogSerializer
+    from apps.transactions.services.transaction_service import TransactionService
+    txn = TransactionService.create_transaction(
+        from_user=test_user,
+        to_user=another_user,
+        amount='10.00',
+        transaction_type='transfer'
+    )
+
+    logs = AuditLog.objects.filter(transaction=txn).order_by('id')
+    assert [log.data for log in logs] == [{'direction': 'sent'}, {'direction': 'received'}]
+    assert txn.audit_payload.data['reference_id'] == txn.reference_id
+
+    # Stored bodies do not repeat the payload; reads splice it in.
+    assert all('amount' not in log.rendered.body for log in logs)
+
+    response = authenticated_client.get('/api/audit/logs/my_logs/')
+    assert response.data[0]['data']['direction'] == 'sent'
+    assert response.data[0]['data']['amount'] == '10.00'
+    assert response.data[0]['receiver_id'] == another_user.recipient_id
+    assert response.json()[0] == AuditLogSerializer(logs[0]).data
+
+@pytest.mark.django_db
+def test_audit_log_client_values_interned(test_user, rf):
+    """Test IP and user agent are stored once and resolved on read"""
+    from apps.audit.models.client import ClientIP, ClientUserAgent
+    request = rf.get('/', HTTP_USER_AGENT='pytest-agent', HTTP_X_FORWARDED_FOR='203.0.113.7, 10.0.0.1')
+    first = AuditService.log_event(event_type='user_login', user=test_user, request=request)
+    second = AuditService.log_event(event_type='user_login', user=test_user, request=request)
+
+    assert first.client_ip_id == second.client_ip_id
+    assert first.client_user_agent_id == second.client_user_agent_id
+    assert ClientIP.objects.count() == 1
+    assert ClientUserAgent.objects.count() == 1
+    log = AuditLog.objects.get(pk=second.pk)
+    assert log.ip_address == '203.0.113.7'
+    assert log.user_agent == 'pytest-agent'
+
+@pytest.mark.django_db
+def test_interner_caches_after_commit(django_capture_on_commit_callbacks):
+    """Test interned rows are only cached once the transaction commits"""
+    from apps.audit.services.interning import client_ips
+    client_ips.clear()
+    with django_capture_on_commit_callbacks(execute=False):
+        row = client_ips.get('198.51.100.1')
+    assert client_ips._cache == {}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert client_ips.get('198.51.100.1') == row
+    assert client_ips.get('198.51.100.1') == row
+    assert client_ips.get('not-an-ip') is None
+    client_ips.clear()
+
+@pytest.mark.django_db
+def test_audit_rollup_refresh_is_incremental(test_user):
+    """Test the catch-up job only counts rows past the watermark"""
+    from apps.audit.models.audit_rollup import AuditRollup
+    from apps.audit.services.rollup_service import AuditRollupService
+    AuditService.log_event(event_type='user_login', user=test_user)
+    AuditService.log_event(event_type='user_login', user=test_user)
+    assert AuditRollupService.refresh(settle_seconds=0) == 2
+
+    AuditService.log_event(event_type='user_login', user=test_user)
+    assert AuditRollupService.refresh(settle_seconds=0) == 1
+    assert AuditRollupService.refresh(settle_seconds=0) == 0
+
+    counts = dict(AuditRollup.objects.filter(event_type='user_login').values_list('granularity', 'count'))
+    assert counts == {'hour': 3, 'day': 3}
+
+@pytest.mark.django_db
+def test_audit_stats_staff_only(authenticated_client, test_user):
+    """Test the stats action is restricted to staff and reads rollups"""
+    from apps.audit.services.rollup_service import AuditRollupService
+    AuditService.log_event(event_type='user_login', user=test_user)
+    AuditRollupService.refresh(settle_seconds=0)
+
+    response = authenticated_client.get('/api/audit/logs/stats/')
+    assert response.status_code == 403
+
+    test_user.is_staff = True
+    test_user.save()
+    response = authenticated_client.get('/api/audit/logs/stats/', {'granularity': 'day'})
+    assert response.status_code == 200
+    assert response.data['totals'] == {'user_login': 1}
+
+
+@pytest.mark.django_db
+def test_audit_log_sparse_fieldset(authenticated_client, test_user, another_user):
+    """Test ?fields= on audit lists and detail returns only the selected keys"""
+    from decimal import Decimal
+    from apps.transactions.services.transaction_service import TransactionService
+
+    txn = TransactionService.create_transaction(test_user, another_user, Decimal('10.00'), 'transfer')
+    log = AuditLog.objects.get(user=test_user, transaction=txn)
+
+    response = authenticated_client.get('/api/audit/logs/', {'fields': 'event_type,amount,user_email'})
+    assert response.status_code == 200
+    assert response.data['results'] == [
+        {'event_type': 'transaction_completed', 'amount': '10.00', 'user_email': test_user.email}
+    ]
+
+    response = authenticated_client.get('/api/audit/logs/my_logs/', {'fields': 'id'})
+    assert response.data == [{'id': log.id}]
+
+    response = authenticated_client.get(f'/api/audit/logs/{log.id}/', {'exclude': 'data'})
+    assert 'data' not in response.data
+    assert response.data['id'] == log.id and 'to_user_name' in response.data
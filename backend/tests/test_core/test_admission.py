@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import deque
+import pytest
+from apps.core.exceptions.base import AdmissionRejected
+from apps.core.utils import admission
+from apps.core.utils.admission import AdmissionController
+
+OPTIONS = {**admission.DEFAULTS, 'MAX_CONCURRENCY': 1, 'MAX_PER_USER': 1, 'MAX_QUEUE': 1, 'QUEUE_TIMEOUT_SECONDS': 0.2}
+
+
+@pytest.fixture
+def transfers(settings, monkeypatch):
+    settings.ADMISSION_CONTROL = {**settings.ADMISSION_CONTROL, 'SCOPES': {'transfers': OPTIONS}}
+    monkeypatch.setattr(admission, '_controllers', {})
+    return admission.get_controller('transfers')
+
+
+def test_waiters_are_admitted_in_order_or_shed():
+    """Test a queued request gets the released slot and the rest are shed"""
+    controller = AdmissionController('test', {**OPTIONS, 'QUEUE_TIMEOUT_SECONDS': 5})
+    first = controller.acquire('a')
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire('b')))
+    waiter.start()
+    while not controller.waiters:
+        time.sleep(0.001)
+    assert admission.QUEUE_DEPTH.value(scope='test') == 1
+
+    for key, reason in (('a', 'user'), ('c', 'queue_full')):
+        with pytest.raises(AdmissionRejected) as rejected:
+            controller.acquire(key)
+        assert rejected.value.reason == reason
+
+    controller.release(first)
+    waiter.join()
+    assert admitted[0][0] == 'b' and controller.in_flight == 1
+    controller.release(admitted[0])
+    assert (controller.in_flight, controller.per_user, controller.waiters) == (0, {}, deque())
+
+
+def test_deadlines_shed_queued_requests():
+    """Test requests are shed when the deadline passes or cannot be met"""
+    controller = AdmissionController('deadline', OPTIONS)
+    held = controller.acquire('a')
+    with pytest.raises(AdmissionRejected) as timed_out:
+        controller.acquire('b')
+    assert timed_out.value.reason == 'timeout'
+    assert controller.waiters == deque() and 'b' not in controller.per_user
+
+    controller.service_time = 1.0
+    with pytest.raises(AdmissionRejected) as hopeless:
+        controller.acquire('b')
+    assert (hopeless.value.reason, hopeless.value.retry_after) == ('deadline', 1.0)
+    controller.release(held)
+
+
+@pytest.mark.django_db
+def test_transfer_endpoint_throttles_writes_only(transfers, authenticated_client, test_user, another_user):
+    """Test busy transfer slots return 429/503 with Retry-After while reads pass"""
+    payload = {'to_recipient_id': another_user.recipient_id, 'amount': '5.00'}
+    own = transfers.acquire(test_user.pk)
+    response = authenticated_client.post('/api/transactions/', payload)
+    assert response.status_code == 429
+    assert response['Retry-After'] == '1'
+    assert authenticated_client.get('/api/transactions/').status_code == 200
+    transfers.release(own)
+
+    busy = transfers.acquire('someone-else')
+    transfers.service_time = 1.0
+    response = authenticated_client.post('/api/transactions/', payload)
+    assert response.status_code == 503
+    assert int(response['Retry-After']) >= 1
+    assert admission.REJECTED.value(scope='transfers', reason='deadline') >= 1
+    transfers.release(busy)
+
+    assert authenticated_client.post('/api/transactions/', payload).status_code == 201
+    assert (transfers.in_flight, transfers.per_user) == (0, {})
@@ -0,0 +1,18 @@
+from apps.core.utils.benchmark import compare, latency_summary
+
+
+def test_compare_flags_regressions_by_direction():
+    """Test throughput drops and latency increases beyond the threshold fail"""
+    baseline = {'txn': {'ops_per_sec': 100.0, 'p50_ms': 10.0}}
+    assert compare({'txn': {'ops_per_sec': 90.0, 'p50_ms': 11.0}}, baseline, 0.2) == []
+
+    regressions = compare({'txn': {'ops_per_sec': 70.0, 'p50_ms': 13.0}}, baseline, 0.2)
+    assert [(case, metric) for case, metric, *_ in regressions] == [('txn', 'ops_per_sec'), ('txn', 'p50_ms')]
+
+
+def test_latency_summary():
+    """Test percentile summary is reported in milliseconds"""
+    summary = latency_summary([0.001] * 19 + [0.1], prefix='list_')
+    assert summary['list_p50_ms'] == 1.0
+    assert summary['list_p95_ms'] == 1.0
+    assert round(summary['list_mean_ms'], 3) == 5.95
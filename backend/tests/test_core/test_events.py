@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+import pytest
+from decimal import Decimal
+from django.test import AsyncClient
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.core.utils import broker as broker_module
+from apps.core.utils.broker import Broker
+from apps.transactions.services.transaction_service import TransactionService
+
+
+def _frame(message):
+    event, data = message.strip().split('\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_broker_delivers_from_other_threads_and_drops_oldest(settings):
+    """Test publishes from sync threads reach async subscribers and slow queues keep the newest"""
+    settings.EVENTS = {'QUEUE_SIZE': 2}
+    broker = Broker('apps.core.utils.broker.LocalBackend')
+
+    async def scenario():
+        with broker.subscribe('user:1') as subscription:
+            publisher = threading.Thread(target=lambda: [
+                broker.publish('user:1', 'balance', {'balance': Decimal(n)}) for n in range(3)
+            ])
+            publisher.start()
+            publisher.join()
+            received = [await subscription.get(timeout=1), await subscription.get(timeout=1)]
+            assert await subscription.get(timeout=0.01) is None
+        return received
+
+    received = asyncio.run(scenario())
+    assert [_frame(message) for message in received] == [('balance', {'balance': '1'}), ('balance', {'balance': '2'})]
+    assert broker._subscribers == {}
+
+
+def test_shared_backend_fans_out_across_workers():
+    """Test a publish on one worker reaches subscribers on every worker"""
+    workers = [Broker('apps.core.utils.broker.SharedMemoryBackend') for _ in range(2)]
+
+    async def scenario():
+        with workers[1].subscribe('user:7') as subscription:
+            workers[0].publish('user:7', 'transaction', {'id': 1})
+            workers[0].publish('user:8', 'transaction', {'id': 2})
+            return await subscription.get(timeout=1), await subscription.get(timeout=0.01)
+
+    try:
+        message, other = asyncio.run(scenario())
+    finally:
+        for worker in workers:
+            worker.close()
+    assert _frame(message) == ('transaction', {'id': 1})
+    assert other is None
+
+
+@pytest.mark.django_db
+def test_transfer_publishes_on_commit(test_user, another_user, monkeypatch, django_capture_on_commit_callbacks):
+    """Test both parties get transaction and balance events only after commit"""
+    published = []
+    monkeypatch.setattr(broker_module, '_broker', type('Recorder', (), {
+        'publish': lambda self, channel, event, data: published.append((channel, event, data)),
+    })())
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        txn = TransactionService.create_transaction(test_user, another_user, Decimal('40.00'), 'transfer')
+        assert published == []
+
+    assert len(callbacks) == 1
+    assert [(channel, event) for channel, event, _ in published] == [
+        (f'user:{test_user.pk}', 'transaction'),
+        (f'user:{test_user.pk}', 'balance'),
+        (f'user:{another_user.pk}', 'transaction'),
+        (f'user:{another_user.pk}', 'balance'),
+    ]
+    assert published[0][2]['reference_id'] == txn.reference_id
+    assert published[1][2]['balance'] == Decimal('460.00')
+    assert published[3][2]['balance'] == Decimal('540.00')
+
+
+@pytest.mark.django_db
+def test_event_stream_endpoint(test_user, monkeypatch):
+    """Test the stream authenticates from ?token= and relays published events"""
+    broker = Broker('apps.core.utils.broker.LocalBackend')
+    monkeypatch.setattr(broker_module, '_broker', broker)
+    token = str(AccessToken.for_user(test_user))
+
+    async def scenario():
+        client = AsyncClient()
+        denied = await client.get('/api/events/')
+        response = await client.get('/api/events/', {'token': token})
+        stream = aiter(response.streaming_content)
+        first = await anext(stream)
+        broker.publish(f'user:{test_user.pk}', 'balance', {'balance': Decimal('12.50')})
+        second = await anext(stream)
+        await stream.aclose()
+        return denied, response, first, second
+
+    denied, response, first, second = asyncio.run(scenario())
+    assert denied.status_code == 401
+    assert response['Content-Type'] == 'text/event-stream'
+    assert first == b'retry: 3000\n\n'
+    assert _frame(second.decode()) == ('balance', {'balance': '12.50'})
+    assert broker._subscribers == {}
@@ -0,0 +1,167 @@
+import pytest
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from apps.audit.models.audit_rollup import AuditRollup
+from apps.core.models.job import Job
+from apps.core.services.job_service import JobService
+from apps.core.utils.jobs import job
+from apps.transactions.services.transaction_service import TransactionService
+
+
+@job('tests.flaky')
+def flaky(context, fail=True):
+    if fail:
+        raise RuntimeError('boom')
+    return {'ok': True}
+
+
+@job('tests.slow')
+def slow(context, steps=3):
+    for step in range(steps):
+        context.progress(step, steps, force=True)
+    return {'steps': steps}
+
+
+@job('tests.quiet')
+def quiet(context, seconds=0.6):
+    """Run past the lease without reporting progress, then check whether
+    another worker could take the job over."""
+    time.sleep(seconds)
+    return {'reclaimed': bool(JobService.claim(worker='other'))}
+
+
+@pytest.fixture
+def staff_client(authenticated_client, test_user, settings, tmp_path):
+    settings.JOBS = {**settings.JOBS, 'EXPORT_DIR': str(tmp_path)}
+    test_user.is_staff = True
+    test_user.save()
+    return authenticated_client
+
+
+@pytest.mark.django_db
+def test_enqueue_run_and_download_export(staff_client, test_user, another_user):
+    """Test staff enqueue an export, a worker runs it and the file can be downloaded"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('12.00'), 'transfer')
+    TransactionService.create_transaction(another_user, test_user, Decimal('3.00'), 'transfer')
+
+    response = staff_client.post(
+        '/api/core/jobs/', {'name': 'transactions.export_history', 'params': {'user_id': test_user.pk}}, format='json',
+    )
+    assert response.status_code == 201
+    job_id = response.data['id']
+    assert response.data['status'] == 'queued'
+
+    out = StringIO()
+    call_command('run_jobs', '--once', stdout=out)
+    assert f'transactions.export_history #{job_id}: succeeded' in out.getvalue()
+
+    polled = staff_client.get(f'/api/core/jobs/{job_id}/').data
+    assert polled['status'] == 'succeeded'
+    assert polled['result'] == {'file': f'transactions-{job_id}.csv', 'rows': 2}
+    assert polled['progress'] == 1.0
+
+    download = staff_client.get(f'/api/core/jobs/{job_id}/download/')
+    lines = b''.join(download.streaming_content).decode().splitlines()
+    assert lines[0].startswith('id,created_at,transaction_type')
+    assert len(lines) == 3
+
+
+@pytest.mark.django_db
+def test_jobs_api_requires_staff_and_known_names(authenticated_client, staff_client, api_client):
+    """Test validation of job names and staff-only access"""
+    response = staff_client.post('/api/core/jobs/', {'name': 'nope'}, format='json')
+    assert response.status_code == 400
+    assert 'audit.rebuild_rollups' in staff_client.get('/api/core/jobs/types/').data['names']
+
+    api_client.force_authenticate(user=None)
+    assert api_client.get('/api/core/jobs/').status_code in (401, 403)
+
+
+@pytest.mark.django_db
+def test_failed_jobs_retry_with_backoff_then_fail():
+    """Test failures are rescheduled with backoff until max_attempts"""
+    queued = JobService.enqueue('tests.flaky', max_attempts=2)
+
+    [claimed] = JobService.claim(worker='w1')
+    assert JobService.run(claimed) == 'retried'
+    queued.refresh_from_db()
+    assert queued.status == 'queued' and queued.attempts == 1
+    assert queued.available_at > timezone.now() + timedelta(seconds=20)
+    assert 'boom' in queued.error
+    assert JobService.claim() == []
+
+    Job.objects.update(available_at=timezone.now())
+    [claimed] = JobService.claim()
+    assert JobService.run(claimed) == 'failed'
+    assert Job.objects.get().status == 'failed'
+
+
+@pytest.mark.django_db
+def test_expired_leases_are_reclaimed_and_cancel_interrupts():
+    """Test a dead worker's job is claimed again and cancelled jobs stop at their next report"""
+    JobService.enqueue('tests.slow')
+    [first] = JobService.claim(worker='dead')
+    assert JobService.claim() == []
+    Job.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+
+    [second] = JobService.claim(worker='alive')
+    assert second.attempts == 2 and second.worker == 'alive'
+    # The old worker lost its lease, so its progress reports stop it.
+    assert JobService.run(first) == 'interrupted'
+
+    JobService.cancel(second)
+    assert JobService.run(second) == 'interrupted'
+    assert Job.objects.get().status == 'cancelled'
+
+
+@pytest.mark.django_db
+def test_job_cancelled_without_progress_reports_is_interrupted():
+    """Test a job cancelled while its handler never reports progress is not recorded as succeeded"""
+    JobService.enqueue('tests.slow', {'steps': 0})
+    [claimed] = JobService.claim()
+    JobService.cancel(claimed)
+
+    assert JobService.run(claimed) == 'interrupted'
+    assert Job.objects.get().status == 'cancelled'
+
+
+@pytest.mark.django_db
+def test_expired_last_attempt_fails_instead_of_reclaiming():
+    """Test a job whose worker died on its last attempt is failed, not leased again"""
+    queued = JobService.enqueue('tests.slow', max_attempts=1)
+    JobService.claim(worker='dead')
+    Job.objects.update(leased_until=timezone.now() - timedelta(seconds=1))
+
+    assert JobService.claim(worker='alive') == []
+    queued.refresh_from_db()
+    assert (queued.status, queued.attempts, queued.lease_token) == ('failed', 1, None)
+    assert 'last attempt' in queued.error and queued.finished_at
+
+
+@pytest.mark.django_db(transaction=True)
+def test_inline_worker_renews_leases(settings):
+    """Test run_jobs without a pool keeps the lease of a quiet handler alive"""
+    settings.JOBS = {**settings.JOBS, 'LEASE_SECONDS': 0.3}
+    queued = JobService.enqueue('tests.quiet')
+
+    call_command('run_jobs', '--once', stdout=StringIO())
+    queued.refresh_from_db()
+    assert (queued.status, queued.attempts, queued.result) == ('succeeded', 1, {'reclaimed': False})
+
+
+@pytest.mark.django_db
+def test_rollup_rebuild_job(test_user, another_user):
+    """Test the rollup rebuild runs as a job and reports its progress"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('5.00'), 'transfer')
+    queued = JobService.enqueue('audit.rebuild_rollups', {'settle_seconds': 0})
+    [claimed] = JobService.claim()
+    assert JobService.run(claimed) == 'succeeded'
+
+    queued.refresh_from_db()
+    assert queued.result == {'events': 2}
+    assert (queued.progress_done, queued.progress_total) == (2, 2)
+    assert AuditRollup.objects.filter(granularity='day', event_type='transaction_completed').get().count == 2
@@ -0,0 +1,73 @@
+import pytest
+from apps.core.utils.metrics import Registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test Prometheus text output for a labelled histogram"""
+    registry = Registry()
+    histogram = registry.histogram('latency_seconds', 'Latency.', ['route'], buckets=(0.1, 1.0))
+    histogram.observe(0.05, route='a')
+    histogram.observe(0.5, route='a')
+    histogram.observe(5, route='a')
+
+    output = registry.render()
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 1' in output
+    assert 'latency_seconds_bucket{route="a",le="1.0"} 2' in output
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 3' in output
+    assert 'latency_seconds_count{route="a"} 3' in output
+
+@pytest.mark.django_db
+def test_server_timing_and_metrics_endpoint(authenticated_client, settings):
+    """Test requests emit Server-Timing and show up on /api/metrics/"""
+    from apps.core.middleware.performance import SERIALIZER_SECONDS
+    settings.METRICS_TOKEN = 'secret'
+    settings.SERVER_TIMING = True
+    response = authenticated_client.get('/api/users/users/me/')
+    assert response.status_code == 200
+    assert 'db;dur=' in response['Server-Timing'] and 'serialize;dur=' in response['Server-Timing']
+    serialize = float(response['Server-Timing'].split('serialize;dur=')[1].split(',')[0])
+    assert 0 < serialize <= float(response['Server-Timing'].split('view;dur=')[1].split(',')[0])
+    assert SERIALIZER_SECONDS.samples()
+
+    settings.SERVER_TIMING = False
+    response = authenticated_client.get('/api/transactions/')
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response
+
+    response = authenticated_client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'auditflow_http_request_duration_seconds_count{route="transactions-clean-list-create",method="GET"}' in body
+
+@pytest.mark.django_db
+def test_metrics_endpoint_token(api_client, settings):
+    """Test the metrics endpoint honours METRICS_TOKEN and is closed without one outside DEBUG"""
+    settings.METRICS_TOKEN = ''
+    assert api_client.get('/api/metrics/').status_code == 403
+
+    settings.METRICS_TOKEN = 'secret'
+    assert api_client.get('/api/metrics/').status_code == 401
+    response = api_client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer secret')
+    assert response.status_code == 200
+
+@pytest.mark.django_db
+def test_db_pool_metrics_are_read_at_scrape(monkeypatch):
+    """Test pool occupancy and running totals are exported from psycopg pool stats"""
+    psycopg_pool = pytest.importorskip('psycopg_pool')
+    from apps.core.utils import db_pool
+    from apps.core.utils.metrics import registry
+
+    pool = psycopg_pool.ConnectionPool('', open=False, min_size=1, max_size=4)
+    stats = {'pool_max': 4, 'requests_num': 3, 'requests_wait_ms': 1500}
+    monkeypatch.setattr(pool, 'get_stats', lambda: dict(stats))
+    monkeypatch.setattr(pool, 'pop_stats', lambda: pytest.fail('pop_stats resets the pool counters'))
+    monkeypatch.setattr(db_pool, 'pools', lambda: [('replica', pool)])
+
+    body = registry.render()
+    assert 'auditflow_db_pool_max_size{database="replica"} 4' in body
+    assert 'auditflow_db_pool_requests_total{database="replica"} 3' in body
+    assert 'auditflow_db_pool_wait_seconds_total{database="replica"} 1.5' in body
+    # Every scrape reports the pool's running total, not what it added.
+    stats['requests_num'] = 5
+    assert 'auditflow_db_pool_requests_total{database="replica"} 5' in registry.render()
+    assert 'auditflow_db_pool_requests_total{database="replica"} 5' in registry.render()
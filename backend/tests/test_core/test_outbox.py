@@ -0,0 +1,123 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.utils import timezone
+from apps.core.models.outbox import OutboxEvent
+from apps.core.services.outbox_service import OutboxService
+from apps.core.utils.outbox_sinks import MemorySink
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.transaction_service import TransactionService
+
+
+class FlakySink(MemorySink):
+    def __init__(self, name, failing_keys=()):
+        super().__init__(name)
+        self.failing_keys = set(failing_keys)
+        self.delivered = []
+
+    def deliver(self, messages):
+        if any(message['key'] in self.failing_keys for message in messages):
+            raise ConnectionError('downstream unavailable')
+        self.delivered.extend(messages)
+
+
+def _enqueue(*keys):
+    return OutboxService.enqueue([('test.event', key, {'n': n}) for n, key in enumerate(keys)])
+
+
+@pytest.mark.django_db
+def test_transfer_writes_outbox_events_atomically(test_user, another_user):
+    """Test a transfer writes one event per account and a rollback writes none"""
+    txn = TransactionService.create_transaction(test_user, another_user, Decimal('30.00'), 'transfer')
+    events = list(OutboxEvent.objects.all())
+    assert [(event.key, event.payload['direction'], event.payload['balance']) for event in events] == [
+        (f'user:{test_user.pk}', 'sent', '470.00'),
+        (f'user:{another_user.pk}', 'received', '530.00'),
+    ]
+    assert {event.payload['reference_id'] for event in events} == {txn.reference_id}
+
+    with mock.patch('apps.audit.services.audit_service.AuditService.log_event', side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            TransactionService.create_transaction(test_user, another_user, Decimal('5.00'), 'transfer')
+    assert OutboxEvent.objects.count() == 2
+    assert Transaction.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_dispatch_delivers_in_order_and_isolates_failing_accounts():
+    """Test one failing account is retried later without holding up others"""
+    _enqueue('user:1', 'user:2', 'user:1', 'user:2')
+    sink = FlakySink('flaky', failing_keys={'user:1'})
+
+    assert OutboxService.dispatch_batch(sinks=[sink]) == 2
+    assert [(m['key'], m['payload']['n']) for m in sink.delivered] == [('user:2', 1), ('user:2', 3)]
+    failed = OutboxEvent.objects.filter(key='user:1')
+    assert {(event.status, event.attempts) for event in failed} == {('pending', 1)}
+    assert 'downstream unavailable' in failed[0].last_error
+
+    # A new event for the failing account must wait behind the earlier ones.
+    _enqueue('user:1')
+    sink.failing_keys.clear()
+    assert OutboxService.dispatch_batch(sinks=[sink]) == 0
+
+    failed.update(available_at=timezone.now() - timedelta(seconds=1))
+    assert OutboxService.dispatch_batch(sinks=[sink]) == 3
+    assert [m['payload']['n'] for m in sink.delivered if m['key'] == 'user:1'] == [0, 2, 0]
+    assert not OutboxEvent.objects.exclude(status='dispatched').exists()
+
+
+@pytest.mark.django_db
+def test_leased_events_block_later_events_of_the_same_key():
+    """Test a key's later events are not claimed while an earlier one is in flight"""
+    _enqueue('user:1', 'user:1', 'user:2')
+    first = OutboxService.claim(batch_size=1)
+    assert [event.payload['n'] for event in first] == [0]
+    assert [event.key for event in OutboxService.claim()] == ['user:2']
+
+    # An expired lease (crashed dispatcher) is claimed again: at-least-once.
+    OutboxEvent.objects.filter(pk=first[0].pk).update(claimed_until=timezone.now() - timedelta(seconds=1))
+    assert [event.payload['n'] for event in OutboxService.claim()] == [0, 1]
+
+
+@pytest.mark.django_db
+def test_events_are_dead_lettered_after_max_attempts(settings):
+    """Test an event that keeps failing stops blocking its account"""
+    settings.OUTBOX = {**settings.OUTBOX, 'MAX_ATTEMPTS': 2}
+    _enqueue('user:1')
+    sink = FlakySink('flaky', failing_keys={'user:1'})
+    for _ in range(2):
+        OutboxEvent.objects.update(available_at=timezone.now())
+        OutboxService.dispatch_batch(sinks=[sink])
+    assert OutboxEvent.objects.get().status == 'dead'
+
+
+@pytest.mark.django_db
+def test_dispatch_outbox_command(settings):
+    """Test the command drains the outbox into the configured sinks"""
+    settings.OUTBOX = {**settings.OUTBOX, 'SINKS': {'memory': {'BACKEND': 'apps.core.utils.outbox_sinks.MemorySink'}}}
+    MemorySink.clear()
+    _enqueue('user:1', 'user:2')
+    out = StringIO()
+    call_command('dispatch_outbox', '--once', '--batch-size', '1', stdout=out)
+    assert 'Dispatched 2 outbox events' in out.getvalue()
+    assert [m['key'] for m in MemorySink.delivered] == ['user:1', 'user:2']
+
+
+@pytest.mark.django_db
+def test_claim_skips_past_leased_and_backing_off_events():
+    """Test leased or backing-off events neither fill the window nor reorder a key"""
+    _enqueue(*[f'user:{n}' for n in range(20)], 'user:0')
+    first = OutboxService.claim(batch_size=10)
+    assert [event.key for event in first] == [f'user:{n}' for n in range(10)]
+    second = OutboxService.claim(batch_size=10)
+    assert [event.key for event in second] == [f'user:{n}' for n in range(10, 20)]
+
+    OutboxEvent.objects.update(claim_token=None, claimed_until=None)
+    OutboxEvent.objects.filter(id__in=[event.pk for event in first]).update(
+        available_at=timezone.now() + timedelta(minutes=5),
+    )
+    # user:0's second event waits behind its first, which is backing off.
+    assert [event.key for event in OutboxService.claim(batch_size=10)] == [f'user:{n}' for n in range(10, 20)]
@@ -0,0 +1,47 @@
+import pytest
+from apps.core.utils import profiling
+
+
+@pytest.fixture
+def profile_settings(settings, tmp_path):
+    settings.PROFILING = {**settings.PROFILING, 'DIR': str(tmp_path), 'INTERVAL_MS': 1, 'MAX_FILES': 2}
+
+
+@pytest.mark.django_db
+def test_profile_token_profiles_matching_requests(authenticated_client, test_user, another_user, profile_settings):
+    """Test a staff-minted token profiles requests and stores collapsed stacks"""
+    assert authenticated_client.post('/api/core/profiles/token/').status_code == 403
+    test_user.is_staff = True
+    test_user.save()
+    response = authenticated_client.post(
+        '/api/core/profiles/token/', {'route': 'transactions-clean-list-create'}, format='json'
+    )
+    assert response.status_code == 201
+    token = response.data['token']
+
+    response = authenticated_client.post(
+        '/api/transactions/', {'to_recipient_id': another_user.recipient_id, 'amount': '10.00'},
+        HTTP_X_PROFILE_TOKEN=token,
+    )
+    assert response.status_code == 201
+    name = response['X-Profile-Id']
+
+    response = authenticated_client.get(f'/api/core/profiles/{name}/')
+    assert response.status_code == 200
+    for line in b''.join(response.streaming_content).decode().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) >= 1 and ';' in stack
+
+    response = authenticated_client.get('/api/users/users/me/', HTTP_X_PROFILE_TOKEN=token)
+    assert 'X-Profile-Id' not in response
+    response = authenticated_client.get('/api/transactions/', HTTP_X_PROFILE_TOKEN=token + 'x')
+    assert 'X-Profile-Id' not in response
+
+
+@pytest.mark.django_db
+def test_profile_store_is_bounded(authenticated_client, profile_settings, settings):
+    """Test sampled profiles beyond MAX_FILES evict the oldest ones"""
+    settings.PROFILING = {**settings.PROFILING, 'SAMPLE_RATE': 1.0, 'ROUTES': ['transactions-clean-list-create']}
+    names = [authenticated_client.get('/api/transactions/')['X-Profile-Id'] for _ in range(3)]
+    assert [path.name for path in profiling.list_profiles()] == sorted(names[1:], reverse=True)
+    assert 'X-Profile-Id' not in authenticated_client.get('/api/users/users/me/')
@@ -0,0 +1,29 @@
+import pytest
+from apps.core.exceptions.base import QueryBudgetExceeded
+from apps.core.utils.query_budget import assert_query_budget, fingerprint
+from apps.users.models.user import CustomUser
+
+
+def test_fingerprint_collapses_literals():
+    """Test queries differing only in literals share a fingerprint"""
+    assert fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'a'") == fingerprint(
+        "SELECT *  FROM t WHERE id = 42 AND name = 'it''s'"
+    )
+    assert fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s)') == 'SELECT * FROM t WHERE id IN (...)'
+
+
+@pytest.mark.django_db
+def test_assert_query_budget_reports_n_plus_one(test_user):
+    """Test repeated query shapes and budget overruns raise with the call site"""
+    with pytest.raises(QueryBudgetExceeded, match='test_query_budget.py'):
+        with assert_query_budget(repeat_threshold=3):
+            for _ in range(3):
+                CustomUser.objects.get(pk=test_user.pk)
+
+    with pytest.raises(QueryBudgetExceeded, match='budget 1'):
+        with assert_query_budget(max_queries=1):
+            CustomUser.objects.filter(pk=test_user.pk).exists()
+            CustomUser.objects.count()
+
+    with assert_query_budget(max_queries=2):
+        CustomUser.objects.count()
@@ -0,0 +1,40 @@
+import json
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from rest_framework.renderers import JSONRenderer
+from apps.core.utils.renderers import FastJSONRenderer
+from apps.transactions.services.transaction_service import TransactionService
+
+
+def test_fast_json_renderer_encodes_decimal_and_datetime_exactly():
+    """Test Decimals keep their exact digits and datetimes match DRF's encoder"""
+    moment = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    rendered = FastJSONRenderer().render({'amount': Decimal('12345678901234.10'), 'at': moment, 1: 'x'})
+    assert rendered == b'{"amount":"12345678901234.10","at":"2024-05-01T12:30:15.123456Z","1":"x"}'
+    assert json.loads(rendered)['at'] == json.loads(JSONRenderer().render({'at': moment}))['at']
+
+
+@pytest.mark.django_db
+def test_msgpack_content_negotiation(authenticated_client, test_user, another_user):
+    """Test MessagePack requests and responses round-trip the JSON payloads"""
+    msgpack = pytest.importorskip('msgpack')
+    TransactionService.create_transaction(test_user, another_user, Decimal('25.50'), 'transfer')
+
+    as_json = authenticated_client.get('/api/transactions/').json()
+    response = authenticated_client.get('/api/transactions/', HTTP_ACCEPT='application/msgpack')
+    assert response['Content-Type'] == 'application/msgpack'
+    assert msgpack.unpackb(response.content) == as_json
+    assert as_json['results'][0]['amount'] == '25.50'
+
+    response = authenticated_client.get('/api/audit/logs/', HTTP_ACCEPT='application/msgpack')
+    assert msgpack.unpackb(response.content) == authenticated_client.get('/api/audit/logs/').json()
+
+    response = authenticated_client.post(
+        '/api/transactions/',
+        msgpack.packb({'to_recipient_id': another_user.recipient_id, 'amount': '10.00'}),
+        content_type='application/msgpack',
+        HTTP_ACCEPT='application/msgpack',
+    )
+    assert response.status_code == 201
+    assert msgpack.unpackb(response.content)['amount'] == '10.00'
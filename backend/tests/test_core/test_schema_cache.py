@@ -0,0 +1,53 @@
+import gzip
+import json
+import pytest
+from apps.core.utils import schema_cache
+
+
+@pytest.fixture
+def schema_settings(settings, tmp_path):
+    settings.CODE_VERSION = 'test-version'
+    settings.SCHEMA_CACHE_DIR = str(tmp_path)
+    schema_cache.clear()
+    yield
+    schema_cache.clear()
+
+
+def test_schema_is_cached_with_etag_and_gzip(api_client, schema_settings):
+    """Test the schema is served from cache with ETag revalidation and gzip"""
+    response = api_client.get('/api/schema/', {'format': 'json'})
+    assert response.status_code == 200
+    assert 'paths' in json.loads(response.content)
+    etag = response['ETag']
+    assert etag.startswith('"test-version-')
+
+    response = api_client.get('/api/schema/', {'format': 'json'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    response = api_client.get('/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+    assert response['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.content))['paths']
+    assert response['ETag'] == etag[:-1] + '-gzip"'
+
+    for tag in (response['ETag'], etag):
+        response = api_client.get(
+            '/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=tag
+        )
+        assert response.status_code == 304
+        assert response['ETag'] == etag[:-1] + '-gzip"'
+
+    response = api_client.get('/api/schema/', HTTP_ACCEPT_ENCODING='gzip')
+    assert gzip.decompress(response.content).startswith(b'openapi:')
+    assert response['ETag'] != etag
+
+
+def test_schema_files_are_used_for_the_current_version(api_client, schema_settings, settings, tmp_path):
+    """Test pre-generated schema files are served and keyed by code version"""
+    paths = schema_cache.write_files()
+    assert sorted(p.name for p in paths) == ['openapi-test-version.json', 'openapi-test-version.yaml']
+    paths[0].write_bytes(b'openapi: 3.0.3\ninfo: {title: pregenerated}\n')
+
+    assert b'pregenerated' in api_client.get('/api/schema/').content
+
+    settings.CODE_VERSION = 'next-version'
+    assert b'pregenerated' not in api_client.get('/api/schema/').content
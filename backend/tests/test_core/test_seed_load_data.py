@@ -0,0 +1,25 @@
+import pytest
+from io import StringIO
+from decimal import Decimal
+from django.core.management import call_command
+from django.db.models import Sum
+from apps.audit.models import AuditLog
+from apps.transactions.models import Transaction
+from apps.users.models import CustomUser
+
+
+@pytest.mark.django_db
+def test_seed_load_data_keeps_balances_consistent():
+    """Test seeded balances equal opening balance plus net generated transfers"""
+    call_command('seed_load_data', users=20, transactions=500, chunk_size=200, seed=7, stdout=StringIO())
+
+    assert Transaction.objects.count() == 500
+    transfers = Transaction.objects.filter(transaction_type='transfer').count()
+    assert AuditLog.objects.count() == 500 + transfers
+    assert Transaction.objects.dates('created_at', 'year').count() >= 3
+
+    for user in CustomUser.objects.all():
+        received = Transaction.objects.filter(to_user=user).aggregate(s=Sum('amount'))['s'] or 0
+        sent = Transaction.objects.filter(from_user=user).aggregate(s=Sum('amount'))['s'] or 0
+        assert user.balance == Decimal('500.00') + received - sent
+        assert user.balance >= 0
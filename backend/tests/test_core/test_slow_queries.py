@@ -0,0 +1,43 @@
+import json
+import pytest
+from apps.core.utils import slow_queries
+
+
+@pytest.fixture
+def slow_query_buffer(settings, tmp_path):
+    settings.SLOW_QUERY = {**settings.SLOW_QUERY, 'THRESHOLD_MS': 0, 'DUMP_DIR': str(tmp_path)}
+    slow_queries.clear()
+    yield
+    slow_queries.wait_for_explains()
+    slow_queries.clear()
+
+
+@pytest.mark.django_db
+def test_slow_queries_are_captured_with_plan(authenticated_client, test_user, slow_query_buffer, tmp_path):
+    """Test slow statements are buffered with view, parameter shape and EXPLAIN"""
+    authenticated_client.get('/api/transactions/')
+    slow_queries.wait_for_explains()
+
+    entry = next(e for e in slow_queries.entries() if 'transactions_transaction' in e['sql'])
+    assert entry['route'] == 'transactions-clean-list-create'
+    assert '?' in entry['sql']
+    assert entry['params'][0] == 'int'
+    assert entry['explain'] and not entry['explain'].startswith('failed')
+
+    test_user.is_staff = True
+    test_user.save()
+    response = authenticated_client.get('/api/core/slow-queries/')
+    assert response.status_code == 200
+    assert response.data['count'] >= 1
+
+    response = authenticated_client.post('/api/core/slow-queries/dump/')
+    assert response.status_code == 201
+    dumped = json.loads(open(response.data['path']).read())
+    assert any(e['route'] == 'transactions-clean-list-create' for e in dumped)
+
+
+@pytest.mark.django_db
+def test_slow_queries_endpoint_requires_staff(authenticated_client):
+    """Test non-staff users cannot read the slow query buffer"""
+    response = authenticated_client.get('/api/core/slow-queries/')
+    assert response.status_code == 403
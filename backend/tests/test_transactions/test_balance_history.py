@@ -0,0 +1,119 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from apps.transactions.models.balance_checkpoint import BalanceCheckpoint
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.balance_history_service import BalanceHistoryService
+from apps.transactions.services.transaction_service import TransactionService
+
+MARCH_1 = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def history(test_user, another_user):
+    """Three transfers from test_user, one per day from March 1st at noon"""
+    for day, amount in enumerate(['100.00', '50.00', '25.00']):
+        txn = TransactionService.create_transaction(test_user, another_user, Decimal(amount), 'transfer')
+        moment = MARCH_1 + timedelta(days=day)
+        Transaction.objects.filter(pk=txn.pk).update(created_at=moment, completed_at=moment)
+    return test_user
+
+
+@pytest.mark.django_db
+def test_balance_at_uses_nearest_checkpoint(history, another_user, django_assert_num_queries):
+    """Test point-in-time balances before, between and after checkpoints"""
+    assert BalanceHistoryService.create_checkpoints(as_of=MARCH_1 + timedelta(hours=1)) == 2
+    assert BalanceHistoryService.create_checkpoints(as_of=MARCH_1 + timedelta(hours=1)) == 0
+    checkpoint = BalanceCheckpoint.objects.get(user=history)
+    assert checkpoint.balance == Decimal('400.00')
+
+    with django_assert_num_queries(3):
+        balance, used = BalanceHistoryService.balance_at(history, MARCH_1 + timedelta(days=1, hours=1))
+    assert (balance, used) == (Decimal('350.00'), checkpoint)
+    assert BalanceHistoryService.balance_at(history, MARCH_1 - timedelta(seconds=1)) == (Decimal('500.00'), None)
+    assert BalanceHistoryService.balance_at(another_user, MARCH_1 + timedelta(days=3))[0] == Decimal('675.00')
+
+    # Accounts without new activity keep their previous checkpoint.
+    BalanceHistoryService.create_checkpoints(as_of=MARCH_1 + timedelta(days=1, hours=1))
+    assert BalanceCheckpoint.objects.filter(user=history).count() == 2
+
+
+@pytest.mark.django_db
+def test_backfill_command_checkpoints_each_interval(history):
+    """Test backfilled checkpoints agree with the stored balance"""
+    out = StringIO()
+    call_command('create_balance_checkpoints', '--backfill', '--settle-seconds', '0', stdout=out)
+    assert 'balance checkpoints' in out.getvalue()
+    days = list(BalanceCheckpoint.objects.filter(user=history).order_by('as_of').values_list('balance', flat=True))
+    # Steps start a day after the first transaction, so they include the second and third.
+    assert days == [Decimal('350.00'), Decimal('325.00')]
+    history.refresh_from_db()
+    assert BalanceHistoryService.balance_at(history, datetime.now(timezone.utc))[0] == history.balance
+
+
+@pytest.mark.django_db
+def test_as_of_endpoints(authenticated_client, history, another_user):
+    """Test as_of on /me and the staff balance endpoint"""
+    response = authenticated_client.get('/api/users/users/me/', {'as_of': '2026-03-02'})
+    assert response.status_code == 200
+    assert response.json()['balance'] == '350.00'
+    assert response.json()['as_of'].startswith('2026-03-02T23:59:59')
+    assert authenticated_client.get('/api/users/users/me/', {'as_of': 'yesterday'}).status_code == 400
+
+    url = f'/api/users/users/{another_user.pk}/balance/'
+    assert authenticated_client.get(url).status_code == 403
+    history.is_staff = True
+    history.save()
+    response = authenticated_client.get(url, {'as_of': '2026-03-01T13:00:00Z'})
+    assert response.status_code == 200
+    assert response.json()['balance'] == '600.00'
+    assert response.json()['current_balance'] == '675.00'
+
+
+@pytest.mark.django_db
+def test_settled_hold_counts_from_its_settlement(test_user, another_user):
+    """Test a hold reserved before a checkpoint and settled after it is not lost"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('1.00'), 'transfer')
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('100.00'))
+    reserved = datetime.now(timezone.utc)
+    assert BalanceHistoryService.create_checkpoints(as_of=reserved) == 2
+
+    TransactionService.settle_hold(hold)
+    TransactionService.create_transaction(test_user, another_user, Decimal('4.00'), 'transfer')
+    assert BalanceHistoryService.create_checkpoints(as_of=datetime.now(timezone.utc)) == 2
+
+    later = datetime.now(timezone.utc) + timedelta(seconds=1)
+    test_user.refresh_from_db()
+    another_user.refresh_from_db()
+    assert BalanceHistoryService.balance_at(test_user, later)[0] == test_user.balance == Decimal('395.00')
+    assert BalanceHistoryService.balance_at(another_user, later)[0] == another_user.balance
+    # Before the settlement the funds had not moved yet.
+    assert BalanceHistoryService.balance_at(another_user, reserved)[0] == Decimal('501.00')
+
+
+@pytest.mark.django_db
+def test_as_of_balance_excludes_funds_held_then(authenticated_client, test_user, another_user):
+    """Test /me?as_of= reports the balance without held funds, like /me"""
+    before = datetime.now(timezone.utc)
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('100.00'))
+    reserved = datetime.now(timezone.utc)
+
+    assert authenticated_client.get('/api/users/users/me/').json()['balance'] == '400.00'
+    assert authenticated_client.get('/api/users/users/me/', {'as_of': reserved.isoformat()}).json()['balance'] == '400.00'
+    assert authenticated_client.get('/api/users/users/me/', {'as_of': before.isoformat()}).json()['balance'] == '500.00'
+
+    TransactionService.settle_hold(hold)
+    assert authenticated_client.get('/api/users/users/me/', {'as_of': reserved.isoformat()}).json()['balance'] == '400.00'
+    test_user.is_staff = True
+    test_user.save()
+    response = authenticated_client.get(f'/api/users/users/{test_user.pk}/balance/', {'as_of': reserved.isoformat()})
+    assert (response.json()['balance'], response.json()['ledger_balance']) == ('400.00', '500.00')
+
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('50.00'))
+    reserved = datetime.now(timezone.utc)
+    TransactionService.void_hold(hold)
+    test_user.refresh_from_db()
+    assert authenticated_client.get('/api/users/users/me/', {'as_of': reserved.isoformat()}).json()['balance'] == '350.00'
+    assert authenticated_client.get('/api/users/users/me/').json()['balance'] == '400.00'
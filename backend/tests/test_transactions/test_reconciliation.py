@@ -0,0 +1,76 @@
+import pytest
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from apps.core.services.job_service import JobService
+from apps.transactions.services.reconciliation_service import ReconciliationService
+from apps.transactions.services.transaction_service import TransactionService
+
+User = get_user_model()
+
+
+@pytest.fixture
+def third_user():
+    return User.objects.create_user(email='third@example.com', password='testpass123', username='thirduser')
+
+
+@pytest.mark.django_db
+def test_full_reconciliation_reports_tampered_balances(test_user, another_user, third_user):
+    """Test balances match the transaction history until one is edited directly"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('120.50'), 'transfer')
+    TransactionService.create_transaction(another_user, third_user, Decimal('20.25'), 'transfer')
+    TransactionService.create_transaction(None, third_user, Decimal('10.00'), 'deposit')
+
+    report = ReconciliationService.reconcile(partition_size=2)
+    assert (report['checked'], report['partitions'], report['discrepancies']) == (3, 2, [])
+
+    User.objects.filter(pk=third_user.pk).update(balance=Decimal('999.00'))
+    [entry] = ReconciliationService.reconcile(partition_size=2)['discrepancies']
+    assert entry == {'user_id': third_user.pk, 'stored': '999.00', 'expected': '530.25', 'difference': '468.75'}
+
+    out = StringIO()
+    with pytest.raises(CommandError, match='1 discrepancies'):
+        call_command('reconcile_balances', '--fail-on-discrepancy', stdout=out)
+    assert f'user {third_user.pk}: stored 999.00, expected 530.25' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_incremental_reconciliation_covers_touched_accounts(test_user, another_user, third_user):
+    """Test incremental runs only check accounts with new transactions"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('5.00'), 'transfer')
+    first = ReconciliationService.reconcile(incremental=True, settle_seconds=0)
+    assert (first['mode'], first['checked']) == ('incremental', 2)
+    assert ReconciliationService.reconcile(incremental=True, settle_seconds=0)['checked'] == 0
+
+    User.objects.filter(pk=third_user.pk).update(balance=Decimal('1.00'))
+    TransactionService.create_transaction(another_user, test_user, Decimal('1.00'), 'transfer')
+    incremental = ReconciliationService.reconcile(incremental=True, settle_seconds=0)
+    assert (incremental['checked'], incremental['discrepancies']) == (2, [])
+    assert [d['user_id'] for d in ReconciliationService.reconcile()['discrepancies']] == [third_user.pk]
+
+
+@pytest.mark.django_db
+def test_reconciliation_job(test_user, another_user):
+    """Test reconciliation runs as a background job with progress"""
+    TransactionService.create_transaction(test_user, another_user, Decimal('7.00'), 'transfer')
+    queued = JobService.enqueue('transactions.reconcile_balances', {'partition_size': 1})
+    [claimed] = JobService.claim()
+    assert JobService.run(claimed) == 'succeeded'
+    queued.refresh_from_db()
+    assert queued.result['checked'] == 2
+    assert queued.result['discrepancy_count'] == 0
+    assert queued.progress_total == queued.result['partitions']
+
+
+@pytest.mark.django_db
+def test_incremental_reconciliation_revisits_settled_holds(test_user, another_user):
+    """Test the watermark waits for pending holds, so their settlement is checked"""
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('100.00'))
+    TransactionService.create_transaction(test_user, another_user, Decimal('1.00'), 'transfer')
+    assert ReconciliationService.reconcile(incremental=True, settle_seconds=0)['checked'] == 2
+
+    TransactionService.settle_hold(hold)
+    User.objects.filter(pk=another_user.pk).update(balance=Decimal('1.00'))
+    report = ReconciliationService.reconcile(incremental=True, settle_seconds=0)
+    assert [d['user_id'] for d in report['discrepancies']] == [another_user.pk]
@@ -0,0 +1,225 @@
+import pytest
+from decimal import Decimal
+from io import StringIO
+from itertools import count
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIClient
+from apps.audit.models.audit_log import AuditLog
+from apps.audit.models.audit_rollup import AuditRollup
+from apps.audit.models.rendered_audit_log import RenderedAuditLog
+from apps.audit.services.audit_service import AuditService
+from apps.audit.services.rollup_service import AuditRollupService
+from apps.core.services.outbox_service import OutboxService
+from apps.core.utils import sharding
+from apps.transactions.models.balance_checkpoint import BalanceCheckpoint
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.balance_history_service import BalanceHistoryService
+from apps.transactions.services.reconciliation_service import ReconciliationService
+from apps.transactions.services.shard_transfer_service import ShardTransferService, ShardTransferSink
+from apps.transactions.services.transaction_service import TransactionService
+
+User = get_user_model()
+SHARDS = ['default', 'shard1', 'shard2']
+on_shards = pytest.mark.django_db(databases=SHARDS)
+
+
+@pytest.fixture
+def shards(settings):
+    settings.SHARDING = {**settings.SHARDING, 'SHARDS': SHARDS}
+    for alias in SHARDS:
+        sharding.prepare(alias)
+
+
+def recipient_id_on(alias):
+    return next(
+        recipient_id for recipient_id in (str(1000000000 + n) for n in count())
+        if sharding.shard_for(recipient_id) == alias
+        and not User.objects.using(alias).filter(recipient_id=recipient_id).exists()
+    )
+
+
+def user_on(alias, name):
+    return User.objects.create_user(
+        email=f'{name}@example.com', password='testpass123', recipient_id=recipient_id_on(alias),
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def drain():
+    """Dispatch every shard's outbox through the saga sink until idle."""
+    sinks = [ShardTransferSink('shards')]
+    while sum(_dispatch(alias, sinks) for alias in SHARDS):
+        pass
+
+
+def _dispatch(alias, sinks):
+    with sharding.use(alias):
+        return OutboxService.dispatch_batch(sinks=sinks)
+
+
+def assert_reconciled():
+    assert ReconciliationService.reconcile()['discrepancies'] == []
+
+
+@on_shards
+def test_accounts_are_placed_and_found_by_shard(shards, api_client):
+    """Test accounts land on their shard with shard-block ids and can log in"""
+    alice, bob = user_on('shard1', 'alice'), user_on('shard2', 'bob')
+    assert (alice._state.db, bob._state.db) == ('shard1', 'shard2')
+    assert sharding.shard_for_id(alice.pk) == 'shard1' and sharding.shard_for_id(bob.pk) == 'shard2'
+    assert not User.objects.filter(pk=alice.pk).exists()
+
+    token = api_client.post('/api/users/token/', {'email': 'bob@example.com', 'password': 'testpass123'}).data['access']
+    api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    assert api_client.get('/api/users/users/me/').data['recipient_id'] == bob.recipient_id
+    assert api_client.get(f'/api/users/users/recipient/{alice.recipient_id}/').status_code == 200
+
+    duplicate = APIClient().post('/api/users/users/', {
+        'email': 'bob@example.com', 'password': 'anotherpass123', 'password_confirm': 'anotherpass123',
+    })
+    assert duplicate.status_code == 400 and 'email' in duplicate.data
+
+
+@on_shards
+def test_same_shard_transfer_stays_on_its_shard(shards):
+    """Test a transfer within one shard completes there and is listed from it"""
+    alice, carol = user_on('shard1', 'alice'), user_on('shard1', 'carol')
+    client = client_for(alice)
+    response = client.post('/api/transactions/', {'to_recipient_id': carol.recipient_id, 'amount': '25.00'})
+    assert response.status_code == 201 and response.data['status'] == 'completed'
+
+    assert Transaction.objects.using('shard1').count() == 1
+    assert not Transaction.objects.exists() and not AuditLog.objects.exists()
+    assert AuditLog.objects.using('shard1').count() == 2
+    assert client.get('/api/transactions/').data['count'] == 1
+    assert [log['event_type'] for log in client.get('/api/audit/logs/').data['results']] == ['transaction_completed']
+    assert_reconciled()
+
+
+@on_shards
+def test_transfer_between_shards_runs_as_saga(shards):
+    """Test a cross-shard transfer holds, credits, then completes exactly once"""
+    alice, bob = user_on('shard1', 'alice'), user_on('shard2', 'bob')
+    response = client_for(alice).post('/api/transactions/', {'to_recipient_id': bob.recipient_id, 'amount': '100.00'})
+    assert response.status_code == 201
+    assert (response.data['status'], response.data['to_user']) == ('pending', None)
+    alice.refresh_from_db()
+    assert (alice.balance, alice.held_balance) == (Decimal('400.00'), Decimal('100.00'))
+    assert_reconciled()
+
+    drain()
+    alice.refresh_from_db()
+    bob.refresh_from_db()
+    assert (alice.balance, alice.held_balance, bob.balance) == (Decimal('400.00'), Decimal('0.00'), Decimal('600.00'))
+    sent = Transaction.objects.using('shard1').get()
+    received = Transaction.objects.using('shard2').get()
+    assert (sent.status, sent.from_user_id, sent.to_user_id) == ('completed', alice.pk, None)
+    assert (received.reference_id, received.from_user_id, received.to_user_id) == (sent.reference_id, None, bob.pk)
+    assert received.audit_payload.data['from_user_name'] == sent.audit_payload.data['from_user_name']
+    assert list(AuditLog.objects.using('shard1').order_by('id').values_list('event_type', flat=True)) == [
+        'transaction_created', 'transaction_completed',
+    ]
+    assert client_for(bob).get('/api/transactions/').data['results'][0]['from_recipient_id'] == alice.recipient_id
+    assert_reconciled()
+
+    # Redelivered steps change nothing.
+    replay = {'reference_id': sent.reference_id, 'amount': '100.00', 'description': '',
+              'from_user_id': alice.pk, 'from_recipient_id': alice.recipient_id, 'from_user_name': '',
+              'to_recipient_id': bob.recipient_id, 'to_user_id': bob.pk, 'to_user_name': ''}
+    ShardTransferService.credit(replay)
+    ShardTransferService.complete(replay)
+    bob.refresh_from_db()
+    assert bob.balance == Decimal('600.00')
+    assert_reconciled()
+
+
+@on_shards
+def test_rejected_transfer_between_shards_is_refunded(shards):
+    """Test the sender is refunded when the recipient shard rejects the credit"""
+    alice = user_on('shard1', 'alice')
+    ghost = User(recipient_id=recipient_id_on('shard2'))
+    txn = TransactionService.create_transaction(alice, ghost, Decimal('40.00'), 'transfer')
+    assert txn.status == 'pending'
+
+    drain()
+    alice.refresh_from_db()
+    txn.refresh_from_db()
+    assert (txn.status, alice.balance, alice.held_balance) == ('failed', Decimal('500.00'), Decimal('0.00'))
+    failure = AuditLog.objects.using('shard1').get(event_type='transaction_failed')
+    assert failure.data['reason'] == 'Recipient not found'
+    assert not Transaction.objects.using('shard2').exists()
+    assert_reconciled()
+
+
+@on_shards
+def test_maintenance_and_staff_views_cover_every_shard(shards, monkeypatch):
+    """Test reconciliation, checkpoints, rollups and staff audit queries read all shards"""
+    users = {alias: user_on(alias, f'user-{alias}') for alias in SHARDS}
+    for alias, user in users.items():
+        TransactionService.create_transaction(user, user, Decimal('0.50'), 'deposit')
+        AuditService.log_event(event_type='user_login', user=user, description=alias)
+        User.objects.using(alias).filter(pk=user.pk).update(balance=Decimal('1.00'))
+
+    out = StringIO()
+    call_command('reconcile_balances', '--partition-size', '1', stdout=out)
+    assert 'Checked 3 accounts in 3 partitions (full)' in out.getvalue()
+    assert '3 discrepancies' in out.getvalue()
+    report = ReconciliationService.reconcile(incremental=True, settle_seconds=0)
+    assert sorted(entry['user_id'] for entry in report['discrepancies']) == sorted(u.pk for u in users.values())
+
+    assert BalanceHistoryService.create_checkpoints(settle_seconds=0) == 3
+    assert [BalanceCheckpoint.objects.using(alias).count() for alias in SHARDS] == [1, 1, 1]
+
+    assert AuditRollupService.refresh(settle_seconds=0) == 6
+    assert [AuditRollup.objects.using(alias).exists() for alias in SHARDS] == [True, True, True]
+    RenderedAuditLog.objects.using('shard2').all().delete()
+    assert AuditService.render_missing() == 2
+    RenderedAuditLog.objects.using('shard2').all().delete()
+
+    staff = user_on('default', 'ops')
+    User.objects.filter(pk=staff.pk).update(is_staff=True)
+    staff.is_staff = True
+    client = client_for(staff)
+    monkeypatch.setattr(PageNumberPagination, 'page_size', 2)
+    first = client.get('/api/audit/logs/', {'event_type': 'user_login'}).data
+    second = client.get('/api/audit/logs/', {'event_type': 'user_login', 'page': 2}).data
+    assert first['count'] == 3 and first['next'] and len(second['results']) == 1
+    assert {log['description'] for log in first['results'] + second['results']} == set(SHARDS)
+    assert client.get('/api/audit/logs/search/', {'q': 'shard2'}).data['count'] == 1
+    assert client.get('/api/audit/logs/', {'fields': 'id', 'event_type': 'user_login'}).data['count'] == 3
+    assert client.get('/api/audit/logs/stats/').data['totals'] == {'transaction_completed': 3, 'user_login': 3}
+
+
+@on_shards
+def test_export_and_outbox_metrics_cover_every_shard(shards, settings, tmp_path):
+    """Test the history export and outbox metrics read all shards"""
+    from apps.core.services.job_service import JobService, export_dir
+    from apps.core.utils.metrics import registry
+    settings.JOBS = {**settings.JOBS, 'EXPORT_DIR': str(tmp_path)}
+    alice, carol, bob = user_on('shard1', 'alice'), user_on('shard1', 'carol'), user_on('shard2', 'bob')
+    TransactionService.create_transaction(alice, carol, Decimal('5.00'), 'transfer')
+    TransactionService.create_transaction(alice, bob, Decimal('7.00'), 'transfer')
+    drain()
+
+    def export(**params):
+        JobService.enqueue('transactions.export_history', params)
+        [claimed] = JobService.claim()
+        assert JobService.run(claimed) == 'succeeded'
+        claimed.refresh_from_db()
+        return (export_dir() / claimed.result['file']).read_text().splitlines()[1:]
+
+    assert len(export()) == 3
+    assert len(export(user_id=bob.pk)) == 1
+    assert len(export(user_id=alice.pk)) == 2
+
+    TransactionService.create_transaction(alice, bob, Decimal('1.00'), 'transfer')
+    body = registry.render()
+    assert 'auditflow_outbox_pending{database="shard1"} 1' in body
+    assert 'auditflow_outbox_pending{database="shard2"} 0' in body
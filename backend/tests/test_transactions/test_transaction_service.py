@@ -1,6 +1,10 @@
 import pytest
+from datetime import timedelta
 from decimal import Decimal
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from apps.audit.serializers.audit_log import AuditLogSerializer
+from apps.audit.services.audit_service import AuditService
 from apps.transactions.models.transaction import Transaction
 from apps.transactions.services.transaction_service import TransactionService
 from apps.core.exceptions.base import InsufficientBalanceException
@@ -81,3 +85,85 @@ def test_transaction_api_retrieve(authenticated_client, test_user, another_user)
     response = authenticated_client.get(f'/api/transactions/{txn.id}/')
     assert response.status_code == 200
     assert response.data['id'] == txn.id
+
+@pytest.mark.django_db
+def test_transaction_api_list_has_no_n_plus_one(authenticated_client, test_user):
+    """Test listing many transactions does not query users per row"""
+    recipients = [
+        User.objects.create_user(email=f'payee{i}@example.com', password='testpass123', username=f'payee{i}')
+        for i in range(6)
+    ]
+    for recipient in recipients:
+        TransactionService.create_transaction(
+            from_user=test_user, to_user=recipient, amount=Decimal('10.00'), transaction_type='transfer'
+        )
+
+    response = authenticated_client.get('/api/transactions/')
+    assert response.status_code == 200
+    assert len(response.data['results']) == 6
+
+@pytest.mark.django_db
+def test_transaction_api_sparse_fieldset(authenticated_client, test_user, another_user):
+    """Test ?fields= prunes the payload and skips unneeded columns and joins"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    TransactionService.create_transaction(test_user, another_user, Decimal('10.00'), 'transfer', 'lunch')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = authenticated_client.get('/api/transactions/', {'fields': 'amount,reference_id'})
+    assert response.status_code == 200
+    assert set(response.data['results'][0]) == {'amount', 'reference_id'}
+    select = next(q['sql'] for q in queries.captured_queries if 'reference_id' in q['sql'])
+    assert 'JOIN' not in select and '"description"' not in select
+
+    response = authenticated_client.get('/api/transactions/', {'exclude': 'description,to_user_name'})
+    assert 'description' not in response.data['results'][0]
+    assert response.data['results'][0]['from_user_name'] == ''
+
+    response = authenticated_client.get('/api/transactions/', {'fields': 'amount,nope'})
+    assert response.status_code == 400
+
+@pytest.mark.django_db
+def test_dashboard_endpoint(authenticated_client, test_user, another_user):
+    """Test the dashboard summary uses a fixed number of queries and supports ETags"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for amount in ('10.00', '15.50', '20.00'):
+        TransactionService.create_transaction(test_user, another_user, Decimal(amount), 'transfer')
+    TransactionService.create_transaction(another_user, test_user, Decimal('5.00'), 'transfer')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = authenticated_client.get('/api/dashboard/', {'limit': 2})
+    assert response.status_code == 200
+    assert len(queries) == 3
+    assert response.data['balance'] == Decimal('459.50')
+    assert len(response.data['recent_transactions']) == 2
+    assert len(response.data['recent_activity']) == 2
+    assert response.json()['month_to_date']['sent'] == '45.50'
+    assert response.json()['month_to_date']['received'] == '5.00'
+    assert response.data['month_to_date']['count'] == 4
+    logs = AuditService.get_audit_logs(user=test_user)[:2]
+    assert response.json()['recent_activity'] == AuditLogSerializer(logs, many=True).data
+
+    etag = response['ETag']
+    assert authenticated_client.get('/api/dashboard/', {'limit': 2}, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    listed = f'"stale", W/{etag}'
+    assert authenticated_client.get('/api/dashboard/', {'limit': 2}, HTTP_IF_NONE_MATCH=listed).status_code == 304
+    assert authenticated_client.get('/api/dashboard/', {'limit': 2}, HTTP_IF_NONE_MATCH='*').status_code == 304
+    containing = f'{etag}-stale'
+    assert authenticated_client.get('/api/dashboard/', {'limit': 2}, HTTP_IF_NONE_MATCH=containing).status_code == 200
+
+    TransactionService.create_transaction(test_user, another_user, Decimal('1.00'), 'transfer')
+    test_user.refresh_from_db()
+    response = authenticated_client.get('/api/dashboard/', {'limit': 2}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.data['balance'] == Decimal('458.50')
+
+    # A hold reserved before this month counts when it settles.
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('7.00'))
+    Transaction.objects.filter(pk=hold.pk).update(created_at=timezone.now() - timedelta(days=40))
+    TransactionService.settle_hold(hold)
+    response = authenticated_client.get('/api/dashboard/')
+    assert response.json()['month_to_date']['sent'] == '53.50'
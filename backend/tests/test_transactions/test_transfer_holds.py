@@ -0,0 +1,106 @@
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.audit.models.audit_log import AuditLog
+from apps.core.exceptions.base import InvalidTransactionException
+from apps.transactions.models.transaction import Transaction
+from apps.transactions.services.reconciliation_service import ReconciliationService
+from apps.transactions.services.transaction_service import TransactionService
+
+
+@pytest.fixture
+def staff_client(django_user_model):
+    staff = django_user_model.objects.create_user(email='ops@example.com', password='testpass123', username='ops', is_staff=True)
+    client = APIClient()
+    client.force_authenticate(user=staff)
+    return client
+
+
+@pytest.mark.django_db
+def test_hold_then_settle(authenticated_client, staff_client, test_user, another_user):
+    """Test a hold moves funds to held_balance and settling credits the recipient"""
+    response = authenticated_client.post(
+        '/api/transactions/hold/', {'to_recipient_id': another_user.recipient_id, 'amount': '100.00', 'expires_in': 60},
+    )
+    assert response.status_code == 201
+    assert response.data['status'] == 'pending' and response.data['hold_expires_at']
+    test_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance) == (Decimal('400.00'), Decimal('100.00'))
+    assert ReconciliationService.reconcile()['discrepancies'] == []
+
+    hold_id = response.data['id']
+    assert authenticated_client.post(f'/api/transactions/{hold_id}/settle/').status_code == 403
+    settled = staff_client.post(f'/api/transactions/{hold_id}/settle/')
+    assert settled.status_code == 200 and settled.data['status'] == 'completed'
+    assert staff_client.post(f'/api/transactions/{hold_id}/void/').status_code == 409
+
+    test_user.refresh_from_db()
+    another_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance, another_user.balance) == (
+        Decimal('400.00'), Decimal('0.00'), Decimal('600.00'),
+    )
+    assert ReconciliationService.reconcile()['discrepancies'] == []
+    assert list(AuditLog.objects.order_by('id').values_list('event_type', flat=True)) == [
+        'transaction_created', 'transaction_completed', 'transaction_completed',
+    ]
+
+
+@pytest.mark.django_db
+def test_void_and_validation(authenticated_client, staff_client, test_user, another_user):
+    """Test voiding returns the funds and holds are validated like transfers"""
+    payload = {'to_recipient_id': another_user.recipient_id, 'amount': '50.00'}
+    assert authenticated_client.post('/api/transactions/hold/', {**payload, 'amount': '501.00'}).status_code == 400
+    assert authenticated_client.post('/api/transactions/hold/', {**payload, 'expires_in': 0}).status_code == 400
+
+    hold_id = authenticated_client.post('/api/transactions/hold/', payload).data['id']
+    voided = staff_client.post(f'/api/transactions/{hold_id}/void/')
+    assert voided.status_code == 200 and voided.data['status'] == 'voided'
+    test_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance) == (Decimal('500.00'), Decimal('0.00'))
+    assert AuditLog.objects.get(event_type='transaction_failed').data['reason'] == 'voided'
+
+
+@pytest.mark.django_db
+def test_expired_holds_are_swept_in_batches(test_user, another_user):
+    """Test the sweep voids expired holds only, and expired holds cannot settle"""
+    holds = [TransactionService.reserve_transfer(test_user, another_user, Decimal('10.00')) for _ in range(3)]
+    Transaction.objects.filter(pk__in=[holds[0].pk, holds[1].pk]).update(
+        hold_expires_at=timezone.now() - timedelta(seconds=1),
+    )
+    with pytest.raises(InvalidTransactionException):
+        TransactionService.settle_hold(holds[0])
+
+    out = StringIO()
+    call_command('expire_holds', '--batch-size', '1', stdout=out)
+    assert 'Voided 2 expired holds' in out.getvalue()
+    assert sorted(Transaction.objects.values_list('status', flat=True)) == ['pending', 'voided', 'voided']
+    test_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance) == (Decimal('490.00'), Decimal('10.00'))
+
+    TransactionService.settle_hold(holds[2])
+    assert ReconciliationService.reconcile()['discrepancies'] == []
+
+
+@pytest.mark.django_db
+def test_transfer_from_stale_instances_keeps_holds(test_user, another_user, django_user_model):
+    """Test a direct transfer does not write back balances loaded before a hold or settlement"""
+    stale_sender = django_user_model.objects.get(pk=test_user.pk)
+    hold = TransactionService.reserve_transfer(test_user, another_user, Decimal('100.00'))
+
+    TransactionService.create_transaction(stale_sender, another_user, Decimal('10.00'), 'transfer')
+    test_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance) == (Decimal('390.00'), Decimal('100.00'))
+
+    stale_recipient = django_user_model.objects.get(pk=another_user.pk)
+    TransactionService.settle_hold(hold)
+    TransactionService.create_transaction(stale_recipient, stale_sender, Decimal('1.00'), 'transfer')
+    test_user.refresh_from_db()
+    another_user.refresh_from_db()
+    assert (test_user.balance, test_user.held_balance, another_user.balance) == (
+        Decimal('391.00'), Decimal('0.00'), Decimal('609.00'),
+    )
+    assert ReconciliationService.reconcile()['discrepancies'] == []
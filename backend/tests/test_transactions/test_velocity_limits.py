@@ -0,0 +1,74 @@
+import pytest
+from decimal import Decimal
+from apps.audit.models.audit_log import AuditLog
+from apps.core.exceptions.base import VelocityLimitExceeded
+from apps.core.utils import velocity
+from apps.core.utils.velocity import Limiter
+
+TWO_PER_MINUTE = {'TIERS': {'default': [{'window': 60, 'count': 2}, {'window': 3600, 'amount': '1000'}]}}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(velocity.time, 'monotonic', lambda: now[0])
+    return now
+
+
+@pytest.mark.django_db
+def test_transfers_over_the_limit_are_rejected_and_audited(authenticated_client, test_user, another_user, settings):
+    """Test the third transfer in a minute gets 429 and a transaction_failed audit event"""
+    settings.VELOCITY_LIMITS = {**settings.VELOCITY_LIMITS, **TWO_PER_MINUTE}
+    payload = {'to_recipient_id': another_user.recipient_id, 'amount': '10.00'}
+    # Failed transfers do not count against the limit.
+    too_much = authenticated_client.post('/api/transactions/', {**payload, 'amount': '600.00'})
+    assert too_much.status_code == 400
+    for _ in range(2):
+        assert authenticated_client.post('/api/transactions/', payload).status_code == 201
+
+    response = authenticated_client.post('/api/transactions/', payload)
+    assert response.status_code == 429
+    assert 1 <= int(response['Retry-After']) <= 60
+    assert 'at most 2 transfers per 1 minute(s)' in response.json()['error']
+    test_user.refresh_from_db()
+    assert test_user.balance == Decimal('480.00')
+
+    failed = AuditLog.objects.get(event_type='transaction_failed')
+    assert (failed.data['reason'], failed.data['window']) == ('velocity_limit', 60)
+    assert velocity.REJECTIONS.value(tier='default', window='60') >= 1
+
+
+def test_ring_buffer_slides_and_tracks_amounts(clock):
+    """Test counts expire bucket by bucket and amount limits apply separately"""
+    limiter = Limiter({**velocity.DEFAULTS, **TWO_PER_MINUTE})
+    limiter.hit(1, 'default', Decimal('300'))
+    clock[0] += 30
+    limiter.hit(1, 'default', Decimal('300'))
+    with pytest.raises(VelocityLimitExceeded) as rejected:
+        limiter.hit(1, 'default', Decimal('1'))
+    # The first hit leaves the one-minute window 30s from now.
+    assert rejected.value.retry_after == pytest.approx(30, abs=5)
+    limiter.hit(2, 'default', Decimal('1'))
+
+    clock[0] += 35
+    limiter.hit(1, 'default', Decimal('400'))
+    clock[0] += 60
+    with pytest.raises(VelocityLimitExceeded) as rejected:
+        limiter.hit(1, 'default', Decimal('0.01'))
+    assert rejected.value.window == 3600
+
+    token = limiter.hit(3, 'default', Decimal('1000'))
+    limiter.release(3, 'default', token)
+    limiter.hit(3, 'default', Decimal('1000'))
+
+
+def test_cache_backend_shares_counters_between_workers(settings):
+    """Test two limiters on one cache enforce a single limit"""
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'velocity'}}
+    options = {**velocity.DEFAULTS, **TWO_PER_MINUTE, 'BACKEND': 'apps.core.utils.velocity.CacheBackend'}
+    first, second = Limiter(options), Limiter(options)
+    first.hit(7, 'default', Decimal('1'))
+    second.hit(7, 'default', Decimal('1'))
+    with pytest.raises(VelocityLimitExceeded) as rejected:
+        first.hit(7, 'default', Decimal('1'))
+    assert 0 < rejected.value.retry_after <= 120
@@ -58,3 +58,15 @@ def test_user_change_password(authenticated_client, test_user):
     # Verify new password works
     test_user.refresh_from_db()
     assert test_user.check_password('newpass456')
+
+@pytest.mark.django_db
+def test_user_sparse_fieldset(authenticated_client, test_user):
+    """Test ?fields= on the profile and recipient lookup endpoints"""
+    response = authenticated_client.get('/api/users/users/me/', {'fields': 'balance,full_name'})
+    assert response.data == {'balance': '500.00', 'full_name': ''}
+
+    response = authenticated_client.get(
+        f'/api/users/users/recipient/{test_user.recipient_id}/', {'exclude': 'email'}
+    )
+    assert response.status_code == 200
+    assert 'email' not in response.data and response.data['recipient_id'] == test_user.recipient_id
@@ -3,8 +3,12 @@ export { authService } from './services/auth.service';
 export { userService } from './services/user.service';
 export { transactionService } from './services/transaction.service';
 export { auditService } from './services/audit.service';
+export { dashboardService } from './services/dashboard.service';
+export { subscribeToEvents } from './services/events.service';
 
 export type { LoginCredentials, AuthResponse } from './services/auth.service';
 export type { User, RecipientInfo } from './services/user.service';
 export type { TransferData, Transaction, TransferResponse, TransactionListResponse } from './services/transaction.service';
 export type { AuditEntry, AuditHistoryResponse, AuditFilters } from './services/audit.service';
+export type { DashboardSummary, MonthToDate } from './services/dashboard.service';
+export type { BalanceEvent, EventHandlers } from './services/events.service';
@@ -0,0 +1,33 @@
+import apiClient from '../client';
+import type { Transaction } from './transaction.service';
+import type { AuditEntry } from './audit.service';
+
+export interface MonthToDate {
+  since: string;
+  sent: string;
+  received: string;
+  count: number;
+}
+
+export interface DashboardSummary {
+  balance: string;
+  recipient_id: string;
+  recent_transactions: Transaction[];
+  recent_activity: AuditEntry[];
+  month_to_date: MonthToDate;
+}
+
+export const dashboardService = {
+  /**
+   * Get balance, recent transactions, recent activity and month-to-date totals
+   * GET /api/dashboard/
+   */
+  getSummary: async (limit = 50): Promise<DashboardSummary> => {
+    const response = await apiClient.get<DashboardSummary>('/api/dashboard/', {
+      params: { limit },
+    });
+    return response.data;
+  },
+};
+
+export default dashboardService;
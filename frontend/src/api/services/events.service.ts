@@ -0,0 +1,80 @@
+import { API_BASE_URL, refreshAccessToken } from '../client';
+import type { Transaction } from './transaction.service';
+
+export interface BalanceEvent {
+  balance: string;
+  held_balance?: string;
+  transaction_id?: number;
+}
+
+export interface EventHandlers {
+  onTransaction?: (transaction: Transaction) => void;
+  onBalance?: (event: BalanceEvent) => void;
+}
+
+/**
+ * Live balance and transaction updates for the current user
+ * GET /api/events/ (text/event-stream)
+ *
+ * EventSource cannot send headers, so the access token goes in the query
+ * string. The server ends the stream when the token expires, and rejects
+ * the connection with a 401 if it had already expired; either way we
+ * refresh it and reconnect. Returns a function that closes the stream.
+ */
+const MIN_RETRY_MS = 1000;
+const MAX_RETRY_MS = 30000;
+
+export const subscribeToEvents = (handlers: EventHandlers): (() => void) => {
+  let source: EventSource | null = null;
+  let closed = false;
+  let retryMs = MIN_RETRY_MS;
+  let retryTimer: ReturnType<typeof setTimeout> | undefined;
+
+  const reconnect = async (delay: number) => {
+    source?.close();
+    let token: string | null = null;
+    try {
+      token = await refreshAccessToken();
+    } catch (error) {
+      console.error('Failed to refresh token for live updates:', error);
+    }
+    // Without a token the user is signed out; the API client sends them
+    // to the login page on their next request.
+    if (closed || !token) return;
+    retryTimer = setTimeout(connect, delay);
+  };
+
+  const connect = () => {
+    const token = localStorage.getItem('auditflow_token');
+    if (closed || !token) return;
+
+    source = new EventSource(`${API_BASE_URL}/api/events/?token=${encodeURIComponent(token)}`);
+    source.onopen = () => {
+      retryMs = MIN_RETRY_MS;
+    };
+    source.onerror = () => {
+      // EventSource retries dropped connections itself, but gives up for
+      // good on an error response such as the 401 for an expired token.
+      if (source?.readyState !== EventSource.CLOSED) return;
+      const delay = retryMs;
+      retryMs = Math.min(retryMs * 2, MAX_RETRY_MS);
+      reconnect(delay);
+    };
+    source.addEventListener('transaction', (event) => {
+      handlers.onTransaction?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('balance', (event) => {
+      handlers.onBalance?.(JSON.parse((event as MessageEvent).data));
+    });
+    source.addEventListener('token_expired', () => reconnect(0));
+  };
+
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retryTimer);
+    source?.close();
+  };
+};
+
+export default subscribeToEvents;
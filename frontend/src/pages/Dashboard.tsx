@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '@/context/AuthContext';
-import { userService, auditService, transactionService, User, AuditEntry, TransferData } from '@/api';
+import { dashboardService, subscribeToEvents, transactionService, AuditEntry, DashboardSummary, MonthToDate, Transaction, TransferData } from '@/api';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
@@ -43,12 +43,36 @@ const transferSchema = z.object({
 type SortField = 'created_at' | 'event_type';
 type SortOrder = 'asc' | 'desc';
 
+// A pushed transaction shown as the activity row the server will have
+// logged for it; the next full fetch replaces it with the stored entry.
+const toActivity = (transaction: Transaction, direction: 'sent' | 'received'): AuditEntry => ({
+  id: -transaction.id,
+  event_type: transaction.status === 'completed' ? 'transaction_completed' : 'transaction_created',
+  user: null,
+  user_email: null,
+  transaction: transaction.id,
+  transaction_reference: transaction.reference_id,
+  description: transaction.description,
+  data: { direction },
+  ip_address: null,
+  created_at: transaction.created_at,
+  is_immutable: true,
+  sender_id: transaction.from_recipient_id,
+  receiver_id: transaction.to_recipient_id,
+  amount: transaction.amount,
+  transaction_type: transaction.transaction_type,
+  status: transaction.status,
+  from_user_name: transaction.from_user_name ?? '',
+  to_user_name: transaction.to_user_name,
+});
+
 const Dashboard: React.FC = () => {
   const { user, refreshUser } = useAuth();
   
   // Balance state
   const [balance, setBalance] = useState<number | null>(null);
   const [balanceLoading, setBalanceLoading] = useState(true);
+  const [monthToDate, setMonthToDate] = useState<MonthToDate | null>(null);
   
   // Transfer form state
   const [recipientAccount, setRecipientAccount] = useState('');
@@ -64,58 +88,88 @@ const Dashboard: React.FC = () => {
   const [sortOrder, setSortOrder] = useState<SortOrder>('desc');
   const [copiedRecipientId, setCopiedRecipientId] = useState(false);
 
-  // Fetch user balance
-  const fetchBalance = async () => {
-    setBalanceLoading(true);
-    try {
-      const userData: User = await userService.getCurrentUser();
-      setBalance(userData.balance);
-    } catch (error) {
-      console.error('Failed to fetch balance:', error);
-      toast({
-        title: 'Error',
-        description: 'Failed to fetch account balance',
-        variant: 'destructive',
-      });
-    } finally {
-      setBalanceLoading(false);
-    }
-  };
+  // Read by the long-lived event handlers, which would otherwise keep the
+  // values from the first render.
+  const sortRef = useRef({ sortField, sortOrder });
+  sortRef.current = { sortField, sortOrder };
+  const userRef = useRef(user);
+  userRef.current = user;
+  // Transactions already counted in the month-to-date totals
+  const countedRef = useRef(new Set<number>());
 
-  // Fetch audit history
-  const fetchAuditHistory = async () => {
+  const sortEntries = (entries: AuditEntry[]) =>
+    [...entries].sort((a, b) => {
+      const { sortField, sortOrder } = sortRef.current;
+      const dir = sortOrder === 'desc' ? -1 : 1;
+      if (sortField === 'created_at') {
+        return (new Date(a.created_at).getTime() - new Date(b.created_at).getTime()) * dir;
+      }
+      // event_type fallback
+      return a.event_type.localeCompare(b.event_type) * dir;
+    });
+
+  // Fetch balance, recent activity and month-to-date totals in one request
+  const fetchDashboard = async () => {
+    setBalanceLoading(true);
     setHistoryLoading(true);
     try {
-      const response = await auditService.getMyLogs();
-      // Client-side sort since my_logs returns flat array
-      const sorted = [...response].sort((a, b) => {
-        const dir = sortOrder === 'desc' ? -1 : 1;
-        if (sortField === 'created_at') {
-          return (new Date(a.created_at).getTime() - new Date(b.created_at).getTime()) * dir;
-        }
-        // event_type fallback
-        return a.event_type.localeCompare(b.event_type) * dir;
-      });
-      setAuditHistory(sorted);
+      const summary: DashboardSummary = await dashboardService.getSummary();
+      setBalance(parseFloat(summary.balance));
+      setMonthToDate(summary.month_to_date);
+      countedRef.current = new Set(summary.recent_transactions.map((transaction) => transaction.id));
+      setAuditHistory(sortEntries(summary.recent_activity));
     } catch (error) {
-      console.error('Failed to fetch audit history:', error);
+      console.error('Failed to fetch dashboard:', error);
       toast({
         title: 'Error',
-        description: 'Failed to fetch transaction history',
+        description: 'Failed to fetch account summary',
         variant: 'destructive',
       });
     } finally {
+      setBalanceLoading(false);
       setHistoryLoading(false);
     }
   };
 
   useEffect(() => {
-    fetchBalance();
-    fetchAuditHistory();
+    fetchDashboard();
   }, []);
 
+  // Apply a pushed transaction to the activity table and monthly totals
+  const applyTransaction = (transaction: Transaction) => {
+    const direction = transaction.to_recipient_id === userRef.current?.recipient_id ? 'received' : 'sent';
+    setAuditHistory((entries) =>
+      sortEntries([
+        toActivity(transaction, direction),
+        ...entries.filter(
+          (entry) => entry.transaction !== transaction.id || entry.data?.direction !== direction
+        ),
+      ])
+    );
+
+    if (transaction.status !== 'completed' || countedRef.current.has(transaction.id)) return;
+    countedRef.current.add(transaction.id);
+    setMonthToDate((totals) => {
+      if (!totals || new Date(transaction.created_at) < new Date(totals.since)) return totals;
+      const add = (total: string) => (parseFloat(total) + parseFloat(transaction.amount)).toFixed(2);
+      return direction === 'received'
+        ? { ...totals, received: add(totals.received), count: totals.count + 1 }
+        : { ...totals, sent: add(totals.sent), count: totals.count + 1 };
+    });
+  };
+
+  // Incoming transfers are pushed by the server instead of polled
+  useEffect(
+    () =>
+      subscribeToEvents({
+        onBalance: (event) => setBalance(parseFloat(event.balance)),
+        onTransaction: applyTransaction,
+      }),
+    []
+  );
+
   useEffect(() => {
-    fetchAuditHistory();
+    setAuditHistory((entries) => sortEntries(entries));
   }, [sortField, sortOrder]);
 
   // Handle transfer submission
@@ -156,7 +210,7 @@ const Dashboard: React.FC = () => {
       setDescription('');
       
       // Refresh data
-      await Promise.all([fetchBalance(), fetchAuditHistory(), refreshUser()]);
+      await Promise.all([fetchDashboard(), refreshUser()]);
     } catch (error) {
       console.error('Transfer failed:', error);
       toast({
@@ -243,6 +297,12 @@ const Dashboard: React.FC = () => {
                 </span>
               </div>
             )}
+            {monthToDate && (
+              <p className="mt-2 text-sm text-muted-foreground">
+                This month: {formatCurrency(parseFloat(monthToDate.sent))} sent ·{' '}
+                {formatCurrency(parseFloat(monthToDate.received))} received
+              </p>
+            )}
             <button
               onClick={() => {
                 if (user?.recipient_id) {
@@ -363,7 +423,7 @@ const Dashboard: React.FC = () => {
           <Button
             variant="outline"
             size="sm"
-            onClick={() => fetchAuditHistory()}
+            onClick={() => fetchDashboard()}
             disabled={historyLoading}
           >
             <RefreshCw className={cn("h-4 w-4 mr-2", historyLoading && "animate-spin")} />